@@ -0,0 +1,31 @@
+from enums.tile_color import TILE_COLORS
+from model.state import CENTRAL_FACTORY_INDEX
+
+# Flat discrete encoding of a (source, color, destination) move:
+#   action = (source * COLOR_COUNT + color) * DESTINATION_COUNT + destination
+# Sources 0-4 are the factories and 5 the central factory, colors follow TileColor order,
+# destinations 0-4 are the pattern lines and 5 the floor line.
+COLOR_INDEX = {color: index for index, color in enumerate(TILE_COLORS)}
+
+SOURCE_COUNT = 6
+COLOR_COUNT = len(TILE_COLORS)
+DESTINATION_COUNT = 6
+ACTION_COUNT = SOURCE_COUNT * COLOR_COUNT * DESTINATION_COUNT
+
+CENTRAL_SOURCE = 5
+FLOOR_DESTINATION = 5
+
+
+def encode_move(move):
+    """Encode a (factory_index, color, pattern_line_index) move, as used by State, into an action id."""
+    factory_index, color, pattern_line_index = move
+    source = CENTRAL_SOURCE if factory_index == CENTRAL_FACTORY_INDEX else factory_index
+    return (source * COLOR_COUNT + COLOR_INDEX[color]) * DESTINATION_COUNT + pattern_line_index
+
+
+def decode_action(action):
+    """Decode an action id back into a (factory_index, color, pattern_line_index) move."""
+    source, destination = divmod(int(action), DESTINATION_COUNT)
+    source, color_index = divmod(source, COLOR_COUNT)
+    factory_index = CENTRAL_FACTORY_INDEX if source == CENTRAL_SOURCE else source
+    return factory_index, TILE_COLORS[color_index], destination
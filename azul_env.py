@@ -0,0 +1,201 @@
+import random
+
+import numpy as np
+
+from action_space import (ACTION_COUNT, COLOR_COUNT, COLOR_INDEX, DESTINATION_COUNT, CENTRAL_SOURCE, FLOOR_DESTINATION,
+                          TILE_COLORS, decode_action)
+from batched_engine import BatchedGameEngine
+from game_engine import GameEngine
+from model.player import Player
+from seeding import new_seed
+
+# Observation layout, always from the point of view of the player to move:
+#   30  tiles per color on the five factories and the central factory (6 x 5)
+#    1  starting player tile still in the central factory
+#   53  own board: wall (25), pattern lines as tiles per row and color (25), floor tiles, starting tile, score
+#   53  opponent board, same layout
+#   10  tiles per color in the bag and in the box lid
+#    1  round number
+BOARD_FEATURES = 25 + 25 + 3
+OBSERVATION_SIZE = 30 + 1 + 2 * BOARD_FEATURES + 10 + 1
+
+# The five cells of a wall row as features, by the row's 5 bits
+WALL_ROW_FEATURES = [tuple((bits >> column) & 1 for column in range(5)) for bits in range(32)]
+# A pattern line as features, by (color, count); an empty line has color None
+PATTERN_LINE_FEATURES = {(None, 0): (0,) * COLOR_COUNT}
+PATTERN_LINE_FEATURES.update({
+    (color, count): tuple(count if other is color else 0 for other in TILE_COLORS)
+    for color in TILE_COLORS for count in range(1, 6)
+})
+
+
+def encode_observation(state):
+    """Build the observation vector for the player to move in a State."""
+    features = []
+    for factory in state.factories:
+        features.extend(factory.tile_counts.values())
+    features.extend(state.central_factory.tile_counts.values())
+    features.append(state.central_factory.has_starting_player_tile())
+
+    player = state.current_player
+    opponent = state.player2 if player is state.player1 else state.player1
+    for seat in (player, opponent):
+        board = seat.board
+        wall = board.wall
+        for row in range(5):
+            features.extend(WALL_ROW_FEATURES[(wall >> (5 * row)) & 31])
+        for pattern_line in board.pattern_lines:
+            features.extend(PATTERN_LINE_FEATURES[pattern_line])
+        features.append(board.floor_line_count)
+        features.append(board.has_starting_marker)
+        features.append(seat.score)
+
+    features.extend(state.tile_bag.tile_counts.values())
+    features.extend(state.box_lid.tile_counts.values())
+    features.append(state.round_number)
+    return np.array(features, dtype=np.float32)
+
+
+def encode_batch_observations(engine):
+    """Build the observations of every game of a BatchedGameEngine, in the encode_observation layout."""
+    games = np.arange(engine.game_count)
+    observations = np.empty((engine.game_count, OBSERVATION_SIZE), dtype=np.float32)
+    observations[:, :30] = engine.factories.reshape(engine.game_count, 30)
+    observations[:, 30] = engine.starting_marker_in_center
+
+    colors = np.arange(COLOR_COUNT)
+    offset = 31
+    for seat in (engine.current_player, 1 - engine.current_player):
+        observations[:, offset:offset + 25] = engine.walls[games, seat].reshape(engine.game_count, 25)
+        line_colors = engine.pattern_line_colors[games, seat]
+        line_counts = engine.pattern_line_counts[games, seat]
+        pattern_lines = (line_colors[:, :, None] == colors) * line_counts[:, :, None]
+        observations[:, offset + 25:offset + 50] = pattern_lines.reshape(engine.game_count, 25)
+        observations[:, offset + 50] = engine.floor_line_counts[games, seat]
+        observations[:, offset + 51] = engine.starting_markers[games, seat]
+        observations[:, offset + 52] = engine.scores[games, seat]
+        offset += BOARD_FEATURES
+
+    observations[:, offset:offset + 5] = engine.tile_bag
+    observations[:, offset + 5:offset + 10] = engine.box_lid
+    observations[:, offset + 10] = engine.round_number
+    return observations
+
+
+def legal_action_mask(state):
+    """
+    Boolean mask of the legal action ids, the same moves as State.get_legal_moves. A color's legal
+    destinations do not depend on where it is taken from, so they are worked out once per color.
+    """
+    board = state.current_player.board
+    destinations = {}
+    actions = []
+    sources = [(source, factory) for source, factory in enumerate(state.factories)]
+    sources.append((CENTRAL_SOURCE, state.central_factory))
+    for source, factory in sources:
+        for color, count in factory.tile_counts.items():
+            if not count:
+                continue
+            color_destinations = destinations.get(color)
+            if color_destinations is None:
+                color_destinations = destinations[color] = board.legal_pattern_lines(color) + [FLOOR_DESTINATION]
+            first_action = (source * COLOR_COUNT + COLOR_INDEX[color]) * DESTINATION_COUNT
+            actions.extend(first_action + destination for destination in color_destinations)
+    mask = np.zeros(ACTION_COUNT, dtype=bool)
+    mask[actions] = True
+    return mask
+
+
+def outcome(margin):
+    """Terminal reward for a final score margin: 1 for a win, -1 for a loss, 0 for a tie."""
+    return float(np.sign(margin))
+
+
+class AzulEnv:
+    def __init__(self, opponent=None):
+        """
+        Single game environment with reset()/step(action), in the style of Gymnasium.
+
+        Actions are ids in the flat action space of action_space (ACTION_COUNT of them), and the
+        legal ones are given as info["action_mask"]. The reward is 0 until the game ends, then
+        1, -1 or 0 depending on whether the acting side won, lost or tied.
+
+        :param opponent: Optional Player that plays the second seat automatically. Without one, the
+                         agent plays both seats and every observation is from the player to move.
+        """
+        self.opponent = opponent
+        self.engine = GameEngine(print_enabled=False, visualize=False)
+        self.state = None
+        self.rng = None
+
+    def reset(self, seed=None):
+        """
+        Start a new game. Passing a seed restarts the sequence of game seeds, so the following resets
+        are reproducible as well; without one the sequence continues (or starts from a fresh seed).
+        """
+        if seed is not None or self.rng is None:
+            self.rng = random.Random(seed if seed is not None else new_seed())
+        agent = Player("Agent")
+        other = self.opponent if self.opponent is not None else Player("Agent 2")
+        self.state = self.engine.setup_game(player1=agent, player2=other, seed=self.rng.getrandbits(64))
+        return encode_observation(self.state), self.info()
+
+    def info(self):
+        return {
+            "action_mask": legal_action_mask(self.state),
+            "current_player": self.state.players.index(self.state.current_player),
+        }
+
+    def step(self, action):
+        state = self.state
+        acting_player = state.current_player
+        self.play_move(decode_action(action))
+        if self.opponent is not None:
+            while not state.game_over and state.current_player is self.opponent:
+                self.play_move(self.opponent.make_decision(state))
+
+        reward = 0.0
+        if state.game_over:
+            other_player = state.player2 if acting_player is state.player1 else state.player1
+            reward = outcome(acting_player.score - other_player.score)
+        return encode_observation(state), reward, state.game_over, False, self.info()
+
+    def play_move(self, move):
+        self.engine.apply_move(self.state, move)
+        if self.state.is_round_over():
+            self.engine.end_round(self.state)
+
+
+class AzulVectorEnv:
+    def __init__(self, env_count, seed=None):
+        """
+        Many self-play games stepped together on a BatchedGameEngine. Every game plays both seats
+        and observations are from the player to move, as in AzulEnv without an opponent.
+
+        Finished games are reset automatically; their final scores are reported in
+        info["final_scores"] on the step that ended them.
+        """
+        self.env_count = env_count
+        self.engine = BatchedGameEngine(env_count, seed=seed)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.engine.rng = np.random.default_rng(seed)
+        self.engine.reset()
+        return encode_batch_observations(self.engine), {"action_mask": self.engine.legal_action_mask()}
+
+    def step(self, actions):
+        engine = self.engine
+        games = np.arange(self.env_count)
+        acting_player = engine.current_player.copy()
+        engine.step(actions)
+
+        terminated = engine.game_over.copy()
+        final_scores = engine.scores.copy()
+        margin = final_scores[games, acting_player] - final_scores[games, 1 - acting_player]
+        rewards = np.where(terminated, np.sign(margin), 0).astype(np.float32)
+        if terminated.any():
+            engine.reset(terminated)
+
+        info = {"action_mask": engine.legal_action_mask(), "final_scores": final_scores}
+        return encode_batch_observations(engine), rewards, terminated, np.zeros(self.env_count, dtype=bool), info
@@ -0,0 +1,248 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from game_engine import GameEngine
+from profiler import PhaseProfiler
+from seeding import derive_seed
+from streaming_statistics import GameDetailsRecorder, StreamingStatistics
+
+class GameResult:
+    def __init__(self, game_index, player_names, scores, rounds_played, seed=None,
+                 round_scores=None, floor_penalties=None, completed_sets=None):
+        """
+        The details are only recorded on request, see play_single_game:
+
+        :param round_scores: Points each seat scored in each round, end-game bonuses excluded.
+        :param floor_penalties: Floor line penalty points each seat lost in each round, as positive numbers.
+        :param completed_sets: Completed rows, columns and color sets on each seat's final wall.
+        """
+        self.game_index = game_index
+        self.seed = seed  # Game seed, to replay the game with play_single_game
+        self.player_names = player_names
+        self.scores = scores
+        self.rounds_played = rounds_played
+        self.round_scores = round_scores
+        self.floor_penalties = floor_penalties
+        self.completed_sets = completed_sets
+
+    @property
+    def winning_seats(self):
+        """Return the seat indices (0 or 1) holding the highest score."""
+        highest_score = max(self.scores)
+        return [seat for seat, score in enumerate(self.scores) if score == highest_score]
+
+    @property
+    def is_tie(self):
+        return len(self.winning_seats) > 1
+
+
+def play_single_game(game_index, player1_factory, player2_factory, seed=None, profiler=None, details=False):
+    """
+    Play one headless game and return its GameResult.
+
+    :param details: Record the round scores, floor penalties and completed wall sets in the result,
+                    for StreamingStatistics. Costs the events of the game.
+    """
+    engine = GameEngine(print_enabled=False, visualize=False, profiler=profiler)
+    recorder = None
+    if details:
+        recorder = GameDetailsRecorder()
+        engine.subscribe(recorder)
+    player1 = player1_factory("Player 1")
+    player2 = player2_factory("Player 2")
+    state = engine.play_game(player1=player1, player2=player2, seed=seed)
+    return GameResult(
+        game_index=game_index,
+        player_names=[player.name for player in state.players],
+        scores=[player.score for player in state.players],
+        rounds_played=state.round_number - 1,
+        seed=state.seed,
+        round_scores=recorder.round_scores if recorder is not None else None,
+        floor_penalties=recorder.floor_penalties if recorder is not None else None,
+        completed_sets=recorder.completed_sets if recorder is not None else None,
+    )
+
+
+def play_game_chunk(first_game_index, game_count, player1_factory, player2_factory, master_seed, profile=False,
+                    aggregate=False):
+    """
+    Play a consecutive chunk of games. Runs inside a worker process.
+
+    Game i is seeded with derive_seed(master_seed, i), so its result does not depend on the
+    chunking or on which worker plays it.
+
+    :param aggregate: Fold the detailed results into a StreamingStatistics in the worker and return it
+                      instead of the results, so only a fixed-size summary leaves the worker.
+    :return: The list of GameResult (or the StreamingStatistics), and the chunk's PhaseProfiler if profile is set, else None.
+    """
+    profiler = PhaseProfiler() if profile else None
+    results = (
+        play_single_game(game_index, player1_factory, player2_factory, derive_seed(master_seed, game_index), profiler, aggregate)
+        for game_index in range(first_game_index, first_game_index + game_count)
+    )
+    if aggregate:
+        statistics = StreamingStatistics()
+        statistics.add_all(results)
+        return statistics, profiler
+    return list(results), profiler
+
+
+class BatchStatistics:
+    def __init__(self):
+        self.game_count = 0
+        self.win_counts = [0, 0]  # Outright wins per seat, ties excluded
+        self.tie_count = 0
+        self.score_sums = [0, 0]
+        self.score_histograms = [{}, {}]  # score -> number of games, per seat
+        self.round_histogram = {}  # rounds played -> number of games
+
+    def add(self, result):
+        """Fold a single GameResult into the statistics."""
+        self.game_count += 1
+        if result.is_tie:
+            self.tie_count += 1
+        else:
+            self.win_counts[result.winning_seats[0]] += 1
+        for seat, score in enumerate(result.scores):
+            self.score_sums[seat] += score
+            histogram = self.score_histograms[seat]
+            histogram[score] = histogram.get(score, 0) + 1
+        self.round_histogram[result.rounds_played] = self.round_histogram.get(result.rounds_played, 0) + 1
+
+    def add_all(self, results):
+        for result in results:
+            self.add(result)
+
+    def merge(self, other):
+        """Merge another BatchStatistics into this one, e.g. partial results from another run."""
+        self.game_count += other.game_count
+        self.tie_count += other.tie_count
+        for seat in range(2):
+            self.win_counts[seat] += other.win_counts[seat]
+            self.score_sums[seat] += other.score_sums[seat]
+            for score, count in other.score_histograms[seat].items():
+                self.score_histograms[seat][score] = self.score_histograms[seat].get(score, 0) + count
+        for rounds, count in other.round_histogram.items():
+            self.round_histogram[rounds] = self.round_histogram.get(rounds, 0) + count
+
+    def win_rate(self, seat):
+        return self.win_counts[seat] / self.game_count if self.game_count else 0.0
+
+    @property
+    def tie_rate(self):
+        return self.tie_count / self.game_count if self.game_count else 0.0
+
+    def mean_score(self, seat):
+        return self.score_sums[seat] / self.game_count if self.game_count else 0.0
+
+    @property
+    def mean_rounds(self):
+        if not self.game_count:
+            return 0.0
+        return sum(rounds * count for rounds, count in self.round_histogram.items()) / self.game_count
+
+    def summary(self):
+        """Return the aggregate statistics as a plain dictionary."""
+        return {
+            "games": self.game_count,
+            "win_rate": [self.win_rate(seat) for seat in range(2)],
+            "tie_rate": self.tie_rate,
+            "mean_score": [self.mean_score(seat) for seat in range(2)],
+            "score_distribution": [dict(sorted(histogram.items())) for histogram in self.score_histograms],
+            "mean_rounds": self.mean_rounds,
+            "round_distribution": dict(sorted(self.round_histogram.items())),
+        }
+
+
+class BatchSimulator:
+    def __init__(self, player1_factory, player2_factory, workers=None, chunk_size=100, seed=None, profile=False):
+        """
+        Play many headless games across a process pool.
+
+        Every game gets its own seed stream derived from one master seed, so a run is reproducible
+        whatever the number of workers, and two simulators with the same seed draw their tile bags
+        from the same streams, which pairs up the games of different players.
+
+        :param player1_factory: Picklable callable taking a player name and returning a Player (e.g. RandomPlayer).
+        :param player2_factory: Same as player1_factory, for the second seat.
+        :param workers: Number of worker processes. Defaults to the CPU count; 1 plays in-process.
+        :param chunk_size: Number of games each worker plays per task and per yielded chunk.
+        :param seed: Master seed. A fresh one is drawn if omitted and kept in self.seed.
+        :param profile: Time the phases of every game in the workers and merge the timings into self.profiler.
+        """
+        self.player1_factory = player1_factory
+        self.player2_factory = player2_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self.profiler = PhaseProfiler() if profile else None
+
+    def iter_chunks(self, game_count, aggregate=False):
+        """
+        Yield lists of GameResult as chunks finish. Chunks arrive in completion order,
+        so use GameResult.game_index if the original order matters.
+
+        :param aggregate: Yield each chunk's StreamingStatistics instead, see play_game_chunk.
+        """
+        chunks = [
+            (first_game_index, min(self.chunk_size, game_count - first_game_index))
+            for first_game_index in range(0, game_count, self.chunk_size)
+        ]
+
+        if self.workers == 1:
+            for first_game_index, count in chunks:
+                yield self.collect_chunk(play_game_chunk(
+                    first_game_index, count, self.player1_factory, self.player2_factory, self.seed, self.profiler is not None,
+                    aggregate))
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            next_chunk = 0
+            # Keep a bounded number of chunks in flight so results never pile up
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < self.workers * 2:
+                    first_game_index, count = chunks[next_chunk]
+                    pending.add(executor.submit(
+                        play_game_chunk, first_game_index, count, self.player1_factory, self.player2_factory, self.seed,
+                        self.profiler is not None, aggregate))
+                    next_chunk += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self.collect_chunk(future.result())
+
+    def collect_chunk(self, chunk):
+        results, profiler = chunk
+        if profiler is not None:
+            self.profiler.merge(profiler)
+        return results
+
+    def run(self, game_count, on_chunk=None):
+        """
+        Play game_count games and return their BatchStatistics.
+
+        :param on_chunk: Optional callback receiving each list of GameResult as it arrives.
+        """
+        statistics = BatchStatistics()
+        for results in self.iter_chunks(game_count):
+            statistics.add_all(results)
+            if on_chunk is not None:
+                on_chunk(results)
+        return statistics
+
+    def stream(self, game_count, on_update=None):
+        """
+        Play game_count games with details and return their StreamingStatistics. Workers send a
+        summary per chunk instead of its results, so memory stays flat however many games are played.
+
+        :param on_update: Optional callback receiving the running StreamingStatistics after each chunk,
+                          e.g. to report live summaries while the run goes on.
+        """
+        statistics = StreamingStatistics()
+        for chunk_statistics in self.iter_chunks(game_count, aggregate=True):
+            statistics.merge(chunk_statistics)
+            if on_update is not None:
+                on_update(statistics)
+        return statistics
@@ -0,0 +1,220 @@
+import numpy as np
+
+from action_space import ACTION_COUNT, COLOR_COUNT, DESTINATION_COUNT, SOURCE_COUNT, CENTRAL_SOURCE, FLOOR_DESTINATION
+from model.player_board import FLOOR_LINE_CAPACITY, FLOOR_SCORE_BY_LENGTH, ROW_BONUS, COLUMN_BONUS, COLOR_BONUS
+from model.scoring_tables import RUN_LENGTH
+
+FACTORY_COUNT = 5
+TILES_PER_FACTORY = 4
+TILES_PER_COLOR = 20
+
+FLOOR_SCORE_TABLE = np.array(FLOOR_SCORE_BY_LENGTH, dtype=np.int32)  # See PlayerBoard
+
+
+# RUN_LENGTH_TABLE[line_bits, position]: length of the run through position on a wall row or column
+RUN_LENGTH_TABLE = np.array(RUN_LENGTH, dtype=np.int32)
+BIT_VALUES = 1 << np.arange(5)
+
+
+class BatchedGameEngine:
+    def __init__(self, game_count, seed=None):
+        """
+        Play game_count two-player games in lockstep, with the whole batch held in NumPy arrays.
+
+        Follows the rules of GameEngine.play_turn and GameEngine.end_round. Actions use the flat
+        encoding from action_space, with one action per game per step.
+        """
+        self.game_count = game_count
+        self.rng = np.random.default_rng(seed)
+
+        # Sources 0-4 are the factories, source 5 is the central factory
+        self.factories = np.zeros((game_count, SOURCE_COUNT, COLOR_COUNT), dtype=np.int16)
+        self.starting_marker_in_center = np.zeros(game_count, dtype=bool)
+        self.tile_bag = np.zeros((game_count, COLOR_COUNT), dtype=np.int16)
+        self.box_lid = np.zeros((game_count, COLOR_COUNT), dtype=np.int16)
+
+        # Per game and player; pattern line colors are -1 while the line is empty
+        self.walls = np.zeros((game_count, 2, 5, 5), dtype=bool)
+        self.pattern_line_colors = np.full((game_count, 2, 5), -1, dtype=np.int8)
+        self.pattern_line_counts = np.zeros((game_count, 2, 5), dtype=np.int8)
+        self.floor_line_counts = np.zeros((game_count, 2), dtype=np.int16)
+        self.starting_markers = np.zeros((game_count, 2), dtype=bool)
+        self.scores = np.zeros((game_count, 2), dtype=np.int32)
+
+        self.current_player = np.zeros(game_count, dtype=np.int8)
+        self.round_number = np.ones(game_count, dtype=np.int32)
+        self.game_over = np.zeros(game_count, dtype=bool)
+
+        self.reset()
+
+    def reset(self, games=None):
+        """Start new games, for all games or only those selected by an index or boolean array."""
+        if games is None:
+            games = np.arange(self.game_count)
+        elif np.asarray(games).dtype == bool:
+            games = np.flatnonzero(games)
+
+        self.factories[games] = 0
+        self.tile_bag[games] = TILES_PER_COLOR
+        self.box_lid[games] = 0
+        self.walls[games] = False
+        self.pattern_line_colors[games] = -1
+        self.pattern_line_counts[games] = 0
+        self.floor_line_counts[games] = 0
+        self.starting_markers[games] = False
+        self.scores[games] = 0
+        self.current_player[games] = 0
+        self.round_number[games] = 1
+        self.game_over[games] = False
+        self.refresh_factories(games)
+
+    def legal_action_mask(self):
+        """Return a (game_count, ACTION_COUNT) boolean mask of the legal actions for the player to move."""
+        games = np.arange(self.game_count)
+        player = self.current_player
+        line_colors = self.pattern_line_colors[games, player]  # (games, lines)
+        line_counts = self.pattern_line_counts[games, player]
+        walls = self.walls[games, player]  # (games, rows, columns)
+
+        colors = np.arange(COLOR_COUNT)[:, None]  # (colors, 1)
+        rows = np.arange(5)[None, :]  # (1, lines)
+        color_on_wall = walls[:, rows, (colors + rows) % 5]  # (games, colors, lines)
+        empty_line = line_counts[:, None, :] == 0
+        same_color_with_space = (line_colors[:, None, :] == colors) & (line_counts[:, None, :] <= rows)
+        destination_ok = np.ones((self.game_count, COLOR_COUNT, DESTINATION_COUNT), dtype=bool)
+        destination_ok[:, :, :5] = (empty_line & ~color_on_wall) | same_color_with_space
+
+        available = self.factories > 0  # (games, sources, colors)
+        mask = available[:, :, :, None] & destination_ok[:, None, :, :]
+        mask[self.game_over] = False
+        return mask.reshape(self.game_count, ACTION_COUNT)
+
+    def random_actions(self, mask=None):
+        """Pick a uniformly random legal action per game. Finished games get action 0."""
+        if mask is None:
+            mask = self.legal_action_mask()
+        return np.argmax(self.rng.random(mask.shape, dtype=np.float32) * mask, axis=1)
+
+    def step(self, actions):
+        """
+        Apply one action for the player to move in every unfinished game, then score the round
+        and refill the factories in the games whose round ended. Actions of finished games are ignored.
+
+        :return: Boolean array marking the games whose round ended on this step.
+        """
+        actions = np.asarray(actions)
+        games = np.flatnonzero(~self.game_over)
+        action = actions[games]
+        source, destination = np.divmod(action, DESTINATION_COUNT)
+        source, color = np.divmod(source, COLOR_COUNT)
+        player = self.current_player[games]
+
+        selected_tile_count = self.factories[games, source, color]
+        if np.any(selected_tile_count == 0):
+            raise ValueError("Action selects a color that is not on the chosen factory.")
+
+        # The first player to take from the central factory also takes the starting player tile
+        takes_marker = (source == CENTRAL_SOURCE) & self.starting_marker_in_center[games]
+        self.starting_markers[games[takes_marker], player[takes_marker]] = True
+        self.starting_marker_in_center[games[takes_marker]] = False
+
+        # Take the tiles and push the rest of a factory to the central factory
+        self.factories[games, source, color] = 0
+        from_factory = source != CENTRAL_SOURCE
+        factory_games, factory_sources = games[from_factory], source[from_factory]
+        self.factories[factory_games, CENTRAL_SOURCE] += self.factories[factory_games, factory_sources]
+        self.factories[factory_games, factory_sources] = 0
+
+        # Place in the pattern line when it is empty or holds the same color, and the color is not on the wall yet
+        row = np.minimum(destination, 4)
+        line_color = self.pattern_line_colors[games, player, row]
+        line_count = self.pattern_line_counts[games, player, row]
+        color_on_wall = self.walls[games, player, row, (color + row) % 5]
+        fits = (destination != FLOOR_DESTINATION) & ~color_on_wall & ((line_count == 0) | (line_color == color))
+        placed = np.where(fits, np.minimum(row + 1 - line_count, selected_tile_count), 0)
+        self.pattern_line_colors[games[fits], player[fits], row[fits]] = color[fits]
+        self.pattern_line_counts[games, player, row] = line_count + placed
+
+        # Everything else goes to the floor line, up to its capacity, and its tiles straight to the box lid
+        to_floor = selected_tile_count - placed
+        floor_length = self.floor_line_counts[games, player] + self.starting_markers[games, player]
+        space = np.maximum(FLOOR_LINE_CAPACITY - floor_length, 0)
+        self.floor_line_counts[games, player] += np.minimum(space, to_floor).astype(np.int16)
+        self.box_lid[games, color] += to_floor
+
+        self.current_player[games] ^= 1
+
+        round_over = np.zeros(self.game_count, dtype=bool)
+        round_over[games] = self.factories[games].sum(axis=(1, 2)) == 0
+        if round_over.any():
+            self.end_round(np.flatnonzero(round_over))
+        return round_over
+
+    def end_round(self, games):
+        """Move completed pattern lines to the wall, score the round, refill the factories and check for game over."""
+        for player in range(2):
+            round_score = np.zeros(len(games), dtype=np.int32)
+            for row in range(5):
+                complete = self.pattern_line_counts[games, player, row] == row + 1
+                completed_games = games[complete]
+                color = self.pattern_line_colors[completed_games, player, row].astype(np.int64)
+                column = (color + row) % 5
+                self.walls[completed_games, player, row, column] = True
+                # Rows are scored in order, so later rows see the tiles placed earlier this round
+                row_line = self.walls[completed_games, player, row, :].dot(BIT_VALUES)
+                column_line = self.walls[completed_games, player, :, column].dot(BIT_VALUES)
+                round_score[complete] += RUN_LENGTH_TABLE[row_line, column] + RUN_LENGTH_TABLE[column_line, row] - 1
+                # The rest of the line goes to the box lid
+                np.add.at(self.box_lid, (completed_games, color), row)
+                self.pattern_line_counts[completed_games, player, row] = 0
+                self.pattern_line_colors[completed_games, player, row] = -1
+
+            floor_length = self.floor_line_counts[games, player] + self.starting_markers[games, player]
+            round_score += FLOOR_SCORE_TABLE[floor_length]
+            self.floor_line_counts[games, player] = 0
+            self.starting_markers[games, player] = False
+            self.scores[games, player] += round_score
+
+        self.round_number[games] += 1
+        self.game_over[games] = self.walls[games].all(axis=3).any(axis=(1, 2))
+        # Like GameEngine.end_round, the starting player tile has already left the floor lines when the
+        # new starting player is looked up, so turn order simply carries on into the next round
+        self.refresh_factories(games)
+
+        finished = games[self.game_over[games]]
+        if len(finished):
+            self.scores[finished] += self.end_game_points(finished)
+
+    def refresh_factories(self, games):
+        """Put the starting player tile back in the center and fill each factory with 4 tiles from the bag."""
+        self.factories[games, CENTRAL_SOURCE] = 0
+        self.starting_marker_in_center[games] = True
+        for factory in range(FACTORY_COUNT):
+            # Refill the bag from the box lid when it cannot fill a factory
+            short = games[self.tile_bag[games].sum(axis=1) < TILES_PER_FACTORY]
+            self.tile_bag[short] += self.box_lid[short]
+            self.box_lid[short] = 0
+            for _ in range(TILES_PER_FACTORY):
+                remaining = self.tile_bag[games].sum(axis=1)
+                drawing = games[remaining > 0]
+                # Pick a tile uniformly from the bag: find the color whose cumulative count exceeds the pick
+                pick = (self.rng.random(len(drawing)) * remaining[remaining > 0]).astype(np.int64)
+                color = (pick[:, None] >= np.cumsum(self.tile_bag[drawing], axis=1)).sum(axis=1)
+                self.tile_bag[drawing, color] -= 1
+                self.factories[drawing, factory, color] += 1
+
+    def end_game_points(self, games):
+        """End game bonuses per player: 2 per completed row, 7 per completed column and 10 per completed color."""
+        walls = self.walls[games]
+        rows = walls.all(axis=3).sum(axis=2)
+        columns = walls.all(axis=2).sum(axis=2)
+        # Color c sits in column (c + row) % 5 of each row
+        rows_index = np.arange(5)[:, None]
+        colors = walls[:, :, rows_index, (np.arange(COLOR_COUNT)[None, :] + rows_index) % 5].all(axis=2).sum(axis=2)
+        return (rows * ROW_BONUS + columns * COLUMN_BONUS + colors * COLOR_BONUS).astype(np.int32)
+
+    def play_random_games(self):
+        """Play every unfinished game to the end with uniformly random legal actions and return the scores."""
+        while not self.game_over.all():
+            self.step(self.random_actions())
+        return self.scores
@@ -0,0 +1,30 @@
+"""Macro-benchmarks: whole games, one game per loop."""
+import time
+
+from game_engine import GameEngine
+from model.random_player import RandomPlayer
+
+GAME_SEED = 2024
+
+
+def play_game_random_players(loops):
+    engine = GameEngine()
+    start = time.perf_counter()
+    for seed in range(GAME_SEED, GAME_SEED + loops):
+        engine.play_game(RandomPlayer("Player 1"), RandomPlayer("Player 2"), seed=seed)
+    return time.perf_counter() - start
+
+
+def play_game_random_players_validated(loops):
+    """The same games with validate_tiles on, to keep the cost of the debugging mode in view."""
+    engine = GameEngine(validate_tiles=True)
+    start = time.perf_counter()
+    for seed in range(GAME_SEED, GAME_SEED + loops):
+        engine.play_game(RandomPlayer("Player 1"), RandomPlayer("Player 2"), seed=seed)
+    return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "play_game_random_players": play_game_random_players,
+    "play_game_random_players_validated": play_game_random_players_validated,
+}
@@ -0,0 +1,142 @@
+"""
+Micro-benchmarks of engine hot paths.
+
+Each benchmark takes a loop count, builds everything it needs outside the timed region, and
+returns the seconds spent running the operation that many times.
+"""
+import random
+import time
+
+from enums.tile_color import TILE_COLORS
+from game_engine import GameEngine
+from model.box_lid import BoxLid
+from model.factory import Factory
+from model.player_board import PlayerBoard, FLOOR_LINE_INDEX
+from model.random_player import RandomPlayer
+from model.tile_bag import TileBag
+
+POOL_SEED = 1234
+POOL_SIZE = 64
+
+_pools = {}
+
+
+def pool(name, build):
+    """Build a pool of sample inputs once per process; benchmarks copy from it instead of rebuilding."""
+    if name not in _pools:
+        _pools[name] = build(POOL_SIZE)
+    return _pools[name]
+
+
+def sample_round_end_boards(count):
+    """Boards at the end of a round, taken from seeded random games, ready to be scored."""
+    engine = GameEngine()
+    boards = []
+    seed = POOL_SEED
+    while len(boards) < count:
+        state = engine.setup_game(RandomPlayer("Player 1"), RandomPlayer("Player 2"), seed=seed)
+        while not state.game_over and len(boards) < count:
+            while not state.is_round_over():
+                engine.apply_move(state, state.current_player.make_decision(state))
+            boards.extend(player.board.copy() for player in state.players)
+            engine.end_round(state)
+        seed += 1
+    return boards[:count]
+
+
+def sample_mid_round_states(count):
+    """States part way through a round of seeded random games."""
+    engine = GameEngine()
+    rng = random.Random(POOL_SEED)
+    states = []
+    for seed in range(POOL_SEED, POOL_SEED + count):
+        state = engine.setup_game(RandomPlayer("Player 1"), RandomPlayer("Player 2"), seed=seed)
+        for _ in range(rng.randrange(8)):
+            engine.apply_move(state, state.current_player.make_decision(state))
+        states.append(state)
+    return states
+
+
+def sample_scored_boards(count):
+    """Boards right after round scoring, so some walls already hold a color and its tiles go to the floor instead."""
+    boards = sample_round_end_boards(count)
+    for board in boards:
+        board.move_tiles_to_wall_and_score()
+    return boards
+
+
+def place_tile_in_pattern_line(loops):
+    rng = random.Random(POOL_SEED)
+    boards = pool("scored_boards", sample_scored_boards)
+    placements = [(boards[index % len(boards)].copy(), rng.choice(TILE_COLORS), rng.randrange(FLOOR_LINE_INDEX + 1), rng.randint(1, 4))
+                  for index in range(loops)]
+    start = time.perf_counter()
+    for board, color, pattern_line_index, tile_count in placements:
+        board.place_tile_in_pattern_line(color, pattern_line_index, tile_count)
+    return time.perf_counter() - start
+
+
+def move_tiles_to_wall_and_score(loops):
+    boards = pool("round_end_boards", sample_round_end_boards)
+    boards = [boards[index % len(boards)].copy() for index in range(loops)]
+    start = time.perf_counter()
+    for board in boards:
+        board.move_tiles_to_wall_and_score()
+    return time.perf_counter() - start
+
+
+def calculate_score_for_tile(loops):
+    rng = random.Random(POOL_SEED)
+    boards = pool("round_end_boards", sample_round_end_boards)
+    cells = [(rng.choice(boards), rng.randrange(5), rng.randrange(5)) for _ in range(1024)]
+    cells = (cells * (loops // len(cells) + 1))[:loops]
+    start = time.perf_counter()
+    for board, row, column in cells:
+        board.calculate_score_for_tile(row, column)
+    return time.perf_counter() - start
+
+
+def draw_tiles(loops):
+    # Five draws of four tiles empty a fifth of a fresh bag, as at the start of a round
+    bags = [TileBag(BoxLid(), random.Random(index)) for index in range(loops // 5 + 1)]
+    start = time.perf_counter()
+    for bag in bags:
+        bag.draw_tiles(4)
+        bag.draw_tiles(4)
+        bag.draw_tiles(4)
+        bag.draw_tiles(4)
+        bag.draw_tiles(4)
+    return (time.perf_counter() - start) * loops / (len(bags) * 5)
+
+
+def remove_and_return_tiles_of_color(loops):
+    rng = random.Random(POOL_SEED)
+    factories = []
+    for index in range(loops):
+        factory = Factory()
+        factory.add_tiles(TileBag(BoxLid(), rng).draw_tiles(4))
+        factories.append((factory, rng.choice(factory.available_colors())))
+    start = time.perf_counter()
+    for factory, color in factories:
+        factory.remove_and_return_tiles_of_color(color)
+    return time.perf_counter() - start
+
+
+def count_tiles_in_game(loops):
+    engine = GameEngine()
+    states = pool("mid_round_states", sample_mid_round_states)
+    states = (states * (loops // len(states) + 1))[:loops]
+    start = time.perf_counter()
+    for state in states:
+        engine.count_tiles_in_game(state)
+    return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "place_tile_in_pattern_line": place_tile_in_pattern_line,
+    "move_tiles_to_wall_and_score": move_tiles_to_wall_and_score,
+    "calculate_score_for_tile": calculate_score_for_tile,
+    "draw_tiles": draw_tiles,
+    "remove_and_return_tiles_of_color": remove_and_return_tiles_of_color,
+    "count_tiles_in_game": count_tiles_in_game,
+}
@@ -0,0 +1,151 @@
+"""
+Run the benchmarks and compare them with a baseline.
+
+    python -m benchmarks.run                  # compare with benchmarks/baseline.json
+    python -m benchmarks.run --save           # record a new baseline
+    python -m benchmarks.run --threshold 5 --filter draw_tiles
+
+Each benchmark is timed over a number of loops chosen so one sample takes about --min-time
+seconds, and the fastest of --repeats samples is kept, which is the least noisy estimate of
+its cost. The garbage collector is paused while timing. A benchmark regresses when it is more
+than --threshold percent slower than the baseline; the command then exits with status 1.
+Comparisons reuse the baseline's loop counts, so both sides time the same work, and a benchmark
+that looks regressed is timed again up to --retries times before it is reported, so a burst of
+load on a shared machine does not fail the run. Baselines are only comparable on the machine
+that recorded them.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks import macro, micro
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 10.0  # Percent
+
+
+def all_benchmarks():
+    benchmarks = {f"micro.{name}": function for name, function in micro.BENCHMARKS.items()}
+    benchmarks.update({f"macro.{name}": function for name, function in macro.BENCHMARKS.items()})
+    return benchmarks
+
+
+def calibrate(function, min_time):
+    """Return the loop count that makes one sample of function take at least min_time seconds."""
+    loops = 1
+    while True:
+        elapsed = function(loops)
+        if elapsed >= min_time:
+            return loops
+        # Aim a little past min_time, growing at most 10x per step to stay safe with noisy first samples
+        loops = max(loops + 1, min(loops * 10, int(loops * min_time * 1.2 / max(elapsed, 1e-9))))
+
+
+def run_benchmark(function, loops=None, repeats=5, min_time=0.1):
+    # As in timeit, keep the garbage collector from firing at random points inside the timed loops
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if loops is None:
+            loops = calibrate(function, min_time)
+        samples = [function(loops) for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        gc.collect()
+    return {"ns_per_op": min(samples) / loops * 1e9, "loops": loops, "repeats": repeats}
+
+
+def run_all(names, baseline=None, repeats=5, min_time=0.1, report=print):
+    benchmarks = all_benchmarks()
+    results = {}
+    for name in names:
+        loops = baseline["results"][name]["loops"] if baseline and name in baseline["results"] else None
+        results[name] = run_benchmark(benchmarks[name], loops, repeats, min_time)
+        report(f"{name:50s} {results[name]['ns_per_op']:14.1f} ns/op")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline ns, current ns, change in percent) for every benchmark in both, and the regressed names."""
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["ns_per_op"]
+        change = (result["ns_per_op"] / before - 1) * 100
+        rows.append((name, before, result["ns_per_op"], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    baseline = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engine benchmarks with regression thresholds.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file to compare with or save to.")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline instead of comparing.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown in percent.")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per sample when calibrating loop counts.")
+    parser.add_argument("--retries", type=int, default=2, help="Times to re-measure a regressed benchmark.")
+    args = parser.parse_args(argv)
+
+    names = [name for name in all_benchmarks() if args.filter in name]
+    baseline = None if args.save else load_baseline(args.baseline)
+    results = run_all(names, baseline, args.repeats, args.min_time)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save to create one.")
+        return 0
+
+    rows, regressions = compare(results, baseline, args.threshold)
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        print(f"Re-measuring {len(regressions)} regressed benchmark(s)")
+        for name, result in run_all(regressions, baseline, args.repeats, args.min_time).items():
+            if result["ns_per_op"] < results[name]["ns_per_op"]:
+                results[name] = result
+        rows, regressions = compare(results, baseline, args.threshold)
+    print()
+    for name, before, after, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:50s} {before:12.1f} -> {after:12.1f} ns/op {change:+7.1f}%{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold}%.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
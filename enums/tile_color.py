@@ -5,4 +5,13 @@ class TileColor(Enum):
     YELLOW = "yellow"
     RED = "red"
     BLACK = "black"
-    WHITE = "white"
\ No newline at end of file
+    WHITE = "white"
+
+    # Members are singletons, so identity hashing is valid and much faster than
+    # Enum's default name hashing for the per-color count dictionaries
+    __hash__ = object.__hash__
+
+
+# The colors in definition order. Iterating this tuple is much cheaper than iterating the enum class,
+# which matters when building the per-color count dictionaries of every container.
+TILE_COLORS = tuple(TileColor)
@@ -0,0 +1,140 @@
+"""
+Events a GameEngine reports to its subscribers.
+
+A subscriber is any object with a handle_event(event) method, registered with GameEngine.subscribe.
+The engine only builds events while it has subscribers, so headless games pay nothing for them.
+
+Events carry the live State, which keeps changing after the event has been handled; copy out
+whatever needs to outlive the call.
+"""
+
+
+class GameEvent:
+    def __init__(self, state):
+        self.state = state
+
+
+class GameStarted(GameEvent):
+    """The state is set up, before the first factories are filled."""
+
+
+class FactoriesFilled(GameEvent):
+    """The factories were filled for a new round."""
+
+
+class RoundStarted(GameEvent):
+    def __init__(self, state, round_number):
+        super().__init__(state)
+        self.round_number = round_number
+
+
+class TurnStarted(GameEvent):
+    def __init__(self, state, player):
+        super().__init__(state)
+        self.player = player
+
+
+class StartingMarkerTaken(GameEvent):
+    """Reported just before the MoveApplied of the move that took the starting player tile."""
+
+    def __init__(self, state, player):
+        super().__init__(state)
+        self.player = player
+
+
+class MoveApplied(GameEvent):
+    def __init__(self, state, player, move, tile_count):
+        """
+        :param move: The (factory_index, color, pattern_line_index) move.
+        :param tile_count: Number of tiles the move took from the factory.
+        """
+        super().__init__(state)
+        self.player = player
+        self.move = move
+        self.tile_count = tile_count
+
+
+class RoundEnded(GameEvent):
+    """The last tile of the round was taken; the boards are not scored yet."""
+
+    def __init__(self, state, round_number):
+        super().__init__(state)
+        self.round_number = round_number
+
+
+class RoundScored(GameEvent):
+    def __init__(self, state, round_number, round_scores):
+        """
+        :param round_scores: Points each player scored this round, in State.players order.
+        """
+        super().__init__(state)
+        self.round_number = round_number
+        self.round_scores = round_scores
+
+
+class GameOver(GameEvent):
+    def __init__(self, state, scores, winners):
+        """
+        :param scores: Final scores in State.players order.
+        :param winners: The players with the highest score, more than one on a tie.
+        """
+        super().__init__(state)
+        self.scores = scores
+        self.winners = winners
+
+
+class ConsoleLogger:
+    """Subscriber that prints the game to stdout, as GameEngine(print_enabled=True) does."""
+
+    def handle_event(self, event):
+        handler = getattr(self, "on_" + type(event).__name__, None)
+        if handler is not None:
+            handler(event)
+
+    def on_GameStarted(self, event):
+        print("Starting the game...")
+
+    def on_RoundStarted(self, event):
+        print(f"\n-------------------------------------\nRound {event.round_number}\n-------------------------------------")
+
+    def on_TurnStarted(self, event):
+        print(f"\n-------------------------------------\n{event.player.name}'s turn\n-------------------------------------")
+        self.print_game_state(event.state)
+
+    def on_StartingMarkerTaken(self, event):
+        print("Starting player marker taken!")
+
+    def on_MoveApplied(self, event):
+        _, selected_color, pattern_line_index = event.move
+        print(f"{event.player.name} placed {event.tile_count} {selected_color.name} tiles in pattern line {pattern_line_index + 1}.")
+
+    def on_RoundEnded(self, event):
+        print(f"\n-------------------------------------\nEND OF ROUND {event.round_number}\n-------------------------------------")
+        for player in event.state.players:
+            print(f"\n{player.name} board before moving, but after last move:")
+            player.board.print_board()
+
+    def on_RoundScored(self, event):
+        print(f"\n-------------------------------------\nSCORING AND MOVING TO WALL\n-------------------------------------")
+        for player, score in zip(event.state.players, event.round_scores):
+            print(f"\n{player.name} scored {score} points this round.")
+            print(f"{player.name} board after moving:")
+            player.board.print_board()
+
+    def on_GameOver(self, event):
+        print(f"\n-------------------------------------\nFINAL SCORES\n-------------------------------------")
+        for player, score in zip(event.state.players, event.scores):
+            print(f"{player.name}: {score} points")
+        if len(event.winners) > 1:
+            print(f"Tie between: {', '.join(player.name for player in event.winners)}")
+        else:
+            print(f"Winner: {event.winners[0].name}")
+
+    def print_game_state(self, state):
+        print("\nCurrent Game State:\n")
+        for i, factory in enumerate(state.factories, start=1):
+            print(f"Factory {i}: {factory.tile_names()}")
+        print(f"Central Factory: {state.central_factory.tile_names()}\n")
+        for player in state.players:
+            player.print_board()
+            print("")  # Extra newline for spacing
@@ -1,105 +1,207 @@
 from model.factory import Factory
 from model.tile_bag import TileBag
 from model.central_factory import CentralFactory
-from model.starting_player_tile import StartingPlayerTile
 from model.box_lid import BoxLid
 from model.random_player import RandomPlayer
 from model.state import State
-from visualizer import Visualizer
+from events import (ConsoleLogger, GameStarted, FactoriesFilled, RoundStarted, TurnStarted, StartingMarkerTaken,
+                    MoveApplied, RoundEnded, RoundScored, GameOver)
 
 class GameEngine:
-    def __init__(self, print_enabled=False, visualize=False):
+    def __init__(self, print_enabled=False, visualize=False, recorder=None, validate_tiles=False, profiler=None):
+        """
+        Everything that happens in a game is reported as events (see events) to the subscribers.
+        print_enabled, visualize and recorder are shortcuts that subscribe a ConsoleLogger, a
+        Visualizer and the given GameRecorder.
+
+        :param validate_tiles: Recount every tile from scratch in count_tiles_in_game and check the running
+                               counters against the recount, instead of just summing the counters. For debugging.
+        :param profiler: Optional PhaseProfiler that times each phase of the games played.
+        """
         self.print_enabled = print_enabled
         self.visualize = visualize
-        self.visualizer = Visualizer()
+        self.validate_tiles = validate_tiles
+        self.recorder = recorder
+        self.profiler = profiler
+        self.subscribers = []
+        if print_enabled:
+            self.subscribe(ConsoleLogger())
+        if visualize:
+            from visualizer import Visualizer  # Only needed, and matplotlib only imported, when drawing
+            self.subscribe(Visualizer())
+        if recorder is not None:
+            self.subscribe(recorder)
+
+    def subscribe(self, subscriber):
+        """Register an object with a handle_event(event) method to receive the events of every game."""
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.remove(subscriber)
+
+    def emit(self, event):
+        profiler = self.profiler
+        for subscriber in self.subscribers:
+            if profiler is not None:
+                profiler.start(type(subscriber).__name__)
+            subscriber.handle_event(event)
+            if profiler is not None:
+                profiler.stop()
 
-    def setup_game(self, player1, player2):
-        state = State(player1=player1, player2=player2)
-        for factory in state.factories:
-            factory.add_tiles(state.tile_bag.draw_tiles(4))
+    def setup_game(self, player1, player2, factory_fills=None, seed=None):
+        """
+        Create the game state and fill the factories.
+
+        :param factory_fills: Optional tiles per factory to use instead of random draws, as in a replay.
+        :param seed: Optional game seed, see State.
+        """
+        state = State(player1=player1, player2=player2, seed=seed)
+        if self.subscribers:
+            self.emit(GameStarted(state))
+        self.fill_factories(state, factory_fills)
+        state.update_hash()
         return state
-    
-    def play_game(self, player1, player2):
-        if self.print_enabled:
-            print("Starting the game...")
 
-        state = self.setup_game(player1=player1, player2=player2)
+    def fill_factories(self, state, factory_fills=None):
+        """Fill each factory with 4 tiles from the tile bag, or with the given tiles per factory."""
+        for index, factory in enumerate(state.factories):
+            factory.add_tiles(state.tile_bag.draw_tiles(4, None if factory_fills is None else factory_fills[index]))
+        if self.subscribers:
+            self.emit(FactoriesFilled(state))
+    
+    def play_game(self, player1, player2, seed=None):
+        """Play a full game. Games played with the same seed and the same players are identical."""
+        if self.profiler is not None:
+            self.profiler.start("game")
+        state = self.setup_game(player1=player1, player2=player2, seed=seed)
 
         while not state.game_over:
-            if self.print_enabled:
-                print(f"\n-------------------------------------\nRound {state.round_number}\n-------------------------------------")
+            if self.subscribers:
+                self.emit(RoundStarted(state, state.round_number))
             state = self.play_round(state)
-        self.print_final_scores(state)
+        if self.profiler is not None:
+            self.profiler.stop()
+        return state
+
+    async def play_game_async(self, player1, player2, seed=None):
+        """
+        Play a full game like play_game, awaiting each move from the current player's decide(state),
+        so many games can run on one event loop while their players think or wait for input.
+        The engine's own steps take microseconds and run on the loop between moves.
+        Decisions are not profiled, as games interleaving on the loop would mix up the phase stack.
+        """
+        state = self.setup_game(player1=player1, player2=player2, seed=seed)
+
+        while not state.game_over:
+            if self.subscribers:
+                self.emit(RoundStarted(state, state.round_number))
+            while not state.is_round_over():
+                self.count_tiles_in_game(state)
+                if self.subscribers:
+                    self.emit(TurnStarted(state, state.current_player))
+                move = await state.current_player.decide(state)
+                self.apply_move(state, move)
+                self.count_tiles_in_game(state)
+            state = self.end_round(state)
+        return state
 
     def play_round(self, state):
         while True:
             state = self.play_turn(state)
             # Check for end of round condition
-            if all(not factory.tiles for factory in state.factories) and not state.central_factory.tiles:
+            if state.is_round_over():
                 state = self.end_round(state)
                 return state  # End the round
 
     
     def play_turn(self, state):
-        if self.visualize:
-            self.visualizer.draw_game_state(state)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start("turn")
         self.count_tiles_in_game(state)
-        if self.print_enabled:
-            print(f"\n-------------------------------------\n{state.current_player.name}'s turn\n-------------------------------------")
-        self.print_game_state(state)
-        factory_index, selected_color, pattern_line_index = state.current_player.make_decision(state)
-
-        selected_factory = state.central_factory if factory_index == -1 else state.factories[factory_index]
-        
-        if any(isinstance(tile, StartingPlayerTile) for tile in selected_factory.tiles):
-            if self.print_enabled:
-                print("Starting player marker taken!")
-            selected_factory.starting_player_marker_taken = True
-            for tile in selected_factory.tiles:
-                if isinstance(tile, StartingPlayerTile):
-                    selected_factory.tiles.remove(tile)
-                    break
-            state.current_player.board.place_starting_player_tile_on_floor_line()
-
-        # Applying the decisions
-        selected_tiles = selected_factory.remove_and_return_tiles_of_color(selected_color)
-        remaining_tiles = selected_factory.get_and_clear_remaining_tiles()
-        state.central_factory.add_tiles(remaining_tiles)
-        state.current_player.place_tile_in_pattern_line(selected_color, pattern_line_index, len(selected_tiles))
-        if self.print_enabled:
-            print(f"{state.current_player.name} placed {len(selected_tiles)} {selected_color.name} tiles in pattern line {pattern_line_index + 1}.")
-
-        state = self.move_current_player(state)
+        if self.subscribers:
+            self.emit(TurnStarted(state, state.current_player))
+        if profiler is not None:
+            profiler.start("make_decision:" + type(state.current_player).__name__)
+        move = state.current_player.make_decision(state)
+        if profiler is not None:
+            profiler.stop()
+        self.apply_move(state, move)
         self.count_tiles_in_game(state)
+        if profiler is not None:
+            profiler.stop()
+        return state
+
+    def get_legal_moves(self, state):
+        return state.get_legal_moves()
+
+    def apply_move(self, state, move):
+        """Apply a (factory_index, color, pattern_line_index) move for the current player and pass the turn."""
+        if self.profiler is not None:
+            self.profiler.start("apply_move")
+        if not self.subscribers:
+            undo = state.apply_move(move)
+        else:
+            factory_index, selected_color, pattern_line_index = move
+            player = state.current_player
+            selected_factory = state.get_factory(factory_index)
+            marker_taken = selected_factory.has_starting_player_tile()
+            selected_tile_count = selected_factory.tile_counts[selected_color]
+            undo = state.apply_move(move)
+            if marker_taken:
+                self.emit(StartingMarkerTaken(state, player))
+            self.emit(MoveApplied(state, player, move, selected_tile_count))
+        if self.profiler is not None:
+            self.profiler.stop()
+        return undo
+
+    def undo_move(self, state, undo):
+        """Revert a move applied with apply_move."""
+        state.undo_move(undo)
         return state
     
-    def end_round(self, state):
-        """Handle the end of a round: Move tiles, score points, and check game over condition."""
-        if self.print_enabled:
-            print(f"\n-------------------------------------\nEND OF ROUND {state.round_number}\n-------------------------------------")
-        for player in state.players:
-            if self.print_enabled:
-                print(f"\n{player.name} board before moving, but after last move:")
-                player.board.print_board()        
-        if self.print_enabled:
-            print(f"\n-------------------------------------\nSCORING AND MOVING TO WALL\n-------------------------------------")
+    def end_round(self, state, factory_fills=None):
+        """
+        Handle the end of a round: Move tiles, score points, and check game over condition.
+
+        :param factory_fills: Optional tiles per factory for the refill, as in a replay.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start("end_round")
+        if self.subscribers:
+            self.emit(RoundEnded(state, state.round_number))
+        if profiler is not None:
+            profiler.start("scoring")
+        round_scores = []
         for player in state.players:
             self.count_tiles_in_game(state)
             score = player.move_tiles_to_wall_and_score()  # Assuming this method returns the score for the round
             self.count_tiles_in_game(state)
             player.score += score  # Assuming each player has a 'score' attribute
-            if self.print_enabled:
-                print(f"\n{player.name} scored {score} points this round.")
-                print(f"{player.name} board after moving:")
-                player.board.print_board()
+            round_scores.append(score)
+        if profiler is not None:
+            profiler.stop()
+        if self.subscribers:
+            self.emit(RoundScored(state, state.round_number, round_scores))
         state.round_number += 1
         self.count_tiles_in_game(state)
         state = self.check_game_over(state)
         state = self.set_new_starting_player(state)
-        state = self.refresh_factories(state)
+        state = self.refresh_factories(state, factory_fills)
         if state.game_over:
+            if profiler is not None:
+                profiler.start("end_game_scoring")
             for player in state.players:
                 player.score += player.score_end_game_points()  # Assuming this method returns the end game points
+            if profiler is not None:
+                profiler.stop()
+        # Nearly every part of the state changed, so rehash it in one go
+        state.update_hash()
+        if state.game_over and self.subscribers:
+            self.emit(GameOver(state, [player.score for player in state.players], self.get_winners(state)))
+        if profiler is not None:
+            profiler.stop()
         return state
 
     def check_game_over(self, state):
@@ -108,24 +210,6 @@ class GameEngine:
                 state.game_over = True
         return state
 
-    def print_game_state(self, state):
-        if self.print_enabled:
-            print("\nCurrent Game State:\n")
-
-        # Show available factories
-        for i, factory in enumerate(state.factories, start=1):
-            if self.print_enabled:
-                print(f"Factory {i}: {[tile.name for tile in factory.tiles]}")
-        # Show the central factory
-        if self.print_enabled:
-            print(f"Central Factory: {[tile.name for tile in state.central_factory.tiles]}\n")
-
-        # Show players' boards
-        if self.print_enabled:
-            for player in state.players:
-                player.print_board()
-                print("")  # Extra newline for spacing
-
     def move_current_player(self, state):
         state.current_player = state.player1 if state.current_player == state.player2 else state.player2
         return state
@@ -137,38 +221,67 @@ class GameEngine:
                 state.current_player = player                
         return state
 
-    def refresh_factories(self, state):
+    def refresh_factories(self, state, factory_fills=None):
         """Refill the factories with tiles from the tile bag for the new round."""
+        if self.profiler is not None:
+            self.profiler.start("refresh_factories")
         state.central_factory.clear()  # Clear the central factory for the new round
         state.central_factory.add_starting_player_tile()  # Add the starting player tile to the central factory
-        for factory in state.factories:
-            factory.add_tiles(state.tile_bag.draw_tiles(4))
+        self.fill_factories(state, factory_fills)
+        if self.profiler is not None:
+            self.profiler.stop()
         return state
 
-    def print_final_scores(self, state):
-        """Print the final scores of all players."""
-        if self.print_enabled:
-            print(f"\n-------------------------------------\nFINAL SCORES\n-------------------------------------")
-            for player in state.players:
-                print(f"{player.name}: {player.score} points")
-        
-        # Determine the winner (could be multiple in case of a tie)
+    def get_winners(self, state):
+        """Return the players with the highest score, more than one on a tie."""
         highest_score = max(player.score for player in state.players)
-        winners = [player.name for player in state.players if player.score == highest_score]
-        if self.print_enabled:
-            if len(winners) > 1:
-                print(f"Tie between: {', '.join(winners)}")
-            else:
-                print(f"Winner: {winners[0]}")
+        return [player for player in state.players if player.score == highest_score]
 
     def count_tiles_in_game(self, state):
-        """Count the number of tiles in the factories, central factory, tile bag, and players' boards."""
-        factory_tile_count = sum(len(factory.tiles) for factory in state.factories)
-        central_factory_tile_count = len([tile for tile in state.central_factory.tiles if not isinstance(tile, StartingPlayerTile)])
-        tile_bag_tile_count = len(state.tile_bag.tiles)
-        box_lid_tile_count = len(state.box_lid.tiles)
-        players_tile_count = sum(player.board.count_placed_tiles() for player in state.players)
-        tile_count_sum = factory_tile_count + central_factory_tile_count + tile_bag_tile_count + players_tile_count + box_lid_tile_count
+        """
+        Count the number of tiles in the factories, central factory, tile bag, box lid and players' boards,
+        and raise a ValueError unless all 100 tiles are accounted for.
+
+        Every container keeps a running count of its tiles, so this only adds up a few numbers.
+        In validation mode the tiles are recounted instead, see recount_tiles_in_game.
+        """
+        if self.profiler is not None:
+            self.profiler.start("count_tiles_in_game")
+        if self.validate_tiles:
+            tile_count_sum = self.recount_tiles_in_game(state)
+        else:
+            tile_count_sum = (
+                sum(factory.tile_total for factory in state.factories)
+                + state.central_factory.tile_total
+                + state.tile_bag.tile_total
+                + state.box_lid.tile_total
+                + state.player1.board.placed_tile_count
+                + state.player2.board.placed_tile_count
+            )
+        if self.profiler is not None:
+            self.profiler.stop()
+
+        if tile_count_sum != 100:
+            raise ValueError("Total tile count is not 100.")
+
+        return tile_count_sum
+
+    def recount_tiles_in_game(self, state):
+        """Count every tile from scratch, checking each running counter against its recount as well as the total."""
+        containers = [(f"Factory {i}", factory) for i, factory in enumerate(state.factories, start=1)]
+        containers += [("Central factory", state.central_factory), ("Tile bag", state.tile_bag), ("Box lid", state.box_lid)]
+        tile_count_sum = 0
+        for name, container in containers:
+            tile_count = container.recount_tiles()
+            if tile_count != container.tile_total:
+                raise ValueError(f"{name} holds {tile_count} tiles but its running count is {container.tile_total}.")
+            tile_count_sum += tile_count
+        for player in state.players:
+            tile_count = player.board.recount_placed_tiles()
+            if tile_count != player.board.placed_tile_count:
+                raise ValueError(
+                    f"{player.name}'s board holds {tile_count} tiles but its running count is {player.board.placed_tile_count}.")
+            tile_count_sum += tile_count
 
         if tile_count_sum != 100:
             raise ValueError("Total tile count is not 100.")
@@ -0,0 +1,225 @@
+"""
+Compact binary game records.
+
+A record holds the game seed (see seeding), the tiles drawn onto the factories each round and the moves as
+action ids (see action_space), which is enough to rebuild every intermediate State by running
+the GameEngine again. Each round costs 10 bytes of fills and each move one byte.
+
+Record layout, little endian:
+    u64 seed | u8 round fills | u16 moves | i16 score 1 | i16 score 2 | fills | moves
+where each round of fills is five u16, one per factory, holding the tile count of color c in bits 3c..3c+2.
+
+Shard files start with FILE_MAGIC, followed by records each prefixed with their u32 length.
+"""
+import glob
+import os
+import struct
+
+from action_space import TILE_COLORS, encode_move, decode_action
+from events import GameStarted, FactoriesFilled, MoveApplied, GameOver
+from game_engine import GameEngine
+from model.player import Player
+
+FILE_MAGIC = b"AZR1"
+HEADER = struct.Struct("<QBHhh")
+LENGTH = struct.Struct("<I")
+FACTORY_FILLS = struct.Struct("<5H")
+
+
+class GameRecord:
+    def __init__(self, seed=0, factory_fills=None, actions=None, scores=(0, 0)):
+        """
+        :param seed: Seed the game was played with.
+        :param factory_fills: Per round, a list of five {TileColor: count} dictionaries, one per factory.
+        :param actions: Action ids of the moves, in order.
+        :param scores: Final scores of the two players.
+        """
+        self.seed = seed
+        self.factory_fills = factory_fills if factory_fills is not None else []
+        self.actions = actions if actions is not None else []
+        self.scores = scores
+
+    def to_bytes(self):
+        parts = [HEADER.pack(self.seed, len(self.factory_fills), len(self.actions), *self.scores)]
+        for round_fills in self.factory_fills:
+            parts.append(FACTORY_FILLS.pack(*(encode_tile_counts(tile_counts) for tile_counts in round_fills)))
+        parts.append(bytes(self.actions))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        seed, round_count, move_count, score1, score2 = HEADER.unpack_from(data)
+        offset = HEADER.size
+        factory_fills = []
+        for _ in range(round_count):
+            factory_fills.append([decode_tile_counts(value) for value in FACTORY_FILLS.unpack_from(data, offset)])
+            offset += FACTORY_FILLS.size
+        actions = list(data[offset:offset + move_count])
+        return cls(seed, factory_fills, actions, (score1, score2))
+
+
+def encode_tile_counts(tile_counts):
+    return sum(tile_counts[color] << (3 * index) for index, color in enumerate(TILE_COLORS))
+
+
+def decode_tile_counts(value):
+    return {color: (value >> (3 * index)) & 0b111 for index, color in enumerate(TILE_COLORS)}
+
+
+class GameRecorder:
+    def __init__(self, writer=None):
+        """
+        Event subscriber that builds a GameRecord of every game; subscribe it to a GameEngine
+        or pass it as the engine's recorder.
+
+        :param writer: Optional GameRecordWriter that receives every finished record.
+        """
+        self.writer = writer
+        self.record = None
+        self.last_record = None
+
+    def handle_event(self, event):
+        if isinstance(event, MoveApplied):
+            self.record_move(event.move)
+        elif isinstance(event, FactoriesFilled):
+            self.record_factory_fills(event.state)
+        elif isinstance(event, GameStarted):
+            self.start_game(event.state)
+        elif isinstance(event, GameOver):
+            self.finish_game(event.state)
+
+    def start_game(self, state):
+        self.record = GameRecord(seed=state.seed)
+
+    def record_factory_fills(self, state):
+        self.record.factory_fills.append([dict(factory.tile_counts) for factory in state.factories])
+
+    def record_move(self, move):
+        self.record.actions.append(encode_move(move))
+
+    def finish_game(self, state):
+        self.record.scores = tuple(player.score for player in state.players)
+        if self.writer is not None:
+            self.writer.write(self.record)
+        self.last_record = self.record
+        self.record = None
+
+
+class GameRecordWriter:
+    def __init__(self, directory, prefix="games", max_shard_bytes=64 * 1024 * 1024):
+        """
+        Append records to numbered shard files, starting a new shard once the current one is full.
+        Reopening a directory continues the last existing shard, after cutting off any record a
+        crashed writer left incomplete at its end.
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.max_shard_bytes = max_shard_bytes
+        os.makedirs(directory, exist_ok=True)
+        shards = shard_paths(directory, prefix)
+        self.shard_index = len(shards) - 1 if shards else 0
+        self.file = None
+        self.open_shard()
+
+    def shard_path(self, index):
+        return os.path.join(self.directory, f"{self.prefix}-{index:05d}.azr")
+
+    def open_shard(self):
+        path = self.shard_path(self.shard_index)
+        if os.path.exists(path):
+            complete_size = complete_records_size(path)
+            if complete_size != os.path.getsize(path):
+                with open(path, "r+b") as file:
+                    file.truncate(complete_size)
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(FILE_MAGIC)
+
+    def write(self, record):
+        data = record.to_bytes()
+        if self.file.tell() + LENGTH.size + len(data) > self.max_shard_bytes and self.file.tell() > len(FILE_MAGIC):
+            self.file.close()
+            self.shard_index += 1
+            self.open_shard()
+        self.file.write(LENGTH.pack(len(data)))
+        self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def shard_paths(directory, prefix="games"):
+    return sorted(glob.glob(os.path.join(directory, f"{prefix}-*.azr")))
+
+
+def complete_records_size(path):
+    """
+    Return the size of the part of a shard file holding its header and its complete records, or 0
+    if even the header is incomplete. Records are skipped by their length prefix, not decoded.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        magic = file.read(len(FILE_MAGIC))
+        if magic != FILE_MAGIC:
+            if len(magic) < len(FILE_MAGIC) and FILE_MAGIC.startswith(magic):
+                return 0
+            raise ValueError(f"{path} is not a game record file.")
+        end = len(FILE_MAGIC)
+        while True:
+            length = file.read(LENGTH.size)
+            if len(length) < LENGTH.size:
+                return end
+            record_end = end + LENGTH.size + LENGTH.unpack(length)[0]
+            if record_end > size:
+                return end
+            file.seek(record_end)
+            end = record_end
+
+
+def read_records(path):
+    """Yield the GameRecords of one shard file. A record cut short at the end of the file is skipped."""
+    with open(path, "rb") as file:
+        if file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{path} is not a game record file.")
+        while True:
+            length = file.read(LENGTH.size)
+            if len(length) < LENGTH.size:
+                return
+            record_size = LENGTH.unpack(length)[0]
+            data = file.read(record_size)
+            if len(data) < record_size:
+                return
+            yield GameRecord.from_bytes(data)
+
+
+def read_all_records(directory, prefix="games"):
+    for path in shard_paths(directory, prefix):
+        yield from read_records(path)
+
+
+def replay(record, move_count=None, engine=None):
+    """
+    Rebuild the State of a recorded game after its first move_count moves (all of them by default)
+    by running the moves and recorded factory fills through the GameEngine.
+    """
+    engine = engine or GameEngine(print_enabled=False, visualize=False)
+    actions = record.actions if move_count is None else record.actions[:move_count]
+    state = engine.setup_game(Player("Player 1"), Player("Player 2"), factory_fills=record.factory_fills[0], seed=record.seed)
+    round_index = 1
+    for action in actions:
+        engine.apply_move(state, decode_action(action))
+        if state.is_round_over():
+            engine.end_round(state, factory_fills=record.factory_fills[round_index])
+            round_index += 1
+    return state
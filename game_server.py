@@ -0,0 +1,521 @@
+"""
+Asyncio server hosting many games at once, with human and bot seats.
+
+Every game runs as a task driving GameEngine.play_game_async. Human seats are HumanPlayers whose
+decision source is a RemoteSeat, which sends the position to the seat's client and waits for its
+answer without holding up the other games. Bot decisions run in a process pool on a clone of the
+position (State.clone), so thinking bots never stall the event loop.
+
+Clients connect over TCP and exchange JSON messages, one per line. Moves are action ids (see action_space).
+
+Client to server:
+    {"type": "new_game", "seats": ["human", "greedy"], "seed": 7, "name": "Ann", "ref": 1}
+        Create a game. Each seat is "human" or the name of a bot. The client takes the first human
+        seat, or watches if there is none; seed is optional. The game starts once every human seat is taken.
+    {"type": "join", "game_id": 3, "name": "Bob", "ref": 2}
+        Take the next free human seat of a game.
+    {"type": "move", "game_id": 3, "action": 97}
+
+Server to client:
+    {"type": "game_created", "game_id": 3, "seat": 0, "seed": 7, "ref": 1}   (seat is null when watching)
+    {"type": "joined", "game_id": 3, "seat": 1, "ref": 2}
+    {"type": "your_turn", "game_id": 3, "seat": 0, "state": {...}, "legal_actions": [...]}
+    {"type": "move_rejected", "game_id": 3, "action": 97}   (followed by a new your_turn)
+    {"type": "move_applied", "game_id": 3, "seat": 1, "action": 12}
+    {"type": "game_over", "game_id": 3, "scores": [41, 37], "winners": [0]}
+    {"type": "game_aborted", "game_id": 3, "reason": "..."}
+    {"type": "error", "message": "...", "ref": 1}
+
+A ref in a request is copied into its reply. GameClient is a small client for tests and scripts.
+
+    python game_server.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from action_space import ACTION_COUNT, encode_move, decode_action
+from events import MoveApplied
+from game_engine import GameEngine
+from model.greedy_player import GreedyPlayer
+from model.human_player import HumanPlayer
+from model.player import Player
+from model.random_player import RandomPlayer
+from seeding import new_seed
+
+HUMAN_SEAT = "human"
+DEFAULT_BOTS = {"random": RandomPlayer, "greedy": GreedyPlayer}
+
+WORKER_BOTS = {}  # Bot name -> Player, kept by each worker process across decisions
+
+
+def choose_bot_moves(requests):
+    """Return the moves for a list of (bot_name, bot_factory, state, seat) requests. Runs inside a worker process."""
+    return [choose_bot_move(*request) for request in requests]
+
+
+def choose_bot_move(bot_name, bot_factory, state, seat):
+    """
+    Seat the named bot in a clone of the game and return its move. Workers build each bot once and
+    reuse it, so the executor must be a process pool (or a single thread).
+    """
+    bot = WORKER_BOTS.get(bot_name)
+    if bot is None:
+        bot = WORKER_BOTS[bot_name] = bot_factory(bot_name)
+    seated = state.players[seat]
+    bot.board = seated.board
+    bot.score = seated.score
+    state.players[seat] = bot
+    if seat == 0:
+        state.player1 = bot
+    else:
+        state.player2 = bot
+    state.current_player = bot
+    return bot.make_decision(state)
+
+
+def state_to_dict(state):
+    """The public position as JSON-friendly data, colors given by name."""
+    return {
+        "round": state.round_number,
+        "current_seat": state.players.index(state.current_player),
+        "factories": [{color.name: count for color, count in factory.tile_counts.items() if count}
+                      for factory in state.factories],
+        "central_factory": {color.name: count for color, count in state.central_factory.tile_counts.items() if count},
+        "starting_player_tile_in_center": state.central_factory.has_starting_player_tile(),
+        "players": [
+            {
+                "name": player.name,
+                "score": player.score,
+                "wall": player.board.wall,
+                "pattern_lines": [[color.name if color is not None else None, count]
+                                  for color, count in player.board.pattern_lines],
+                "floor_line_count": player.board.floor_line_count,
+                "has_starting_player_tile": player.board.has_starting_marker,
+            }
+            for player in state.players
+        ],
+    }
+
+
+class BotDecisionBatcher:
+    def __init__(self, executor, workers, max_batch_size=64):
+        """
+        Sends bot decisions to the process pool in batches. Submitting a task costs far more than a
+        simple bot's decision, so the requests made during one pass of the event loop are split
+        over the workers and sent as one task each.
+
+        :param max_batch_size: Most requests per task, so a slow bot delays few others.
+        """
+        self.executor = executor
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.requests = []
+        self.futures = []
+
+    def decide(self, bot_name, bot_factory, state, seat):
+        """Queue a decision on a clone of the state and return a future of the move."""
+        loop = asyncio.get_running_loop()
+        if not self.requests:
+            loop.call_soon(self.flush)
+        self.requests.append((bot_name, bot_factory, state.clone(), seat))
+        future = loop.create_future()
+        self.futures.append(future)
+        return future
+
+    def flush(self):
+        requests, futures = self.requests, self.futures
+        self.requests, self.futures = [], []
+        loop = asyncio.get_running_loop()
+        batch_size = min(self.max_batch_size, -(-len(requests) // self.workers))
+        for start in range(0, len(requests), batch_size):
+            batch = loop.run_in_executor(self.executor, choose_bot_moves, requests[start:start + batch_size])
+            batch.add_done_callback(lambda batch, futures=futures[start:start + batch_size]: self.resolve(batch, futures))
+
+    @staticmethod
+    def resolve(batch, futures):
+        error = batch.exception() if not batch.cancelled() else asyncio.CancelledError()
+        for index, future in enumerate(futures):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(batch.result()[index])
+
+
+class PooledBot(Player):
+    def __init__(self, name, bot_factory, batcher):
+        """
+        Seat played by a bot whose decisions are computed in the server's process pool.
+
+        :param name: Bot name, also the key the workers cache the bot under.
+        :param bot_factory: Picklable callable taking a name and returning the bot Player.
+        :param batcher: The server's BotDecisionBatcher.
+        """
+        super().__init__(name)
+        self.bot_factory = bot_factory
+        self.batcher = batcher
+
+    async def decide(self, state):
+        return await self.batcher.decide(self.name, self.bot_factory, state, state.players.index(self))
+
+
+class RemoteSeat:
+    def __init__(self, session, seat):
+        """Decision source of a human seat, asking the client connected to the seat for every move."""
+        self.session = session
+        self.seat = seat
+        self.connection = None
+        self.pending_action = None
+
+    async def request_move(self, player, state, legal_moves):
+        if self.connection is None:
+            raise ConnectionResetError(f"{player.name} disconnected")
+        self.pending_action = asyncio.get_running_loop().create_future()
+        self.connection.send({
+            "type": "your_turn",
+            "game_id": self.session.game_id,
+            "seat": self.seat,
+            "state": state_to_dict(state),
+            "legal_actions": [encode_move(move) for move in legal_moves],
+        })
+        await self.connection.drain()
+        try:
+            return decode_action(await self.pending_action)
+        finally:
+            self.pending_action = None
+
+    async def reject_move(self, player, move):
+        if self.connection is not None:
+            self.connection.send({"type": "move_rejected", "game_id": self.session.game_id, "action": encode_move(move)})
+
+    def receive_action(self, action):
+        if self.pending_action is None or self.pending_action.done():
+            raise ValueError("It is not your turn.")
+        if not isinstance(action, int) or not 0 <= action < ACTION_COUNT:
+            raise ValueError(f"Invalid action {action!r}.")
+        self.pending_action.set_result(action)
+
+    def disconnect(self):
+        self.connection = None
+        if self.pending_action is not None and not self.pending_action.done():
+            self.pending_action.set_exception(ConnectionResetError("Client disconnected"))
+
+
+class GameSession:
+    def __init__(self, game_id, seat_kinds, seed, server):
+        """One game on the server, with a RemoteSeat per human seat and a PooledBot per bot seat."""
+        self.game_id = game_id
+        self.seed = seed
+        self.server = server
+        self.remote_seats = {}
+        self.players = []
+        for seat, kind in enumerate(seat_kinds):
+            if kind == HUMAN_SEAT:
+                self.remote_seats[seat] = RemoteSeat(self, seat)
+                self.players.append(HumanPlayer(f"Player {seat + 1}", self.remote_seats[seat]))
+            else:
+                self.players.append(PooledBot(kind, server.bots[kind], server.batcher))
+        self.watchers = []  # Connections that receive the game's moves and result
+        self.engine = GameEngine()
+        self.engine.subscribe(self)
+        self.task = None
+
+    def free_seat(self):
+        """Return the first human seat nobody took yet, or None."""
+        if self.task is not None:
+            return None
+        for seat, remote_seat in self.remote_seats.items():
+            if remote_seat.connection is None:
+                return seat
+        return None
+
+    def take_seat(self, seat, connection, name):
+        self.remote_seats[seat].connection = connection
+        if name:
+            self.players[seat].name = name
+        connection.seats.append(self.remote_seats[seat])
+        if connection not in self.watchers:
+            self.watchers.append(connection)
+
+    def start_if_ready(self):
+        if self.task is None and self.free_seat() is None:
+            self.task = asyncio.create_task(self.run())
+
+    def broadcast(self, message):
+        for connection in self.watchers:
+            connection.send(message)
+
+    def handle_event(self, event):
+        if isinstance(event, MoveApplied):
+            self.broadcast({"type": "move_applied", "game_id": self.game_id,
+                            "seat": event.state.players.index(event.player), "action": encode_move(event.move)})
+
+    async def run(self):
+        try:
+            state = await self.engine.play_game_async(self.players[0], self.players[1], seed=self.seed)
+            self.broadcast({
+                "type": "game_over",
+                "game_id": self.game_id,
+                "scores": [player.score for player in state.players],
+                "winners": [state.players.index(player) for player in self.engine.get_winners(state)],
+            })
+        except Exception as error:  # A lost client or a failing bot ends this game only
+            self.broadcast({"type": "game_aborted", "game_id": self.game_id, "reason": str(error)})
+        finally:
+            self.server.sessions.pop(self.game_id, None)
+            for connection in self.watchers:
+                connection.seats = [seat for seat in connection.seats if seat.session is not self]
+                await connection.drain()
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.seats = []  # RemoteSeats taken through this connection
+        self.drain_lock = asyncio.Lock()
+        self.closed = False
+
+    def send(self, message):
+        if not self.closed:
+            self.writer.write(json.dumps(message).encode() + b"\n")
+
+    async def drain(self):
+        """Wait until the client has taken the messages sent so far, so a slow reader only slows down its own games."""
+        if self.closed:
+            return
+        async with self.drain_lock:
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                self.closed = True
+
+
+class GameServer:
+    def __init__(self, bots=None, executor=None, workers=None):
+        """
+        :param bots: {name: picklable callable taking a name and returning a Player}, the bots seats can ask for.
+                     Defaults to DEFAULT_BOTS.
+        :param executor: Executor for bot decisions. Defaults to a ProcessPoolExecutor owned by the server.
+        :param workers: Number of worker processes of the default executor, the CPU count if omitted.
+        """
+        self.bots = bots if bots is not None else DEFAULT_BOTS
+        self.owns_executor = executor is None
+        self.executor = executor if executor is not None else ProcessPoolExecutor(max_workers=workers)
+        self.batcher = BotDecisionBatcher(self.executor, workers or os.cpu_count() or 1)
+        self.sessions = {}
+        self.game_ids = itertools.count(1)
+        self.connection_tasks = set()  # Tasks of the connection handlers, to wait for on close
+        self.connections = set()
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start listening and return the port, which is picked by the system if port is 0."""
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        # Closing the connections ends their handlers, which aborts the games waiting on them
+        for connection in list(self.connections):
+            connection.writer.close()
+        game_tasks = [session.task for session in self.sessions.values() if session.task is not None]
+        for task in game_tasks:
+            task.cancel()
+        await asyncio.gather(*game_tasks, *self.connection_tasks, return_exceptions=True)
+        if self.owns_executor:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        connection = Connection(reader, writer)
+        self.connections.add(connection)
+        self.connection_tasks.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = None
+                try:
+                    message = json.loads(line)
+                    reply = self.handle_message(connection, message)
+                except (ValueError, KeyError, TypeError) as error:
+                    reply = {"type": "error", "message": str(error)}
+                if reply is not None:
+                    if isinstance(message, dict) and "ref" in message:
+                        reply["ref"] = message["ref"]
+                    connection.send(reply)
+                await connection.drain()
+        except ConnectionError:
+            pass
+        finally:
+            connection.closed = True
+            self.connections.discard(connection)
+            self.connection_tasks.discard(asyncio.current_task())
+            for seat in connection.seats:
+                seat.disconnect()
+            writer.close()
+
+    def handle_message(self, connection, message):
+        """Handle one client message, returning the reply to send, if any."""
+        message_type = message["type"]
+        if message_type == "move":
+            session = self.get_session(message["game_id"])
+            for seat in connection.seats:
+                if seat.session is session and seat.pending_action is not None:
+                    seat.receive_action(message["action"])
+                    return None
+            raise ValueError("It is not your turn.")
+        if message_type == "new_game":
+            return self.new_game(connection, message.get("seats", [HUMAN_SEAT, "random"]), message.get("seed"), message.get("name"))
+        if message_type == "join":
+            return self.join(connection, message["game_id"], message.get("name"))
+        raise ValueError(f"Unknown message type {message_type!r}.")
+
+    def get_session(self, game_id):
+        session = self.sessions.get(game_id)
+        if session is None:
+            raise ValueError(f"No game {game_id!r}.")
+        return session
+
+    def new_game(self, connection, seat_kinds, seed=None, name=None):
+        if len(seat_kinds) != 2:
+            raise ValueError("A game has exactly two seats.")
+        for kind in seat_kinds:
+            if kind != HUMAN_SEAT and kind not in self.bots:
+                raise ValueError(f"Unknown seat {kind!r}, expected {HUMAN_SEAT!r} or one of {sorted(self.bots)}.")
+        game_id = next(self.game_ids)
+        session = GameSession(game_id, seat_kinds, seed if seed is not None else new_seed(), self)
+        self.sessions[game_id] = session
+        seat = session.free_seat()
+        if seat is not None:
+            session.take_seat(seat, connection, name)
+        else:
+            session.watchers.append(connection)
+        # The reply is written before the game can send anything, as the game task only runs after this returns
+        session.start_if_ready()
+        return {"type": "game_created", "game_id": game_id, "seat": seat, "seed": session.seed}
+
+    def join(self, connection, game_id, name=None):
+        session = self.get_session(game_id)
+        seat = session.free_seat()
+        if seat is None:
+            raise ValueError(f"Game {game_id} has no free seat.")
+        session.take_seat(seat, connection, name)
+        session.start_if_ready()
+        return {"type": "joined", "game_id": game_id, "seat": seat}
+
+
+def random_policy(rng):
+    """Client policy playing a random legal action."""
+    return lambda message: rng.choice(message["legal_actions"])
+
+
+class GameClient:
+    def __init__(self, policy=None, seed=None):
+        """
+        Client of the game server that plays its seats itself, e.g. to stand in for people in tests.
+
+        :param policy: Callable taking a your_turn message and returning an action id. Plays random legal moves by default.
+        :param seed: Seed of the default random policy.
+        """
+        self.policy = policy if policy is not None else random_policy(random.Random(seed))
+        self.reader = None
+        self.writer = None
+        self.refs = itertools.count()
+        self.replies = {}  # ref -> future of the reply
+        self.results = {}  # game_id -> future of the game_over or game_aborted message
+        self.read_task = None
+        self.closing = False
+
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.read_task = asyncio.create_task(self.read_messages())
+
+    async def close(self):
+        self.closing = True
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass  # Already closed by the server
+        await self.read_task
+
+    def send(self, message):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+
+    async def request(self, message):
+        ref = next(self.refs)
+        self.replies[ref] = asyncio.get_running_loop().create_future()
+        self.send(dict(message, ref=ref))
+        await self.writer.drain()
+        reply = await self.replies[ref]
+        if reply["type"] == "error":
+            raise ValueError(reply["message"])
+        return reply
+
+    async def new_game(self, seats, seed=None, name=None):
+        """Create a game and return its game_created reply."""
+        return await self.request({"type": "new_game", "seats": seats, "seed": seed, "name": name})
+
+    async def join(self, game_id, name=None):
+        return await self.request({"type": "join", "game_id": game_id, "name": name})
+
+    async def result(self, game_id):
+        """Wait for the game_over (or game_aborted) message of a game."""
+        return await self.results[game_id]
+
+    async def read_messages(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "ref" in message:
+                    if message["type"] in ("game_created", "joined"):
+                        # Before anything else is read, as the game's messages may already be buffered
+                        self.results[message["game_id"]] = asyncio.get_running_loop().create_future()
+                    self.replies.pop(message["ref"]).set_result(message)
+                elif message["type"] == "your_turn":
+                    self.send({"type": "move", "game_id": message["game_id"], "action": self.policy(message)})
+                elif message["type"] in ("game_over", "game_aborted"):
+                    self.results[message["game_id"]].set_result(message)
+        except ConnectionError:
+            pass
+        for future in list(self.replies.values()) + list(self.results.values()):
+            if future.done():
+                continue
+            if self.closing:
+                future.cancel()
+            else:
+                future.set_exception(ConnectionResetError("Server closed the connection"))
+
+
+async def serve(host, port, workers):
+    server = GameServer(workers=workers)
+    port = await server.start(host, port)
+    print(f"Serving Azul games on {host}:{port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host Azul games for remote players and bots.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Processes computing bot moves, the CPU count by default.")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.workers))
@@ -0,0 +1,248 @@
+"""
+Batched neural-network inference shared by many games.
+
+A NetworkPlayer (see model.network_player) does not run the network itself: it submits its
+observation to an InferenceCoordinator, which gathers the requests of every game in flight into
+one batch and evaluates them with a single forward pass of a PolicyValueNetwork.
+
+Games can run as threads calling make_decision, or as tasks on one event loop awaiting decide;
+play_concurrent_games does the latter for self-play and evaluation.
+
+    with InferenceCoordinator(PolicyValueNetwork(seed=0), max_wait=0) as coordinator:
+        player_factory = lambda name: NetworkPlayer(name, coordinator)
+        results = play_concurrent_games(player_factory, player_factory, 256)
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from action_space import ACTION_COUNT
+from azul_env import OBSERVATION_SIZE
+from batch_simulator import GameResult
+from game_engine import GameEngine
+from seeding import derive_seed, new_seed
+
+
+class PolicyValueNetwork:
+    def __init__(self, hidden_sizes=(256, 256), seed=None):
+        """
+        Small NumPy MLP with a policy head (one logit per action id) and a value head (tanh, from the
+        point of view of the player to move), sharing the hidden layers. Runs in float32 on the CPU.
+        """
+        rng = np.random.default_rng(seed)
+        sizes = [OBSERVATION_SIZE, *hidden_sizes]
+        # He initialization for the ReLU layers, small heads so fresh networks play close to uniform
+        self.weights = [
+            (rng.standard_normal((n_in, n_out)) * np.sqrt(2 / n_in)).astype(np.float32)
+            for n_in, n_out in zip(sizes[:-1], sizes[1:])
+        ]
+        self.biases = [np.zeros(n_out, dtype=np.float32) for n_out in sizes[1:]]
+        self.policy_weights = (rng.standard_normal((sizes[-1], ACTION_COUNT)) * 0.01).astype(np.float32)
+        self.policy_bias = np.zeros(ACTION_COUNT, dtype=np.float32)
+        self.value_weights = (rng.standard_normal((sizes[-1], 1)) * 0.01).astype(np.float32)
+        self.value_bias = np.zeros(1, dtype=np.float32)
+
+    def forward(self, observations):
+        """
+        :param observations: (batch, OBSERVATION_SIZE) float32 array, see azul_env.encode_observation.
+        :return: Policy logits of shape (batch, ACTION_COUNT) and values of shape (batch,).
+        """
+        hidden = observations
+        for weights, bias in zip(self.weights, self.biases):
+            hidden = hidden @ weights
+            hidden += bias
+            np.maximum(hidden, 0, out=hidden)
+        logits = hidden @ self.policy_weights
+        logits += self.policy_bias
+        values = np.tanh(hidden @ self.value_weights + self.value_bias)[:, 0]
+        return logits, values
+
+    def save(self, path):
+        np.savez(path, *self.weights, *self.biases, self.policy_weights, self.policy_bias,
+                 self.value_weights, self.value_bias, layer_count=len(self.weights))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = [data[f"arr_{index}"] for index in range(len(data.files) - 1)]
+            layer_count = int(data["layer_count"])
+        network = cls.__new__(cls)
+        network.weights = arrays[:layer_count]
+        network.biases = arrays[layer_count:2 * layer_count]
+        network.policy_weights, network.policy_bias, network.value_weights, network.value_bias = arrays[2 * layer_count:]
+        return network
+
+
+def masked_softmax(logits, masks):
+    """Softmax over the legal actions of each row, illegal actions getting probability 0."""
+    logits = np.where(masks, logits, -np.inf)
+    logits -= logits.max(axis=1, keepdims=True)
+    probabilities = np.exp(logits)
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    return probabilities
+
+
+class InferenceCoordinator:
+    def __init__(self, network, max_batch_size=256, max_wait=0.002):
+        """
+        Evaluates observations for many games in batches, on a background thread.
+
+        Requests arrive in groups: one observation from make_decision (through evaluate), or every
+        observation awaited with evaluate_async during one pass of an event loop. The thread takes
+        the first waiting group, keeps collecting groups until it holds max_batch_size observations
+        or max_wait seconds have passed, and evaluates them in one forward pass.
+
+        Games running as threads need max_wait to gather into batches. When all games run on one
+        event loop, evaluate_async already gathers them, and max_wait=0 avoids waiting for nothing.
+
+        :param network: Object with a forward(observations) method returning (logits, values), e.g. a PolicyValueNetwork.
+        :param max_batch_size: Most observations evaluated together.
+        :param max_wait: Longest time, in seconds, the first group of a batch waits for more to arrive.
+        """
+        self.network = network
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.SimpleQueue()
+        self.loop_requests = []  # (observation, action mask, asyncio future) awaiting the end of the loop pass
+        self.batch_count = 0
+        self.request_count = 0
+        self.thread = threading.Thread(target=self.run, name="InferenceCoordinator", daemon=True)
+        self.thread.start()
+
+    def submit(self, observations, action_masks):
+        """
+        Queue a group of observations with their legal action masks, and return a concurrent.futures.Future
+        of the list of (action probabilities, value), one per observation.
+        """
+        future = Future()
+        self.requests.put((observations, action_masks, future))
+        return future
+
+    def evaluate(self, observation, action_mask):
+        """Evaluate one observation, blocking until its batch is done, and return (action probabilities, value)."""
+        return self.submit([observation], [action_mask]).result()[0]
+
+    async def evaluate_async(self, observation, action_mask):
+        """
+        Evaluate one observation without blocking the event loop. The observations awaited during
+        one pass of the loop are submitted together, so each loop pass costs one wakeup.
+        """
+        loop = asyncio.get_running_loop()
+        if not self.loop_requests:
+            loop.call_soon(self.submit_loop_requests)
+        future = loop.create_future()
+        self.loop_requests.append((observation, action_mask, future))
+        return await future
+
+    def submit_loop_requests(self):
+        requests, self.loop_requests = self.loop_requests, []
+        for start in range(0, len(requests), self.max_batch_size):
+            group = requests[start:start + self.max_batch_size]
+            results = asyncio.wrap_future(self.submit([request[0] for request in group], [request[1] for request in group]))
+            results.add_done_callback(lambda results, group=group: self.resolve_loop_requests(results, group))
+
+    @staticmethod
+    def resolve_loop_requests(results, group):
+        error = results.exception()
+        for index, (_, _, future) in enumerate(group):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results.result()[index])
+
+    def close(self):
+        """Stop the thread once the requests already queued are evaluated."""
+        self.requests.put(None)
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def mean_batch_size(self):
+        return self.request_count / self.batch_count if self.batch_count else 0.0
+
+    def run(self):
+        requests = self.requests
+        while True:
+            group = requests.get()
+            if group is None:
+                return
+            batch = [group]
+            size = len(group[0])
+            deadline = time.perf_counter() + self.max_wait
+            stopping = False
+            while size < self.max_batch_size:
+                try:
+                    group = requests.get_nowait()
+                except queue.Empty:
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                    try:
+                        group = requests.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                if group is None:
+                    stopping = True
+                    break
+                batch.append(group)
+                size += len(group[0])
+            self.evaluate_batch(batch)
+            if stopping:
+                return
+
+    def evaluate_batch(self, batch):
+        try:
+            observations = np.stack([observation for group in batch for observation in group[0]])
+            masks = np.stack([action_mask for group in batch for action_mask in group[1]])
+            logits, values = self.network.forward(observations)
+            probabilities = masked_softmax(logits, masks)
+        except Exception as error:
+            for _, _, future in batch:
+                future.set_exception(error)
+            return
+        self.batch_count += 1
+        self.request_count += len(observations)
+        values = values.tolist()
+        start = 0
+        for group_observations, _, future in batch:
+            end = start + len(group_observations)
+            future.set_result(list(zip(probabilities[start:end], values[start:end])))
+            start = end
+
+
+async def play_games_async(player1_factory, player2_factory, game_count, seed=None):
+    """Play game_count games at once on the running event loop and return their GameResults, in game order."""
+    master_seed = seed if seed is not None else new_seed()
+
+    async def play(game_index):
+        engine = GameEngine(print_enabled=False, visualize=False)
+        state = await engine.play_game_async(
+            player1_factory("Player 1"), player2_factory("Player 2"), seed=derive_seed(master_seed, game_index))
+        return GameResult(
+            game_index=game_index,
+            player_names=[player.name for player in state.players],
+            scores=[player.score for player in state.players],
+            rounds_played=state.round_number - 1,
+            seed=state.seed,
+        )
+
+    return await asyncio.gather(*(play(game_index) for game_index in range(game_count)))
+
+
+def play_concurrent_games(player1_factory, player2_factory, game_count, seed=None):
+    """
+    Play game_count games at once in this thread, so NetworkPlayers in all of them share the batches
+    of their InferenceCoordinator. Game i is seeded with derive_seed(seed, i), as in BatchSimulator.
+    """
+    return asyncio.run(play_games_async(player1_factory, player2_factory, game_count, seed))
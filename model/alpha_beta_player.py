@@ -0,0 +1,235 @@
+import math
+import random
+import time
+
+from game_engine import GameEngine
+from model.greedy_player import GreedyPlayer
+from model.player import Player
+from model.player_board import WALL_COLUMN, FLOOR_SCORE_BY_LENGTH, ROW_BONUS, COLUMN_BONUS, COLOR_BONUS, wall_bit
+from model.scoring_tables import (
+    placement_score, popcount, completed_rows_mask, completed_columns_mask, completed_color_count,
+)
+from search.transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+SOLVED_DEPTH = 1000  # Stored as the depth of results that did not depend on the depth limit
+NODES_PER_CLOCK_CHECK = 256
+# GreedyPlayer's move evaluation is stateless, so one instance orders the moves of every search
+MOVE_EVALUATOR = GreedyPlayer("Move ordering")
+
+
+def end_game_points(wall):
+    return (popcount(completed_rows_mask(wall)) * ROW_BONUS + popcount(completed_columns_mask(wall)) * COLUMN_BONUS
+            + completed_color_count(wall) * COLOR_BONUS)
+
+
+def projected_score(player, partial_weight):
+    """
+    The player's score if the round ended now, end-game bonuses of the resulting wall included,
+    plus partial_weight of the wall points of every pattern line that is not full yet.
+    """
+    board = player.board
+    wall = board.wall
+    value = player.score + FLOOR_SCORE_BY_LENGTH[board.floor_line_length()]
+    for row, (color, count) in enumerate(board.pattern_lines):
+        if not count:
+            continue
+        column = WALL_COLUMN[color][row]
+        if count == row + 1:
+            value += placement_score(wall, row, column)
+            wall |= wall_bit(row, column)
+        else:
+            value += partial_weight * placement_score(wall, row, column) * count / (row + 1)
+    return value + end_game_points(wall)
+
+
+def ordered_moves(state, move_evaluator, first_move):
+    """Return the legal moves best first by move_evaluator's evaluate_move, with first_move, if legal, moved to the front."""
+    evaluate_move = move_evaluator.evaluate_move
+    moves = sorted(state.get_legal_moves(), key=lambda move: -evaluate_move(state, move))
+    if first_move is not None and first_move in moves:
+        moves.remove(first_move)
+        moves.insert(0, first_move)
+    return moves
+
+
+class AlphaBetaPlayer(Player):
+    def __init__(self, name, time_limit=1.0, max_depth=100, chance_samples=3, partial_weight=0.5,
+                 transposition_table=None, seed=None, endgame_solver=None, opening_book=None):
+        """
+        Depth-limited adversarial search: negamax with alpha-beta pruning and iterative deepening.
+
+        Within a round the game is deterministic, so moves are searched exactly with
+        State.apply_move and undo_move. The end of a round is a chance node: the round is scored
+        exactly, and if depth remains, chance_samples sampled factory refills are searched further
+        and averaged. Leaves are valued by projected_score, from the side to move.
+
+        Moves are ordered by the transposition table's best move, then by GreedyPlayer's move
+        values. Iterative deepening stops at the time limit, at max_depth, or once a search
+        reached the end of the round (or the game) on every line, since deeper searches would not change it.
+
+        :param time_limit: Seconds per decision, or None to rely on max_depth alone, which games need to replay from their seed.
+        :param max_depth: Deepest iteration, in plies; a round boundary counts as one ply.
+        :param chance_samples: Refills searched per round end. 0 makes round ends leaves valued by
+                               projected_score.
+        :param partial_weight: Share of the wall points of unfinished pattern lines counted by the evaluation.
+        :param transposition_table: Optional TranspositionTable to share, e.g. between both seats.
+        :param seed: Optional seed for the sampled refills, else they draw from the seat's stream of the
+                     game seed (see RandomPlayer), so games replay from the game seed alone.
+        :param endgame_solver: Optional EndgameSolver (see model.endgame_solver) that plays the final round
+                               perfectly once it can solve it within its node limit, instead of searching.
+        :param opening_book: Optional OpeningBook (see opening_book) to play the first move of the game from.
+        """
+        super().__init__(name)
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.chance_samples = chance_samples
+        self.partial_weight = partial_weight
+        self.table = transposition_table if transposition_table is not None else TranspositionTable(size_log2=18)
+        self.seeded_rng = random.Random(seed) if seed is not None else None
+        self.rng = self.seeded_rng
+        self.endgame_solver = endgame_solver
+        self.opening_book = opening_book
+        self.engine = GameEngine(print_enabled=False, visualize=False)
+        self.deadline = None
+        self.stopped = False
+        self.depth_limited = False
+        self.nodes = 0
+        self.completed_depth = 0
+        self.root_value = 0.0
+
+    def make_decision(self, state):
+        moves = state.get_legal_moves()
+        if len(moves) == 1:
+            return moves[0]
+        self.rng = self.seeded_rng if self.seeded_rng is not None else state.player_rngs[state.players.index(self)]
+        if self.opening_book is not None:
+            move = self.opening_book.lookup(state)
+            if move is not None:
+                return move
+        if self.endgame_solver is not None and self.endgame_solver.can_solve(state):
+            solution = self.endgame_solver.solve(state)
+            if solution is not None:
+                self.root_value, move = solution
+                return move
+        self.table.new_search()
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.stopped = False
+        self.nodes = 0
+        self.completed_depth = 0
+
+        best_move = ordered_moves(state, MOVE_EVALUATOR, None)[0]
+        for depth in range(1, self.max_depth + 1):
+            self.depth_limited = False
+            value, move = self.search_root(state, depth)
+            if self.stopped:
+                break  # An interrupted iteration is discarded
+            best_move = move
+            self.root_value = value
+            self.completed_depth = depth
+            if not self.depth_limited:
+                break
+        return best_move
+
+    def search_root(self, state, depth):
+        entry = self.table.lookup(state.zobrist_hash)
+        alpha = -math.inf
+        best_move = None
+        for move in ordered_moves(state, MOVE_EVALUATOR, entry[3] if entry is not None else None):
+            undo = state.apply_move(move)
+            value = -self.search(state, depth - 1, -math.inf, -alpha)
+            state.undo_move(undo)
+            if self.stopped:
+                return alpha, best_move
+            if value > alpha:
+                alpha = value
+                best_move = move
+        self.table.store(state.zobrist_hash, depth if self.depth_limited else SOLVED_DEPTH, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def search(self, state, depth, alpha, beta):
+        """Value of the state for the side to move."""
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % NODES_PER_CLOCK_CHECK == 0 and time.perf_counter() >= self.deadline:
+            self.stopped = True
+        if self.stopped:
+            return 0.0
+        if state.game_over:
+            return self.evaluate(state)
+        if state.is_round_over():
+            return self.chance_value(state, depth)
+        if depth <= 0:
+            self.depth_limited = True
+            return self.evaluate(state)
+
+        key = state.zobrist_hash
+        entry = self.table.lookup(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, value, flag, table_move = entry
+            if entry_depth >= depth and (
+                flag == EXACT or (flag == LOWER_BOUND and value >= beta) or (flag == UPPER_BOUND and value <= alpha)
+            ):
+                if entry_depth < SOLVED_DEPTH:
+                    self.depth_limited = True
+                return value
+
+        original_alpha = alpha
+        outer_depth_limited = self.depth_limited
+        self.depth_limited = False
+        best_value = -math.inf
+        best_move = None
+        for move in ordered_moves(state, MOVE_EVALUATOR, table_move):
+            undo = state.apply_move(move)
+            value = -self.search(state, depth - 1, -beta, -alpha)
+            state.undo_move(undo)
+            if self.stopped:
+                return 0.0
+            if value > best_value:
+                best_value = value
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, depth if self.depth_limited else SOLVED_DEPTH, best_value, flag, best_move)
+        self.depth_limited = outer_depth_limited or self.depth_limited
+        return best_value
+
+    def chance_value(self, state, depth):
+        """Value of a finished round for the side to move, averaged over sampled refills if depth remains."""
+        if depth <= 0 or not self.chance_samples:
+            if self.chance_samples:
+                self.depth_limited = True
+            return self.evaluate(state)
+
+        player = state.current_player
+        snapshot = state.snapshot()
+        total = 0.0
+        for _ in range(self.chance_samples):
+            tile_bag_rng = state.tile_bag.rng
+            state.tile_bag.rng = self.rng
+            self.engine.end_round(state)
+            state.tile_bag.rng = tile_bag_rng
+            # Chance nodes break the alpha-beta window, so each sample gets a full one
+            value = self.search(state, depth - 1, -math.inf, math.inf)
+            if state.current_player is not player:
+                value = -value
+            state.restore(snapshot)
+            if self.stopped:
+                return 0.0
+            total += value
+        return total / self.chance_samples
+
+    def evaluate(self, state):
+        player = state.current_player
+        opponent = state.player2 if player is state.player1 else state.player1
+        if state.game_over:
+            return player.score - opponent.score
+        return projected_score(player, self.partial_weight) - projected_score(opponent, self.partial_weight)
@@ -1,13 +1,33 @@
-#TODO: Add all the remaining tiles into the boxlid
+from enums.tile_color import TILE_COLORS
+
 class BoxLid:
     def __init__(self):
-        self.tiles = []
+        self.tile_counts = dict.fromkeys(TILE_COLORS, 0)  # Number of tiles of each color in the box lid
+        self.tile_total = 0  # Running sum of tile_counts
+
+    def add_tiles(self, tile_color, tile_count):
+        """Add tiles of a single color to the box lid."""
+        self.tile_counts[tile_color] += tile_count
+        self.tile_total += tile_count
+
+    def set_color_count(self, tile_color, tile_count):
+        """Set the number of tiles of one color, e.g. when undoing a move."""
+        self.tile_total += tile_count - self.tile_counts[tile_color]
+        self.tile_counts[tile_color] = tile_count
+
+    def set_tile_counts(self, tile_counts):
+        self.tile_counts = tile_counts
+        self.tile_total = sum(tile_counts.values())
+
+    def tile_count(self):
+        return self.tile_total
 
-    def add_tiles(self, tiles):
-        """Add tiles to the box lid."""
-        self.tiles.extend(tiles)
+    def recount_tiles(self):
+        """Count the tiles from tile_counts, ignoring the running total."""
+        return sum(self.tile_counts.values())
 
     def empty_into_tile_bag(self, tile_bag):
-        """Empty all tiles from the box lid into the tile bag and shuffle."""
-        tile_bag.add_tiles(self.tiles)
-        self.tiles = []
\ No newline at end of file
+        """Empty all tiles from the box lid into the tile bag."""
+        tile_bag.add_tiles(self.tile_counts)
+        self.tile_counts = dict.fromkeys(TILE_COLORS, 0)
+        self.tile_total = 0
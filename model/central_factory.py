@@ -1,19 +1,23 @@
 from model.factory import Factory
-from model.starting_player_tile import StartingPlayerTile
-from enums.tile_color import TileColor
 
 class CentralFactory(Factory):
     def __init__(self):
         super().__init__()
         self.starting_player_marker_taken = False
-        self.tiles.append(StartingPlayerTile())
 
-    
     def remove_and_return_tiles_of_color(self, tile_color):
         if not self.starting_player_marker_taken:
             self.starting_player_marker_taken = True
         return super().remove_and_return_tiles_of_color(tile_color)
-    
+
     def add_starting_player_tile(self):
-        self.tiles.append(StartingPlayerTile())
-        self.starting_player_marker_taken = False
\ No newline at end of file
+        self.starting_player_marker_taken = False
+
+    def has_starting_player_tile(self):
+        return not self.starting_player_marker_taken
+
+    def take_starting_player_tile(self):
+        self.starting_player_marker_taken = True
+
+    def tile_names(self):
+        return ["starting player tile"] * self.has_starting_player_tile() + super().tile_names()
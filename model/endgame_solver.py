@@ -0,0 +1,133 @@
+import math
+
+from model.alpha_beta_player import MOVE_EVALUATOR, ordered_moves, projected_score
+from model.player_board import WALL_COLUMN, wall_bit
+from model.scoring_tables import ROW_MASKS, popcount
+from search.transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND
+
+
+def completes_wall_row(board):
+    """True if a full pattern line will complete its wall row when the round is scored."""
+    for row, (color, count) in enumerate(board.pattern_lines):
+        if count == row + 1 and popcount(board.wall & ROW_MASKS[row]) == 4:
+            # The line's own cell is the missing one, as a line never takes a color already in its row
+            return board.wall & wall_bit(row, WALL_COLUMN[color][row]) == 0
+    return False
+
+
+def is_final_round(state):
+    """
+    True once the game is certain to end with the current round: full pattern lines always move to
+    the wall, so a full line whose wall row holds the other four tiles makes check_game_over fire.
+    No tiles are drawn from the bag again, so the rest of the game is finite and deterministic.
+    """
+    return not state.game_over and any(completes_wall_row(player.board) for player in state.players)
+
+
+def final_margin(state):
+    """Final score margin for the player to move, at the end of the last round, end-game bonuses included."""
+    player = state.current_player
+    opponent = state.player2 if player is state.player1 else state.player1
+    return projected_score(player, 0) - projected_score(opponent, 0)
+
+
+class EndgameSolver:
+    def __init__(self, node_limit=None):
+        """
+        Exact solver of the final round (see is_final_round): negamax with alpha-beta pruning over
+        every move until the round ends, where the game is scored exactly, bonuses included.
+
+        Solved positions are memoized by their Zobrist hash, which covers the scores as well, so one
+        solver can be kept across moves and games; call clear() to free the memory.
+
+        :param node_limit: Optional number of positions a single solve may visit before giving up.
+                           Solving is instant late in the round but can take long right after the refill.
+        """
+        self.node_limit = node_limit
+        self.memo = {}  # Zobrist hash -> (value, flag, best move)
+        self.nodes = 0
+        self.stopped = False
+
+    def clear(self):
+        self.memo.clear()
+
+    def can_solve(self, state):
+        return is_final_round(state)
+
+    def solve(self, state):
+        """
+        Return (final score margin for the player to move, best move) under perfect play by both sides,
+        or None if the node limit was reached first. The state is left as it was.
+
+        :raise ValueError: If the state is not in the final round.
+        """
+        if not is_final_round(state):
+            raise ValueError("The game is not certain to end with this round.")
+        self.nodes = 0
+        self.stopped = False
+        value = self.search(state, -math.inf, math.inf)
+        if self.stopped:
+            return None
+        entry = self.memo.get(state.zobrist_hash)
+        return value, entry[2] if entry is not None else None  # No move once the round is over
+
+    def move_values(self, state):
+        """
+        Return {move: final score margin for the player to move after it}, for every legal move,
+        or None if the node limit was reached. Useful as ground truth to grade heuristic players.
+        """
+        if not is_final_round(state):
+            raise ValueError("The game is not certain to end with this round.")
+        self.nodes = 0
+        self.stopped = False
+        values = {}
+        for move in state.get_legal_moves():
+            undo = state.apply_move(move)
+            values[move] = -self.search(state, -math.inf, math.inf)
+            state.undo_move(undo)
+            if self.stopped:
+                return None
+        return values
+
+    def search(self, state, alpha, beta):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            self.stopped = True
+        if self.stopped:
+            return 0
+        if state.is_round_over():
+            return final_margin(state)
+
+        key = state.zobrist_hash
+        entry = self.memo.get(key)
+        memo_move = None
+        if entry is not None:
+            value, flag, memo_move = entry
+            if flag == EXACT or (flag == LOWER_BOUND and value >= beta) or (flag == UPPER_BOUND and value <= alpha):
+                return value
+
+        original_alpha = alpha
+        best_value = -math.inf
+        best_move = None
+        for move in ordered_moves(state, MOVE_EVALUATOR, memo_move):
+            undo = state.apply_move(move)
+            value = -self.search(state, -beta, -alpha)
+            state.undo_move(undo)
+            if self.stopped:
+                return 0
+            if value > best_value:
+                best_value = value
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.memo[key] = (best_value, flag, best_move)
+        return best_value
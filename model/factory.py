@@ -1,21 +1,57 @@
+from enums.tile_color import TILE_COLORS
+
 class Factory:
     def __init__(self):
-        self.tiles = []
+        self.tile_counts = dict.fromkeys(TILE_COLORS, 0)  # Number of tiles of each color on the factory
+        self.tile_total = 0  # Running sum of tile_counts, kept up to date by every method that moves tiles
 
-    def add_tiles(self, tiles):
-        self.tiles.extend(tiles)
+    def add_tiles(self, tile_counts):
+        """Add tiles given as a dictionary mapping each TileColor to a count."""
+        for color, count in tile_counts.items():
+            self.tile_counts[color] += count
+            self.tile_total += count
 
     def remove_and_return_tiles_of_color(self, tile_color):
-        """Remove and return all tiles of a specific color, leaving the rest."""
-        selected_tiles = [tile for tile in self.tiles if tile.color == tile_color]
-        self.tiles = [tile for tile in self.tiles if tile.color != tile_color]
-        return selected_tiles
-    
+        """Remove all tiles of a specific color, leaving the rest, and return how many were removed."""
+        selected_count = self.tile_counts[tile_color]
+        self.tile_counts[tile_color] = 0
+        self.tile_total -= selected_count
+        return selected_count
+
     def get_and_clear_remaining_tiles(self):
         """Return and clear all remaining tiles."""
-        remaining_tiles = self.tiles[:]
-        self.tiles = []
+        remaining_tiles = self.tile_counts
+        self.tile_counts = dict.fromkeys(TILE_COLORS, 0)
+        self.tile_total = 0
         return remaining_tiles
-    
+
     def clear(self):
-        self.tiles = []
\ No newline at end of file
+        self.tile_counts = dict.fromkeys(TILE_COLORS, 0)
+        self.tile_total = 0
+
+    def set_tile_counts(self, tile_counts):
+        """Replace the tiles on the factory, e.g. when undoing a move."""
+        self.tile_counts = tile_counts
+        self.tile_total = sum(tile_counts.values())
+
+    def is_empty(self):
+        """Check if the factory holds no colored tiles."""
+        return not self.tile_total
+
+    def tile_count(self):
+        return self.tile_total
+
+    def recount_tiles(self):
+        """Count the tiles from tile_counts, ignoring the running total."""
+        return sum(self.tile_counts.values())
+
+    def available_colors(self):
+        """Return the colors present on the factory, in TileColor order."""
+        return [color for color, count in self.tile_counts.items() if count]
+
+    def has_starting_player_tile(self):
+        return False
+
+    def tile_names(self):
+        """Return the names of the tiles on the factory, grouped by color."""
+        return [color.value for color, count in self.tile_counts.items() for _ in range(count)]
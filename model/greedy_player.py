@@ -0,0 +1,95 @@
+from model.player import Player
+from model.player_board import (
+    WALL_COLUMN, FLOOR_LINE_CAPACITY, FLOOR_LINE_INDEX, FLOOR_SCORE_BY_LENGTH, ROW_BONUS, COLUMN_BONUS, COLOR_BONUS, wall_bit,
+)
+from model.scoring_tables import ROW_MASKS, COLUMN_MASKS, placement_score, popcount
+
+# Wall cells of each color
+COLOR_WALL_MASKS = {color: sum(wall_bit(row, column) for row, column in enumerate(columns))
+                    for color, columns in WALL_COLUMN.items()}
+
+
+def bonus_progress(wall, mask, bonus):
+    """
+    Value of adding a cell to a row, column or color of the wall, counting a line with k of its
+    5 tiles as worth bonus * (k / 5) ** 2, so the values sum to the full bonus on completion.
+    """
+    count = popcount(wall & mask)
+    return bonus * ((count + 1) ** 2 - count ** 2) / 25
+
+
+class GreedyPlayer(Player):
+    def __init__(self, name, rng=None, partial_weight=0.5, bonus_weight=1.0, marker_value=1.0):
+        """
+        Player that takes the move with the best immediate value, reading the deltas straight from
+        the current board: wall points of the pattern line once it fills (discounted while it is
+        only partly filled), progress towards the end-game bonuses, floor penalties and the
+        starting player tile. Ties are broken at random.
+
+        It evaluates the board of whichever player is to move, so select_move also serves as a
+        rollout policy for search players.
+
+        :param rng: Optional random.Random for tie breaks, else the seat's stream (see RandomPlayer).
+        :param partial_weight: Share of a pattern line's value counted per tile while it is not yet full.
+        :param bonus_weight: Weight of end-game bonus progress relative to wall points.
+        :param marker_value: Value of going first next round, on top of the starting tile's floor penalty.
+        """
+        super().__init__(name)
+        self.rng = rng
+        self.partial_weight = partial_weight
+        self.bonus_weight = bonus_weight
+        self.marker_value = marker_value
+
+    def make_decision(self, state):
+        rng = self.rng if self.rng is not None else state.player_rngs[state.players.index(self)]
+        return self.select_move(state, rng)
+
+    def select_move(self, state, rng):
+        """Return the best move for the player to move in the state, breaking ties with rng."""
+        best_moves = []
+        best_value = None
+        for move in state.get_legal_moves():
+            value = self.evaluate_move(state, move)
+            if best_value is None or value > best_value:
+                best_value = value
+                best_moves = [move]
+            elif value == best_value:
+                best_moves.append(move)
+        return best_moves[0] if len(best_moves) == 1 else rng.choice(best_moves)
+
+    def evaluate_move(self, state, move):
+        """Immediate value of a move for the player to move, without changing or copying anything."""
+        factory_index, color, pattern_line_index = move
+        board = state.current_player.board
+        factory = state.get_factory(factory_index)
+        tile_count = factory.tile_counts[color]
+        takes_marker = factory.has_starting_player_tile()
+
+        value = 0.0
+        floor_tiles = tile_count
+        if pattern_line_index != FLOOR_LINE_INDEX:
+            _, existing_tiles = board.pattern_lines[pattern_line_index]
+            capacity = pattern_line_index + 1
+            placed_tiles = min(capacity - existing_tiles, tile_count)
+            floor_tiles = tile_count - placed_tiles
+
+            wall = board.wall
+            column = WALL_COLUMN[color][pattern_line_index]
+            line_value = placement_score(wall, pattern_line_index, column) + self.bonus_weight * (
+                bonus_progress(wall, ROW_MASKS[pattern_line_index], ROW_BONUS)
+                + bonus_progress(wall, COLUMN_MASKS[column], COLUMN_BONUS)
+                + bonus_progress(wall, COLOR_WALL_MASKS[color], COLOR_BONUS)
+            )
+            if existing_tiles + placed_tiles == capacity:
+                # Count only the value the move adds on top of the tiles already in the line
+                value += line_value * (1 - self.partial_weight * existing_tiles / capacity)
+            else:
+                value += line_value * self.partial_weight * placed_tiles / capacity
+
+        floor_length = board.floor_line_length()
+        new_floor_length = floor_length + takes_marker
+        new_floor_length += max(0, min(floor_tiles, FLOOR_LINE_CAPACITY - new_floor_length))
+        value += FLOOR_SCORE_BY_LENGTH[new_floor_length] - FLOOR_SCORE_BY_LENGTH[floor_length]
+        if takes_marker:
+            value += self.marker_value
+        return value
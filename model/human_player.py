@@ -1,40 +1,70 @@
+import asyncio
+
 from model.player import Player
-from model.starting_player_tile import StartingPlayerTile
+from model.state import CENTRAL_FACTORY_INDEX
+from model.player_board import FLOOR_LINE_INDEX
 from enums.tile_color import TileColor
-from visualizer import Visualizer
 
 class HumanPlayer(Player):
-    
+    def __init__(self, name, decision_source=None):
+        """
+        Player whose moves come from a person through an awaitable decision source, so waiting for
+        them never blocks anything else running on the event loop.
+
+        A decision source is any object with the coroutine methods request_move(player, state, legal_moves),
+        returning a (factory_index, color, pattern_line_index) move, and reject_move(player, move),
+        called before asking again when the move was not legal.
+
+        :param decision_source: Where the moves come from, e.g. a seat of the game server (see game_server).
+                                Defaults to a ConsoleDecisionSource prompting on the terminal.
+        """
+        super().__init__(name)
+        self.decision_source = decision_source if decision_source is not None else ConsoleDecisionSource()
+
+    async def decide(self, state):
+        legal_moves = state.get_legal_moves()
+        while True:
+            move = await self.decision_source.request_move(self, state, legal_moves)
+            if move in legal_moves:
+                return move
+            await self.decision_source.reject_move(self, move)
+
     def make_decision(self, state):
-        factory_index = self.select_factory(state)
-        selected_factory = state.central_factory if factory_index == -1 else state.factories[factory_index]
-        selected_color = self.select_color(selected_factory)
-        pattern_line_index = self.select_pattern_line()
+        # The blocking GameEngine.play_game runs a single game, so it can simply wait for the move
+        return asyncio.run(self.decide(state))
+
+
+class ConsoleDecisionSource:
+    """Decision source that prompts on the terminal, reading input in a thread so the event loop keeps running."""
+
+    async def request_move(self, player, state, legal_moves):
+        factory_index = await self.select_factory(state)
+        selected_factory = state.get_factory(factory_index)
+        selected_color = await self.select_color(selected_factory)
+        pattern_line_index = await self.select_pattern_line()
 
         return factory_index, selected_color, pattern_line_index
 
-    def select_factory(self, state):
+    async def reject_move(self, player, move):
+        print("That move is not legal, the pattern line holds another color or that color is already on the wall. Please choose again.")
+
+    async def select_factory(self, state):
         # Determine if the central factory has tiles other than just the starting player tile
-        central_has_valid_tiles = any(not isinstance(tile, StartingPlayerTile) for tile in state.central_factory.tiles)
+        central_has_valid_tiles = not state.central_factory.is_empty()
 
         # List non-empty factories and include the central factory if it has valid tiles
-        non_empty_factories = [(i, factory) for i, factory in enumerate(state.factories, start=1) if factory.tiles]
-        non_empty_factory_indices = [str(i) for i, factory in non_empty_factories]
+        non_empty_factory_indices = [str(i) for i, factory in enumerate(state.factories, start=1) if not factory.is_empty()]
 
         central_factory_option = ""
         if central_has_valid_tiles:  # Only add central factory as an option if it has valid tiles
             central_factory_option = "0,"
 
-        if not non_empty_factories and not central_has_valid_tiles:
-            print("No valid tile selection options available. Please check the game state.")
-            return None
-
         while True:
             try:
                 selection_prompt = f"Choose a factory by number (Options: {central_factory_option} {', '.join(non_empty_factory_indices)}): "
-                factory_index = input(selection_prompt).strip()
+                factory_index = (await asyncio.to_thread(input, selection_prompt)).strip()
                 if factory_index == "0" and central_has_valid_tiles:
-                    return -1  # Convention to represent the central factory as a valid selection
+                    return CENTRAL_FACTORY_INDEX
                 factory_index = int(factory_index) - 1
                 if str(factory_index + 1) in non_empty_factory_indices:
                     return factory_index
@@ -43,23 +73,23 @@ class HumanPlayer(Player):
             except ValueError:
                 print("Invalid input. Please enter a valid option.")
 
-    def select_color(self, selected_factory):
-        available_colors = {tile.color.name.upper() for tile in selected_factory.tiles if not isinstance(tile, StartingPlayerTile)}
+    async def select_color(self, selected_factory):
+        available_colors = {color.name.upper() for color in selected_factory.available_colors()}
         print(f"Available colors: {', '.join(sorted(available_colors))}")
         while True:
-            color_input = input("Choose a color from the available options: ").upper()
+            color_input = (await asyncio.to_thread(input, "Choose a color from the available options: ")).strip().upper()
             if color_input in available_colors:
                 return TileColor[color_input]
             else:
                 print("Invalid color. Please choose from the available options.")
 
-    def select_pattern_line(self):
+    async def select_pattern_line(self):
         while True:
             try:
-                pattern_line_index = int(input("Choose a pattern line (1-5): ")) - 1
-                if 0 <= pattern_line_index < 5:
+                pattern_line_index = int(await asyncio.to_thread(input, "Choose a pattern line (1-5, or 6 for the floor line): ")) - 1
+                if 0 <= pattern_line_index <= FLOOR_LINE_INDEX:
                     return pattern_line_index
                 else:
-                    print("Please enter a number between 1 and 5.")
+                    print("Please enter a number between 1 and 6.")
             except ValueError:
-                print("Invalid input. Please enter a number.")
\ No newline at end of file
+                print("Invalid input. Please enter a number.")
@@ -0,0 +1,255 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from action_space import ACTION_COUNT, encode_move, decode_action
+from game_engine import GameEngine
+from model.player import Player
+from model.player_board import FLOOR_LINE_INDEX
+
+NO_NODE = -1
+
+
+class MCTSPlayer(Player):
+    def __init__(self, name, iterations=1000, time_limit=None, exploration=1.4, max_nodes=200000,
+                 rollout_rounds=0, score_scale=10.0, seed=None, rollout_policy=None):
+        """
+        Monte Carlo tree search player.
+
+        The tree covers the current round, which is deterministic. A move that ends the round is a
+        chance node: each visit scores the round with GameEngine.end_round, which samples the factory
+        refill from the bag, optionally plays rollout_rounds further random rounds, and rolls back.
+
+        Nodes live in preallocated NumPy arrays, so memory stays flat however long the search runs.
+        After each decision the subtree under the chosen move is compacted to the front of the
+        arrays and reused if the next position is found in it.
+
+        :param iterations: Iterations per decision.
+        :param time_limit: Optional seconds per decision; the search stops at whichever limit comes first.
+                           Decisions then depend on the clock, so games no longer replay from their seed.
+        :param exploration: UCT exploration constant.
+        :param max_nodes: Size of the node pool, at least ACTION_COUNT + 1 so the root can always be expanded.
+                          Once full, the tree stops growing but iterations go on.
+        :param rollout_rounds: Random rounds to play after a sampled round end before evaluating.
+        :param score_scale: Score margin that maps to a value of tanh(1).
+        :param seed: Optional seed of the search's random generator, else the search draws from the seat's
+                     stream of the game seed (see RandomPlayer), so games replay from the game seed alone.
+                     Sampled refills use it as well, so searching never advances the game's tile bag stream.
+        :param rollout_policy: Optional object with a select_move(state, rng) method, e.g. a GreedyPlayer,
+                               that plays the rollouts instead of the default random policy.
+        """
+        super().__init__(name)
+        if max_nodes < ACTION_COUNT + 1:
+            raise ValueError(f"max_nodes must be at least {ACTION_COUNT + 1} to hold the root and all its children.")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.rollout_rounds = rollout_rounds
+        self.score_scale = score_scale
+        self.seeded_rng = random.Random(seed) if seed is not None else None
+        self.rng = self.seeded_rng
+        self.rollout_policy = rollout_policy
+        self.engine = GameEngine(print_enabled=False, visualize=False)
+
+        self.parent = np.full(max_nodes, NO_NODE, dtype=np.int32)
+        self.first_child = np.full(max_nodes, NO_NODE, dtype=np.int32)
+        self.child_count = np.zeros(max_nodes, dtype=np.int16)
+        self.action = np.zeros(max_nodes, dtype=np.int16)
+        self.mover = np.zeros(max_nodes, dtype=np.int8)  # Player index that made the move into the node
+        self.ends_round = np.zeros(max_nodes, dtype=bool)
+        self.visits = np.zeros(max_nodes, dtype=np.int32)
+        self.value_sum = np.zeros(max_nodes, dtype=np.float64)  # From the mover's point of view
+        self.state_hash = np.zeros(max_nodes, dtype=np.uint64)
+        self.node_count = 0
+        self.root = NO_NODE
+        self.last_visit_counts = {}  # root_visit_counts of the last decision, before the tree moved on
+
+    def make_decision(self, state):
+        self.rng = self.seeded_rng if self.seeded_rng is not None else state.player_rngs[state.players.index(self)]
+        self.prepare_root(state)
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        # At least one iteration, whatever the limits, so a child of the root has been visited
+        for iteration in range(max(self.iterations, 1)):
+            if iteration and deadline is not None and time.perf_counter() >= deadline:
+                break
+            self.run_iteration(state)
+
+        if self.first_child[self.root] == NO_NODE:
+            # Only if the state has no legal moves, which the engine never asks to decide on
+            self.last_visit_counts = {}
+            return self.rollout_move(state)
+        best_child = self.best_child(self.root)
+        self.last_visit_counts = self.root_visit_counts()
+        # Keep the subtree under the chosen move for the next decision
+        self.compact(best_child)
+        return decode_action(self.action[self.root])
+
+    def root_visit_counts(self):
+        """Return {action: visits} for the children of the current root, e.g. as a policy target."""
+        first = self.first_child[self.root]
+        if first == NO_NODE:
+            return {}
+        children = range(first, first + self.child_count[self.root])
+        return {int(self.action[child]): int(self.visits[child]) for child in children}
+
+    def prepare_root(self, state):
+        """Reuse a node of the kept subtree matching the state, or start a new tree."""
+        state_hash = np.uint64(state.zobrist_hash)
+        if self.root != NO_NODE:
+            if self.state_hash[self.root] == state_hash:
+                self.expand_root(state)
+                return
+            first = self.first_child[self.root]
+            if first != NO_NODE:
+                children = np.arange(first, first + self.child_count[self.root])
+                matches = children[(self.state_hash[children] == state_hash) & (self.visits[children] > 0)]
+                if len(matches):
+                    self.compact(int(matches[0]))
+                    self.expand_root(state)
+                    return
+        self.new_tree(state)
+
+    def new_tree(self, state):
+        self.node_count = 0
+        self.root = self.new_node(NO_NODE, 0, 1 - state.players.index(state.current_player))
+        self.state_hash[self.root] = np.uint64(state.zobrist_hash)
+        self.expand_root(state)
+
+    def expand_root(self, state):
+        """Expand the root if it is a leaf, starting over with an empty pool if the kept subtree filled it."""
+        if self.first_child[self.root] != NO_NODE or state.is_round_over():
+            return
+        if not self.expand(self.root, state) and self.node_count > 1:
+            self.new_tree(state)
+
+    def new_node(self, parent, action, mover):
+        node = self.node_count
+        self.node_count += 1
+        self.parent[node] = parent
+        self.first_child[node] = NO_NODE
+        self.child_count[node] = 0
+        self.action[node] = action
+        self.mover[node] = mover
+        self.ends_round[node] = False
+        self.visits[node] = 0
+        self.value_sum[node] = 0.0
+        self.state_hash[node] = 0
+        return node
+
+    def run_iteration(self, state):
+        undo_stack = []
+        node = self.root
+
+        # Selection: walk down fully expanded nodes
+        while self.first_child[node] != NO_NODE and not self.ends_round[node]:
+            node = self.select_child(node)
+            self.apply_node_move(state, node, undo_stack)
+
+        # Expansion: add the children of a node visited before, if the pool has room
+        if not self.ends_round[node] and not state.is_round_over() and (self.visits[node] > 0 or node == self.root):
+            if self.expand(node, state):
+                node = self.select_child(node)
+                self.apply_node_move(state, node, undo_stack)
+
+        # Simulation: play out the round, then sample its end
+        rollout_undo_stack = []
+        while not state.is_round_over():
+            rollout_undo_stack.append(state.apply_move(self.rollout_move(state)))
+        value = self.evaluate_round_end(state)  # From the first player's point of view
+        while rollout_undo_stack:
+            state.undo_move(rollout_undo_stack.pop())
+
+        # Backpropagation
+        while node != NO_NODE:
+            self.visits[node] += 1
+            self.value_sum[node] += value if self.mover[node] == 0 else -value
+            node = self.parent[node]
+        while undo_stack:
+            state.undo_move(undo_stack.pop())
+
+    def apply_node_move(self, state, node, undo_stack):
+        undo_stack.append(state.apply_move(decode_action(self.action[node])))
+        if self.visits[node] == 0:
+            self.state_hash[node] = np.uint64(state.zobrist_hash)
+            self.ends_round[node] = state.is_round_over()
+
+    def expand(self, node, state):
+        moves = state.get_legal_moves()
+        if not moves or self.node_count + len(moves) > self.max_nodes:
+            return False
+        mover = state.players.index(state.current_player)
+        first = self.node_count
+        for move in moves:
+            self.new_node(node, encode_move(move), mover)
+        self.first_child[node] = first
+        self.child_count[node] = len(moves)
+        return True
+
+    def select_child(self, node):
+        first = self.first_child[node]
+        children = slice(first, first + self.child_count[node])
+        visits = self.visits[children]
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return first + int(unvisited[self.rng.randrange(len(unvisited))])
+        exploration = self.exploration * np.sqrt(math.log(self.visits[node]) / visits)
+        return first + int(np.argmax(self.value_sum[children] / visits + exploration))
+
+    def best_child(self, node):
+        first = self.first_child[node]
+        return first + int(np.argmax(self.visits[first:first + self.child_count[node]]))
+
+    def rollout_move(self, state):
+        """
+        Move of the rollout policy, by default a random legal move that avoids the floor line
+        whenever a pattern line can take the tiles.
+        """
+        if self.rollout_policy is not None:
+            return self.rollout_policy.select_move(state, self.rng)
+        moves = state.get_legal_moves()
+        pattern_line_moves = [move for move in moves if move[2] != FLOOR_LINE_INDEX]
+        return self.rng.choice(pattern_line_moves or moves)
+
+    def evaluate_round_end(self, state):
+        """Score the finished round on a sampled refill, optionally play on, and return tanh(margin / scale)."""
+        snapshot = state.snapshot()
+        tile_bag_rng = state.tile_bag.rng
+        state.tile_bag.rng = self.rng
+        self.engine.end_round(state)
+        for _ in range(self.rollout_rounds):
+            if state.game_over:
+                break
+            while not state.is_round_over():
+                state.apply_move(self.rollout_move(state))
+            self.engine.end_round(state)
+        margin = state.player1.score - state.player2.score
+        state.tile_bag.rng = tile_bag_rng
+        state.restore(snapshot)
+        return math.tanh(margin / self.score_scale)
+
+    def compact(self, new_root):
+        """Move the subtree under new_root to the front of the node arrays, dropping everything else."""
+        order = [new_root]
+        index = 0
+        while index < len(order):
+            node = order[index]
+            first = self.first_child[node]
+            if first != NO_NODE:
+                order.extend(range(first, first + self.child_count[node]))
+            index += 1
+        order = np.array(order, dtype=np.int32)
+
+        new_index = np.full(self.node_count, NO_NODE, dtype=np.int32)
+        new_index[order] = np.arange(len(order), dtype=np.int32)
+        for array in (self.child_count, self.action, self.mover, self.ends_round, self.visits, self.value_sum, self.state_hash):
+            array[:len(order)] = array[order]
+        parent = self.parent[order]
+        first_child = self.first_child[order]
+        self.parent[:len(order)] = np.where(parent == NO_NODE, NO_NODE, new_index[parent])
+        self.first_child[:len(order)] = np.where(first_child == NO_NODE, NO_NODE, new_index[first_child])
+        self.parent[0] = NO_NODE
+        self.node_count = len(order)
+        self.root = 0
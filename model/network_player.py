@@ -0,0 +1,40 @@
+from action_space import decode_action
+from azul_env import encode_observation, legal_action_mask
+from model.player import Player
+
+class NetworkPlayer(Player):
+    def __init__(self, name, coordinator, temperature=1.0, rng=None):
+        """
+        Player that picks moves from a policy network evaluated by a shared InferenceCoordinator
+        (see inference), so the decisions of many games are batched into one forward pass.
+
+        make_decision blocks until the batch holding the observation is evaluated, which suits games
+        running in threads; decide awaits it, for games running on an event loop.
+
+        :param coordinator: The InferenceCoordinator to submit observations to.
+        :param temperature: Moves are sampled from the policy sharpened by 1 / temperature; 0 always plays the most likely move.
+        :param rng: Optional random.Random for sampling, else the seat's stream (see RandomPlayer).
+        """
+        super().__init__(name)
+        self.coordinator = coordinator
+        self.temperature = temperature
+        self.rng = rng
+        self.last_value = None  # Value the network gave the last position it decided in
+
+    def make_decision(self, state):
+        return self.choose_move(state, self.coordinator.evaluate(encode_observation(state), legal_action_mask(state)))
+
+    async def decide(self, state):
+        return self.choose_move(state, await self.coordinator.evaluate_async(encode_observation(state), legal_action_mask(state)))
+
+    def choose_move(self, state, evaluation):
+        probabilities, self.last_value = evaluation
+        if self.temperature == 0:
+            return decode_action(probabilities.argmax())
+        if self.temperature != 1:
+            probabilities = probabilities ** (1 / self.temperature)
+        rng = self.rng if self.rng is not None else state.player_rngs[state.players.index(self)]
+        cumulative = probabilities.cumsum()
+        action = int(cumulative.searchsorted(rng.random() * cumulative[-1], side="right"))
+        # Rounding can leave the draw past the last legal action's cumulative sum
+        return decode_action(min(action, int(probabilities.nonzero()[0][-1])))
@@ -15,6 +15,10 @@ class Player:
     def make_decision(self):
         pass
 
+    async def decide(self, state):
+        """Awaitable make_decision, used by GameEngine.play_game_async. Players whose moves come from elsewhere override it."""
+        return self.make_decision(state)
+
     def select_factory(self):
         pass
 
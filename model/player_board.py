@@ -1,77 +1,132 @@
-from model.tile import Tile
-from model.starting_player_tile import StartingPlayerTile
 from enums.tile_color import TileColor
+from model.scoring_tables import (
+    PLACEMENT_SCORE, placement_index, row_bits, column_bits, popcount,
+    completed_rows_mask, completed_columns_mask, completed_color_count,
+)
+
+# Fixed color pattern on the wall
+WALL_PATTERN = [
+    [TileColor.BLUE, TileColor.YELLOW, TileColor.RED, TileColor.BLACK, TileColor.WHITE],
+    [TileColor.WHITE, TileColor.BLUE, TileColor.YELLOW, TileColor.RED, TileColor.BLACK],
+    [TileColor.BLACK, TileColor.WHITE, TileColor.BLUE, TileColor.YELLOW, TileColor.RED],
+    [TileColor.RED, TileColor.BLACK, TileColor.WHITE, TileColor.BLUE, TileColor.YELLOW],
+    [TileColor.YELLOW, TileColor.RED, TileColor.BLACK, TileColor.WHITE, TileColor.BLUE]
+]
+
+# WALL_COLUMN[color][row] is the wall column that takes a tile of that color in that row
+WALL_COLUMN = {color: [row.index(color) for row in WALL_PATTERN] for color in TileColor}
+
+FLOOR_LINE_CAPACITY = 7
+FLOOR_LINE_PENALTIES = [1, 1, 2, 2, 2, 3, 3]  # Base penalties for the first 7 floor line slots
+# Floor line score by number of occupied slots. The starting player tile is placed without a
+# capacity check, so up to FLOOR_LINE_CAPACITY + 1 slots can be occupied.
+FLOOR_SCORE_BY_LENGTH = [
+    -sum(FLOOR_LINE_PENALTIES[:length]) - max(length - FLOOR_LINE_CAPACITY, 0) * 3
+    for length in range(FLOOR_LINE_CAPACITY + 2)
+]
+
+# End-game bonuses per completed row, column and color
+ROW_BONUS = 2
+COLUMN_BONUS = 7
+COLOR_BONUS = 10
+
+EMPTY_PATTERN_LINE = (None, 0)
+FLOOR_LINE_INDEX = 5  # Pattern line index that sends tiles straight to the floor line
+
+
+def wall_bit(row, column):
+    """Return the bit of the 25-bit wall mask that represents the given cell."""
+    return 1 << (row * 5 + column)
+
 
 class PlayerBoard:
     def __init__(self, box_lid):
-        self.pattern_lines = [[None, None, None, None, None] for _ in range(5)]  # 5 pattern lines, up to 5 tiles each
-        self.wall = [[None for _ in range(5)] for _ in range(5)]  # 5x5 grid, initially empty
-        self.floor_line = []  # Will hold tiles that overflow or are not placed
+        self.pattern_lines = [EMPTY_PATTERN_LINE] * 5  # (color, count) per pattern line, line i holds up to i + 1 tiles
+        self.wall = 0  # 25-bit mask, bit row * 5 + column is set when that cell holds a tile
+        self.floor_line_count = 0  # Number of colored tiles on the floor line
+        self.has_starting_marker = False  # Whether the starting player tile is on the floor line
+        self.placed_tile_count = 0  # Running count of tiles on the pattern lines and the wall
         self.box_lid = box_lid
+        self.wall_pattern = WALL_PATTERN
 
-        # Define the fixed color pattern on the wall
-        self.wall_pattern = [
-            [TileColor.BLUE, TileColor.YELLOW, TileColor.RED, TileColor.BLACK, TileColor.WHITE],
-            [TileColor.WHITE, TileColor.BLUE, TileColor.YELLOW, TileColor.RED, TileColor.BLACK],
-            [TileColor.BLACK, TileColor.WHITE, TileColor.BLUE, TileColor.YELLOW, TileColor.RED],
-            [TileColor.RED, TileColor.BLACK, TileColor.WHITE, TileColor.BLUE, TileColor.YELLOW],
-            [TileColor.YELLOW, TileColor.RED, TileColor.BLACK, TileColor.WHITE, TileColor.BLUE]
-        ]
+    def copy(self):
+        """Return an independent copy of this board. The box lid is shared, as it belongs to the game."""
+        board = PlayerBoard.__new__(PlayerBoard)
+        board.pattern_lines = self.pattern_lines[:]
+        board.wall = self.wall
+        board.floor_line_count = self.floor_line_count
+        board.has_starting_marker = self.has_starting_marker
+        board.placed_tile_count = self.placed_tile_count
+        board.box_lid = self.box_lid
+        board.wall_pattern = self.wall_pattern
+        return board
 
     def place_tile_in_pattern_line(self, tile_color, pattern_line_index, tile_count):
         """
         Attempt to place tiles in a specified pattern line.
-        
+
         :param tile_color: The color of the tiles being placed.
-        :param pattern_line_index: The index of the pattern line (0-4).
+        :param pattern_line_index: The index of the pattern line (0-4), 5 or more for the floor line.
         :param tile_count: The number of tiles being placed.
         """
         if pattern_line_index < 5:
             if self.is_color_on_wall(tile_color, pattern_line_index):
                 # Redirect the tiles to the floor line
-                self.add_tiles_to_floor_line([Tile(tile_color)] * tile_count)
+                self.add_tiles_to_floor_line(tile_color, tile_count)
             else:
-                pattern_line = self.pattern_lines[pattern_line_index]
+                line_color, existing_tiles = self.pattern_lines[pattern_line_index]
                 line_capacity = pattern_line_index + 1  # The capacity matches the row index + 1
-                existing_tiles = sum(1 for tile in pattern_line if tile is not None)
                 space_left = line_capacity - existing_tiles
 
                 # Calculate how many tiles can be actually placed in the pattern line
                 tiles_to_place = min(space_left, tile_count)
 
-                if existing_tiles == 0 or (pattern_line[0] is not None and pattern_line[0].color == tile_color):
+                if existing_tiles == 0 or line_color == tile_color:
                     # Place as many tiles as possible into the pattern line
-                    for i in range(existing_tiles, existing_tiles + tiles_to_place):
-                        pattern_line[i] = Tile(tile_color)
+                    self.pattern_lines[pattern_line_index] = (tile_color, existing_tiles + tiles_to_place)
+                    self.placed_tile_count += tiles_to_place
                     # Any excess tiles go to the floor line
                     excess_tiles = tile_count - tiles_to_place
-                    if excess_tiles == 0:
-                        pass
-                        # No excess tiles, nothing to do, possible fitness implementation when the row is filled
-
                     if excess_tiles > 0:
-                        self.add_tiles_to_floor_line([Tile(tile_color)] * excess_tiles)
+                        self.add_tiles_to_floor_line(tile_color, excess_tiles)
                 else:
-                    # If the pattern line has tiles of a different color, use the new method to add all tiles to the floor line
-                    self.add_tiles_to_floor_line([Tile(tile_color)] * tile_count)
+                    # If the pattern line has tiles of a different color, all tiles go to the floor line
+                    self.add_tiles_to_floor_line(tile_color, tile_count)
         else:
-            self.add_tiles_to_floor_line([Tile(tile_color)] * tile_count)
-
-            
+            self.add_tiles_to_floor_line(tile_color, tile_count)
 
     def is_color_on_wall(self, tile_color, pattern_line_index):
         """
         Check if a tile of the specified color is already on the wall in the row
         corresponding to the pattern line index.
         """
-        # This method assumes the wall_pattern defines the placement rules for tiles
-        # and that self.wall[row][col] is None if no tile is placed at that position.
-        color_position = self.wall_pattern[pattern_line_index].index(tile_color)
-        return self.wall[pattern_line_index][color_position] is not None
+        return self.wall & wall_bit(pattern_line_index, WALL_COLUMN[tile_color][pattern_line_index]) != 0
+
+    def can_place_in_pattern_line(self, tile_color, pattern_line_index):
+        """
+        Check if tiles of the given color can go into the pattern line without being
+        redirected to the floor line: the line is not full, holds no other color, and
+        the color is not yet on the wall in that row.
+        """
+        line_color, count = self.pattern_lines[pattern_line_index]
+        if count == 0:
+            return not self.is_color_on_wall(tile_color, pattern_line_index)
+        return line_color == tile_color and count <= pattern_line_index
+
+    def legal_pattern_lines(self, tile_color):
+        """Return the indices of the pattern lines that can take tiles of the given color."""
+        return [index for index in range(5) if self.can_place_in_pattern_line(tile_color, index)]
+
+    def has_tile_on_wall(self, row, column):
+        return self.wall & wall_bit(row, column) != 0
 
     def place_starting_player_tile_on_floor_line(self):
         """Place the starting player tile on the floor line."""
-        self.floor_line.append(StartingPlayerTile())
+        self.has_starting_marker = True
+
+    def floor_line_length(self):
+        """Number of occupied floor line slots, including the starting player tile."""
+        return self.floor_line_count + self.has_starting_marker
 
     def print_board(self):
         self.print_pattern_lines()
@@ -82,163 +137,105 @@ class PlayerBoard:
 
     def print_pattern_lines(self):
         print("Pattern Lines:")
-        for index, line in enumerate(self.pattern_lines):
+        for index, (color, count) in enumerate(self.pattern_lines):
             # Represent each tile or empty space in the pattern line
-            line_representation = [tile.name if tile is not None else 'None' for tile in line[:index+1]]
+            line_representation = [color.value if color is not None else 'None'] * count + ['None'] * (index + 1 - count)
             print(f"Line {index + 1}: {line_representation}")
 
     def print_wall(self):
         print("Wall:")
-        for row in self.wall:
+        for row in range(5):
             # Represent each tile or empty space on the wall
-            row_representation = [tile.name if tile is not None else 'None' for tile in row]
+            row_representation = [self.wall_pattern[row][column].value if self.has_tile_on_wall(row, column) else 'None' for column in range(5)]
             print(row_representation)
 
     def print_floor_line(self):
         print("Floor Line:")
-        # Represent tiles in the floor line
-        floor_line_representation = [tile.name for tile in self.floor_line]
+        floor_line_representation = ["starting player tile"] * self.has_starting_marker + ["tile"] * self.floor_line_count
         print(floor_line_representation or 'Empty')
 
+    def add_tiles_to_floor_line(self, tile_color, tile_count):
+        """
+        Add tiles to the floor line, respecting the maximum capacity of 7 slots.
 
+        Only the number of floor tiles matters for scoring, so the tiles themselves go
+        straight to the box lid, where they would end up at the end of the round anyway.
 
-    # Additional methods for scoring, handling the floor line, etc., can be added here.
-        
-    def add_tiles_to_floor_line(self, tiles):
+        :param tile_color: The color of the tiles being added.
+        :param tile_count: The number of tiles being added.
         """
-        Add tiles to the floor line, respecting the maximum capacity of 7 tiles.
-        Excess tiles are added to the box lid.
-        
-        :param tiles: A list of Tile objects to be added to the floor line.
-        """
-        max_capacity = 7
-        # Calculate available space on the floor line
-        available_space = max_capacity - len(self.floor_line)
-
+        available_space = FLOOR_LINE_CAPACITY - self.floor_line_length()
         if available_space > 0:
-            # If there's space, add tiles up to the available space
-            tiles_to_add = tiles[:available_space]
-            self.floor_line.extend(tiles_to_add)
-            excess_tiles = tiles[available_space:]
-        else:
-            # If no space is available, all tiles are considered excess
-            excess_tiles = tiles
-
-        # Add any excess tiles to the box lid
-        if excess_tiles:
-            self.box_lid.add_tiles(excess_tiles)
-
-
+            self.floor_line_count += min(available_space, tile_count)
+        self.box_lid.add_tiles(tile_color, tile_count)
 
     def move_tiles_to_wall_and_score(self):
         """
         Move tiles from completed pattern lines to the wall, score points, and move remaining tiles to the box lid.
         """
         score = 0
-        for row_index, pattern_line in enumerate(self.pattern_lines):
+        for row_index, (tile_color, count) in enumerate(self.pattern_lines):
             # Identify completed pattern lines
-            if None not in pattern_line[:row_index + 1]:
-                # Assume the tile color is the same for all in the line, take the first one
-                tile_color = pattern_line[0].color if pattern_line[0] is not None else None
-                
-                if tile_color is not None:
-                    # Find the correct position on the wall based on the color pattern
-                    column_index = self.wall_pattern[row_index].index(tile_color)
-                    
-                    # Move one tile to the wall
-                    if self.wall[row_index][column_index] is None:  # Ensure the spot is empty
-                        self.wall[row_index][column_index] = Tile(tile_color)
-                        # Calculate score for this move
-                        score_to_add = self.calculate_score_for_tile(row_index, column_index)
-                        score += score_to_add
-                    
-                    # Move the remaining tiles in the completed line to the box lid
-                    excess_tiles = [tile for tile in pattern_line if tile is not None][1:]  # Skip the first tile which was moved to the wall
-                    if excess_tiles:
-                        self.box_lid.add_tiles(excess_tiles)
-                
+            if count == row_index + 1:
+                # Find the correct position on the wall based on the color pattern
+                column_index = WALL_COLUMN[tile_color][row_index]
+
+                # Move one tile to the wall
+                self.placed_tile_count -= count
+                if not self.has_tile_on_wall(row_index, column_index):  # Ensure the spot is empty
+                    self.wall |= wall_bit(row_index, column_index)
+                    self.placed_tile_count += 1
+                    # Calculate score for this move
+                    score += self.calculate_score_for_tile(row_index, column_index)
+
+                # Move the remaining tiles in the completed line to the box lid
+                if count > 1:
+                    self.box_lid.add_tiles(tile_color, count - 1)
+
                 # Clear the pattern line after moving tiles to the wall and box lid
-                self.pattern_lines[row_index] = [None] * 5
+                self.pattern_lines[row_index] = EMPTY_PATTERN_LINE
 
-        # Score the floor line and clear it
+        # Score the floor line and clear it, its tiles are already in the box lid
         score += self.score_floor_line()
-        tiles_to_box_lid = [tile for tile in self.floor_line if not isinstance(tile, StartingPlayerTile)]
-        self.box_lid.add_tiles(tiles_to_box_lid)
-        self.floor_line = []
+        self.floor_line_count = 0
+        self.has_starting_marker = False
 
         # Return the total score for this round
         return score
-    
+
     def calculate_score_for_tile(self, row, column):
         """
         Calculate the score for placing a tile on the wall, considering adjacent tiles.
         """
-        score = 1  # Base score for placing a tile
-        
-        # Check horizontally
-        row_score = 1  # Start with 1 for the placed tile
-        # Check left
-        moving_col = column - 1
-        while moving_col >= 0 and self.wall[row][moving_col] is not None:
-            row_score += 1
-            moving_col -= 1
-        # Check right
-        moving_col = column + 1
-        while moving_col < 5 and self.wall[row][moving_col] is not None:
-            row_score += 1
-            moving_col += 1
-        if row_score > 1:  # If there are adjacent tiles horizontally, add to score
-            score += row_score - 1  # Subtract 1 because the tile itself was counted twice
-        
-        # Check vertically
-        column_score = 1  # Start with 1 for the placed tile
-        # Check up
-        moving_row = row - 1
-        while moving_row >= 0 and self.wall[moving_row][column] is not None:
-            column_score += 1
-            moving_row -= 1
-        # Check down
-        moving_row = row + 1
-        while moving_row < 5 and self.wall[moving_row][column] is not None:
-            column_score += 1
-            moving_row += 1
-        if column_score > 1:  # If there are adjacent tiles vertically, add to score
-            score += column_score - 1  # Subtract 1 for the same reason
-        
-        return score
-    
+        return PLACEMENT_SCORE[placement_index(row, column, row_bits(self.wall, row), column_bits(self.wall, column))]
+
     def score_floor_line(self):
-        penalties = [1, 1, 2, 2, 2, 3, 3]  # Base penalties for the first 7 tiles
-        score = -sum(penalties[:len(self.floor_line)])  # Calculate penalties for up to the first 7 tiles
-        if len(self.floor_line) > 7:  # For more than 7 tiles, each additional tile incurs -3 points
-            score -= (len(self.floor_line) - 7) * 3
-        return score
-    
+        return FLOOR_SCORE_BY_LENGTH[self.floor_line_length()]
+
     def has_starting_player_tile(self):
         """Check if this player board has the starting player tile on the floor line."""
-        return any(isinstance(tile, StartingPlayerTile) for tile in self.floor_line)
-    
+        return self.has_starting_marker
+
     def has_completed_row_on_wall(self):
-        for row in self.wall:
-            if None not in row:
-                return True
-        return False
-    
+        return completed_rows_mask(self.wall) != 0
+
     def count_placed_tiles(self):
-        """Count the number of tiles placed on the pattern lines and wall."""
-        wall_tiles_count = sum(tile is not None for row in self.wall for tile in row)
-        pattern_lines_tiles_count = sum(tile is not None for line in self.pattern_lines for tile in line)
-        floor_line_tiles_count = len([tile for tile in self.floor_line if not isinstance(tile, StartingPlayerTile)])
-
-        # Sum the counts from the wall and pattern lines
-        total_placed_tiles = wall_tiles_count + pattern_lines_tiles_count + floor_line_tiles_count
-        return total_placed_tiles
-    
+        """Return the number of tiles on the pattern lines and wall. Floor line tiles are held by the box lid."""
+        return self.placed_tile_count
+
+    def recount_placed_tiles(self):
+        """Count the placed tiles from the wall and pattern lines, ignoring the running count."""
+        wall_tiles_count = popcount(self.wall)
+        pattern_lines_tiles_count = sum(count for _, count in self.pattern_lines)
+        return wall_tiles_count + pattern_lines_tiles_count
+
     def reset_board(self):
         """Reset the player board to the initial state."""
-        self.pattern_lines = [[None, None, None, None, None] for _ in range(5)]
-        self.wall = [[None for _ in range(5)] for _ in range(5)]
-        self.floor_line = []
+        self.pattern_lines = [EMPTY_PATTERN_LINE] * 5
+        self.wall = 0
+        self.floor_line_count = 0
+        self.has_starting_marker = False
+        self.placed_tile_count = 0
 
     def score_end_game_points(self):
         """
@@ -247,39 +244,24 @@ class PlayerBoard:
         completed_rows_score = self.calculate_completed_rows_score()
         completed_columns_score = self.calculate_completed_columns_score()
         completed_color_sets_score = self.calculate_completed_color_sets_score()
-        
+
         total_end_game_score = completed_rows_score + completed_columns_score + completed_color_sets_score
         return total_end_game_score
-    
+
     def calculate_completed_rows_score(self):
         """
         Calculate the score for completed rows.
         """
-        completed_rows_score = 0
-        for row in self.wall:
-            if None not in row:
-                completed_rows_score += 2  # Each completed row scores 2 points
-        return completed_rows_score
-    
+        return popcount(completed_rows_mask(self.wall)) * ROW_BONUS
+
     def calculate_completed_columns_score(self):
         """
         Calculate the score for completed columns.
         """
-        completed_columns_score = 0
-        for col in range(5):
-            if all(self.wall[row][col] is not None for row in range(5)):
-                completed_columns_score += 7  # Each completed column scores 7 points
-        return completed_columns_score
-    
+        return popcount(completed_columns_mask(self.wall)) * COLUMN_BONUS
+
     def calculate_completed_color_sets_score(self):
         """
         Calculate the score for completed sets of all five colors.
         """
-        color_counts = {color: 0 for color in TileColor}
-        for row in self.wall:
-            for tile in row:
-                if tile is not None:
-                    color_counts[tile.color] += 1
-        
-        completed_color_sets_score = sum(10 for count in color_counts.values() if count == 5)
-        return completed_color_sets_score
\ No newline at end of file
+        return completed_color_count(self.wall) * COLOR_BONUS
@@ -1,20 +1,28 @@
-import random
-from model.starting_player_tile import StartingPlayerTile
 from model.player import Player
+from model.player_board import FLOOR_LINE_INDEX
 
 class RandomPlayer(Player):
+    def __init__(self, name, rng=None):
+        """
+        :param rng: Optional random.Random to choose moves with. Without one, the player uses its
+                    seat's stream of the game seed (State.player_rngs), so games replay from the seed alone.
+        """
+        super().__init__(name)
+        self.rng = rng
+
     def make_decision(self, state):
-        factory_index = self.select_factory(state)
+        rng = self.rng if self.rng is not None else state.player_rngs[state.players.index(self)]
+        factory_index = self.select_factory(state, rng)
         selected_factory = state.central_factory if factory_index == -1 else state.factories[factory_index]
-        selected_color = self.select_color(selected_factory)
-        pattern_line_index = self.select_pattern_line()
+        selected_color = self.select_color(selected_factory, rng)
+        pattern_line_index = self.select_pattern_line(state, selected_color, rng)
 
         return factory_index, selected_color, pattern_line_index
 
-    def select_factory(self, state):
+    def select_factory(self, state, rng):
         # Filter out empty factories and the central factory if it only has the starting player tile
-        valid_factories = [i for i, factory in enumerate(state.factories, start=1) if factory.tiles]
-        if any(not isinstance(tile, StartingPlayerTile) for tile in state.central_factory.tiles):
+        valid_factories = [i for i, factory in enumerate(state.factories, start=1) if not factory.is_empty()]
+        if not state.central_factory.is_empty():
             valid_factories.append(0)  # Adding '0' to represent the central factory
 
         if not valid_factories:
@@ -22,19 +30,21 @@ class RandomPlayer(Player):
             return None
 
         # Randomly choose a factory from valid options
-        return random.choice(valid_factories) - 1  # Adjust by -1 to align with list indexing
+        return rng.choice(valid_factories) - 1  # Adjust by -1 to align with list indexing
+
+    def select_color(self, selected_factory, rng):
+        available_colors = selected_factory.available_colors()
 
-    def select_color(self, selected_factory):
-        # Exclude the StartingPlayerTile from selectable colors
-        available_colors = {tile.color for tile in selected_factory.tiles if not isinstance(tile, StartingPlayerTile)}
-        
         if not available_colors:
             print("No valid colors to select from in the chosen factory.")
             return None
 
         # Randomly choose a color from available options
-        return random.choice(list(available_colors))
-
-    def select_pattern_line(self):
-        # Randomly choose a pattern line index (0-4 for lines 1-5)
-        return random.randint(0, 4)
\ No newline at end of file
+        return rng.choice(available_colors)
+
+    def select_pattern_line(self, state, selected_color, rng):
+        # Randomly choose a pattern line (0-4 for lines 1-5) that can take the color
+        legal_pattern_lines = self.board.legal_pattern_lines(selected_color)
+        if not legal_pattern_lines:
+            return FLOOR_LINE_INDEX  # Nowhere to put the tiles but the floor line
+        return rng.choice(legal_pattern_lines)
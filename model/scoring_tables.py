@@ -0,0 +1,83 @@
+"""
+Lookup tables for scoring on the 25-bit wall used by PlayerBoard, where bit row * 5 + column
+is set when that cell holds a tile.
+
+All tables are a few thousand small integers, built once at import, so every process that
+imports this module has its own copy at a negligible one-time cost.
+"""
+
+ROW_BITS = 0b11111
+# Bit 0 of every row, i.e. the cells of column 0
+COLUMN_SPREAD = sum(1 << (row * 5) for row in range(5))
+# Multiplying the spread column bits by this moves row r's bit to bit 20 + r, without any carries
+COLUMN_GATHER = sum(1 << (4 * shift) for shift in range(1, 6))
+
+ROW_MASKS = [ROW_BITS << (row * 5) for row in range(5)]
+COLUMN_MASKS = [COLUMN_SPREAD << column for column in range(5)]
+# Color index c (TileColor order) sits in column (c + row) % 5 of each row
+COLOR_MASKS = [sum(1 << (row * 5 + (color + row) % 5) for row in range(5)) for color in range(5)]
+
+
+def row_bits(wall, row):
+    """Return the 5-bit mask of a wall row, bit i being column i."""
+    return (wall >> (row * 5)) & ROW_BITS
+
+
+def column_bits(wall, column):
+    """Return the 5-bit mask of a wall column, bit i being row i."""
+    return ((((wall >> column) & COLUMN_SPREAD) * COLUMN_GATHER) >> 20) & ROW_BITS
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def _run_length(line_bits, position):
+    """Length of the run of set bits through position, counting position itself as set."""
+    length = 1
+    index = position - 1
+    while index >= 0 and line_bits >> index & 1:
+        length += 1
+        index -= 1
+    index = position + 1
+    while index < 5 and line_bits >> index & 1:
+        length += 1
+        index += 1
+    return length
+
+
+# RUN_LENGTH[line_bits][position]: tiles in the horizontal or vertical run through position
+RUN_LENGTH = [[_run_length(line_bits, position) for position in range(5)] for line_bits in range(32)]
+
+# PLACEMENT_SCORE[placement_index(row, column, row_bits, column_bits)]: points for a tile placed at
+# (row, column) given the row and column masks, which may or may not include the tile itself.
+# The tile scores its horizontal run plus its vertical run, counting itself once.
+PLACEMENT_SCORE = [
+    RUN_LENGTH[line_row_bits][cell % 5] + RUN_LENGTH[line_column_bits][cell // 5] - 1
+    for cell in range(25)
+    for line_row_bits in range(32)
+    for line_column_bits in range(32)
+]
+
+
+def placement_index(row, column, line_row_bits, line_column_bits):
+    return ((row * 5 + column) << 10) | (line_row_bits << 5) | line_column_bits
+
+
+def placement_score(wall, row, column):
+    """Points for placing a tile at (row, column) on the given wall."""
+    return PLACEMENT_SCORE[placement_index(row, column, row_bits(wall, row), column_bits(wall, column))]
+
+
+def completed_rows_mask(wall):
+    """Return a mask with bit row * 5 set for every completed row."""
+    return wall & (wall >> 1) & (wall >> 2) & (wall >> 3) & (wall >> 4) & COLUMN_SPREAD
+
+
+def completed_columns_mask(wall):
+    """Return a mask with bit column set for every completed column."""
+    return wall & (wall >> 5) & (wall >> 10) & (wall >> 15) & (wall >> 20) & ROW_BITS
+
+
+def completed_color_count(wall):
+    return sum(1 for mask in COLOR_MASKS if wall & mask == mask)
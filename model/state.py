@@ -1,11 +1,22 @@
 from model.box_lid import BoxLid
 from model.tile_bag import TileBag
 from model.central_factory import CentralFactory
-from model.player_board import PlayerBoard
+from model.player_board import PlayerBoard, FLOOR_LINE_INDEX
 from model.factory import Factory
+from model.player import Player
+from model import zobrist
+from seeding import TILE_BAG_STREAM, SEAT_STREAMS, new_seed, stream_rng
+import random
+
+CENTRAL_FACTORY_INDEX = -1  # Factory index that selects the central factory in a move
 
 class State:
-    def __init__(self, player1, player2):
+    def __init__(self, player1, player2, seed=None):
+        """
+        :param seed: 64-bit game seed. The tile bag and each seat draw from their own stream of it
+                     (see seeding), so a game is reproduced by its seed. A fresh seed is drawn if omitted.
+        """
+        self.seed = seed if seed is not None else new_seed()
         self.player1 = player1
         self.player2 = player2
         self.factories = [Factory() for _ in range(5)]
@@ -13,8 +24,181 @@ class State:
         self.box_lid = BoxLid()
         self.player1.board = PlayerBoard(self.box_lid)
         self.player2.board = PlayerBoard(self.box_lid)
-        self.tile_bag = TileBag(self.box_lid)
+        self.player1.score = 0
+        self.player2.score = 0
+        self.tile_bag = TileBag(self.box_lid, stream_rng(self.seed, TILE_BAG_STREAM))
+        # Random generator per seat, for players that do not bring their own
+        self.player_rngs = [stream_rng(self.seed, stream) for stream in SEAT_STREAMS]
         self.current_player = player1
         self.round_number = 1
         self.players = [player1, player2]
         self.game_over = False
+        self.zobrist_hash = zobrist.compute_hash(self)
+
+    def update_hash(self):
+        """
+        Recompute the Zobrist hash from scratch. Moves keep the hash up to date themselves,
+        anything else that changes the state (round scoring, refills) must call this afterwards.
+        """
+        self.zobrist_hash = zobrist.compute_hash(self)
+
+    def snapshot(self):
+        """
+        Capture the position as plain tuples, dictionaries and numbers, to hand to restore() or clone().
+
+        A snapshot shares nothing with the state and is never changed by restore(), so it can be
+        restored any number of times, kept while the game goes on, or pickled to another process.
+        Random generators are not part of the position and are left out.
+        """
+        return (
+            tuple(dict(factory.tile_counts) for factory in self.factories),
+            dict(self.central_factory.tile_counts),
+            self.central_factory.starting_player_marker_taken,
+            dict(self.tile_bag.tile_counts),
+            dict(self.box_lid.tile_counts),
+            tuple((tuple(player.board.pattern_lines), player.board.wall, player.board.floor_line_count,
+                   player.board.has_starting_marker, player.board.placed_tile_count, player.score)
+                  for player in self.players),
+            0 if self.current_player is self.player1 else 1,
+            self.round_number,
+            self.game_over,
+            self.zobrist_hash,
+        )
+
+    def restore(self, snapshot):
+        """Put the state back to a snapshot, in place. The players keep their identity, only their boards and scores change."""
+        (factory_counts, central_counts, marker_taken, tile_bag_counts, box_lid_counts,
+         players, current_player_index, round_number, game_over, zobrist_hash) = snapshot
+        for factory, tile_counts in zip(self.factories, factory_counts):
+            factory.set_tile_counts(dict(tile_counts))
+        self.central_factory.set_tile_counts(dict(central_counts))
+        self.central_factory.starting_player_marker_taken = marker_taken
+        self.tile_bag.set_tile_counts(dict(tile_bag_counts))
+        self.box_lid.set_tile_counts(dict(box_lid_counts))
+        for player, (pattern_lines, wall, floor_line_count, has_starting_marker, placed_tile_count, score) in zip(self.players, players):
+            board = player.board
+            board.pattern_lines = list(pattern_lines)
+            board.wall = wall
+            board.floor_line_count = floor_line_count
+            board.has_starting_marker = has_starting_marker
+            board.placed_tile_count = placed_tile_count
+            player.score = score
+        self.current_player = self.players[current_player_index]
+        self.round_number = round_number
+        self.game_over = game_over
+        self.zobrist_hash = zobrist_hash
+
+    def clone(self, rng=None):
+        """
+        Return an independent copy of the position, without deepcopy. The copy's players are plain
+        Player objects with the same names, so agents and their search state are not copied.
+
+        The copy draws from its own random generator, shared by its tile bag and both seats, so using
+        it never advances this game's streams and tells nothing about its future draws.
+
+        :param rng: Optional random.Random for the copy. Defaults to one seeded from the game seed
+                    and the position, so clones of the same position draw alike.
+        """
+        state = State.__new__(State)
+        state.seed = self.seed
+        state.player1 = Player(self.player1.name)
+        state.player2 = Player(self.player2.name)
+        state.players = [state.player1, state.player2]
+        state.factories = [Factory() for _ in range(5)]
+        state.central_factory = CentralFactory()
+        state.box_lid = BoxLid()
+        state.player1.board = PlayerBoard(state.box_lid)
+        state.player2.board = PlayerBoard(state.box_lid)
+        rng = rng if rng is not None else random.Random(self.seed ^ self.zobrist_hash)
+        state.tile_bag = TileBag(state.box_lid, rng)
+        state.player_rngs = [rng, rng]
+        state.restore(self.snapshot())
+        return state
+
+    def get_factory(self, factory_index):
+        """Return the factory for a move's factory index, -1 being the central factory."""
+        return self.central_factory if factory_index == CENTRAL_FACTORY_INDEX else self.factories[factory_index]
+
+    def is_round_over(self):
+        """The round ends once every factory and the central factory are out of colored tiles."""
+        return all(factory.is_empty() for factory in self.factories) and self.central_factory.is_empty()
+
+    def get_legal_moves(self):
+        """
+        List every legal move for the current player as (factory_index, color, pattern_line_index)
+        tuples, the same triple make_decision returns. factory_index -1 is the central factory and
+        pattern_line_index 5 is the floor line, which is always a legal destination.
+        """
+        board = self.current_player.board
+        moves = []
+        sources = [(index, factory) for index, factory in enumerate(self.factories)]
+        sources.append((CENTRAL_FACTORY_INDEX, self.central_factory))
+        for factory_index, factory in sources:
+            for color in factory.available_colors():
+                for pattern_line_index in board.legal_pattern_lines(color):
+                    moves.append((factory_index, color, pattern_line_index))
+                moves.append((factory_index, color, FLOOR_LINE_INDEX))
+        return moves
+
+    def apply_move(self, move):
+        """
+        Apply a move for the current player in place and pass the turn, following the same rules as
+        GameEngine.play_turn. Returns an undo record to hand to undo_move.
+        """
+        factory_index, selected_color, pattern_line_index = move
+        player = self.current_player
+        board = player.board
+        selected_factory = self.get_factory(factory_index)
+        player_index = 0 if player is self.player1 else 1
+        source = zobrist.CENTRAL_SOURCE if factory_index == CENTRAL_FACTORY_INDEX else factory_index
+        previous_hash = self.zobrist_hash
+        footprint_before = zobrist.move_footprint_hash(self, source, player_index, selected_color, pattern_line_index)
+
+        # Everything the move can touch, so undo_move can put it back without copying the state
+        undo = (
+            player,
+            selected_factory,
+            dict(selected_factory.tile_counts),
+            dict(self.central_factory.tile_counts),
+            self.central_factory.starting_player_marker_taken,
+            selected_color,
+            self.box_lid.tile_counts[selected_color],
+            pattern_line_index,
+            board.pattern_lines[pattern_line_index] if pattern_line_index < 5 else None,
+            board.floor_line_count,
+            board.has_starting_marker,
+            previous_hash,
+        )
+
+        if selected_factory.has_starting_player_tile():
+            selected_factory.take_starting_player_tile()
+            board.place_starting_player_tile_on_floor_line()
+
+        selected_tile_count = selected_factory.remove_and_return_tiles_of_color(selected_color)
+        self.central_factory.add_tiles(selected_factory.get_and_clear_remaining_tiles())
+        player.place_tile_in_pattern_line(selected_color, pattern_line_index, selected_tile_count)
+
+        self.current_player = self.player1 if player == self.player2 else self.player2
+        footprint_after = zobrist.move_footprint_hash(self, source, player_index, selected_color, pattern_line_index)
+        self.zobrist_hash = previous_hash ^ footprint_before ^ footprint_after ^ zobrist.SIDE_TO_MOVE_KEY
+        return undo
+
+    def undo_move(self, undo):
+        """Revert the move that returned the given undo record. Moves must be undone in reverse order."""
+        (player, selected_factory, selected_factory_counts, central_factory_counts, marker_taken,
+         selected_color, box_lid_color_count, pattern_line_index, pattern_line, floor_line_count, has_starting_marker,
+         previous_hash) = undo
+        board = player.board
+
+        selected_factory.set_tile_counts(selected_factory_counts)
+        self.central_factory.set_tile_counts(central_factory_counts)
+        self.central_factory.starting_player_marker_taken = marker_taken
+        self.box_lid.set_color_count(selected_color, box_lid_color_count)
+        if pattern_line is not None:
+            board.placed_tile_count -= board.pattern_lines[pattern_line_index][1] - pattern_line[1]
+            board.pattern_lines[pattern_line_index] = pattern_line
+        board.floor_line_count = floor_line_count
+        board.has_starting_marker = has_starting_marker
+
+        self.current_player = player
+        self.zobrist_hash = previous_hash
@@ -1,33 +1,73 @@
-from enums.tile_color import TileColor
-from model.tile import Tile
-from model.box_lid import BoxLid
+from enums.tile_color import TILE_COLORS
 import random
 
 class TileBag:
-    def __init__(self, box_lid):
+    def __init__(self, box_lid, rng=None):
+        """
+        :param rng: random.Random the draws are sampled with. Defaults to the global random module.
+        """
         # Initialize the bag with 20 tiles of each color, using the TileColor enum
-        self.tiles = [Tile(color) for color in TileColor for _ in range(20)]
-        random.shuffle(self.tiles)
+        self.tile_counts = dict.fromkeys(TILE_COLORS, 20)
+        self.tile_total = 100  # Running sum of tile_counts
         self.box_lid = box_lid
+        self.rng = rng if rng is not None else random
 
-    def draw_tiles(self, number):
-        """Draw a specified number of tiles from the bag. Refill from the box lid if empty."""
-        if len(self.tiles) < number:  # Check if there are not enough tiles
-            if not self.box_lid.tiles:
+    def tile_count(self):
+        return self.tile_total
+
+    def recount_tiles(self):
+        """Count the tiles from tile_counts, ignoring the running total."""
+        return sum(self.tile_counts.values())
+
+    def set_tile_counts(self, tile_counts):
+        self.tile_counts = tile_counts
+        self.tile_total = sum(tile_counts.values())
+
+    def draw_tiles(self, number, tile_counts=None):
+        """
+        Draw a specified number of tiles from the bag. Refill from the box lid if empty.
+
+        Tiles are drawn one at a time with probability proportional to the remaining count
+        of each color, which is the same distribution as drawing from a shuffled bag.
+
+        :param tile_counts: Optional tiles to take instead of sampling, e.g. to replay a recorded draw.
+        :return: A dictionary mapping each TileColor to the number of drawn tiles.
+        """
+        remaining = self.tile_count()
+        if remaining < number:  # Check if there are not enough tiles
+            if not self.box_lid.tile_count():
                 # This scenario implies the game might be in a state where no tiles are available to draw
                 # which could be a condition to check for game end or a specific game state
-                # print("Tiles in game: ", self.game_engine.count_tiles_in_game())
                 raise ValueError("Not enough tiles available in the tile bag and the box lid is empty.")
-                return []
 
             # Refill the tile bag from the box lid if the tile bag is empty or has fewer tiles than needed
             self.box_lid.empty_into_tile_bag(self)
-            random.shuffle(self.tiles)  # Ensure the tiles are shuffled
+            remaining = self.tile_count()
+
+        if tile_counts is not None:
+            for color, count in tile_counts.items():
+                if count > self.tile_counts[color]:
+                    raise ValueError(f"Not enough {color.name} tiles in the tile bag for the requested draw.")
+                self.tile_counts[color] -= count
+                self.tile_total -= count
+            return dict(tile_counts)
 
-        drawn_tiles = self.tiles[:number]
-        self.tiles = self.tiles[number:]
+        rng = self.rng
+        drawn_tiles = dict.fromkeys(TILE_COLORS, 0)
+        for _ in range(min(number, remaining)):
+            pick = rng.randrange(remaining)
+            for color, count in self.tile_counts.items():
+                if pick < count:
+                    break
+                pick -= count
+            self.tile_counts[color] -= 1
+            drawn_tiles[color] += 1
+            remaining -= 1
+        self.tile_total = remaining
         return drawn_tiles
 
-    def add_tiles(self, tiles):
+    def add_tiles(self, tile_counts):
         """Add tiles back to the bag, typically from the box lid."""
-        self.tiles.extend(tiles)
\ No newline at end of file
+        for color, count in tile_counts.items():
+            self.tile_counts[color] += count
+            self.tile_total += count
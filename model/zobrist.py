@@ -0,0 +1,119 @@
+"""
+Zobrist keys for State.
+
+Every feature of a position (a count of tiles of one color in one place, a wall cell, a floor
+line length, a score, the side to move) has a random 64-bit key, and the hash of a position is
+the XOR of the keys of its features. Changing a feature XORs its old key out and its new key in.
+"""
+import random
+
+from enums.tile_color import TileColor
+
+MAX_COLOR_COUNT = 20  # There are 20 tiles of each color, so no container holds more than that
+SOURCE_COUNT = 6  # The five factories, then the central factory
+CENTRAL_SOURCE = 5
+FLOOR_LINE_SLOTS = 8  # Up to 7 tiles, plus the starting player tile which skips the capacity check
+
+_rng = random.Random(0x5A0B1)
+
+
+def _keys(count):
+    return [_rng.getrandbits(64) for _ in range(count)]
+
+
+def _color_count_keys():
+    # The key of a zero count is 0, so empty places cost nothing to hash
+    return {color: [0] + _keys(MAX_COLOR_COUNT) for color in TileColor}
+
+
+FACTORY_KEYS = [_color_count_keys() for _ in range(SOURCE_COUNT)]
+TILE_BAG_KEYS = _color_count_keys()
+BOX_LID_KEYS = _color_count_keys()
+CENTER_MARKER_KEY = _rng.getrandbits(64)
+
+# Per player
+PATTERN_LINE_KEYS = [[{color: [0] + _keys(row + 1) for color in TileColor} for row in range(5)] for _ in range(2)]
+WALL_KEYS = [_keys(25) for _ in range(2)]
+FLOOR_LINE_KEYS = [[0] + _keys(FLOOR_LINE_SLOTS) for _ in range(2)]
+STARTING_MARKER_KEYS = _keys(2)
+SCORE_SEEDS = _keys(2)
+
+SIDE_TO_MOVE_KEY = _rng.getrandbits(64)  # XORed in while the second player is to move
+
+MASK_64 = (1 << 64) - 1
+
+
+def score_key(player_index, score):
+    """Scores are unbounded, so their keys come from a 64-bit mix (splitmix64) instead of a table."""
+    value = (SCORE_SEEDS[player_index] + (score & MASK_64) * 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+def counts_hash(keys, tile_counts):
+    value = 0
+    for color, count in tile_counts.items():
+        value ^= keys[color][count]
+    return value
+
+
+def pattern_line_hash(player_index, row, pattern_line):
+    color, count = pattern_line
+    return PATTERN_LINE_KEYS[player_index][row][color][count] if count else 0
+
+
+def floor_line_hash(player_index, board):
+    value = FLOOR_LINE_KEYS[player_index][board.floor_line_count]
+    if board.has_starting_marker:
+        value ^= STARTING_MARKER_KEYS[player_index]
+    return value
+
+
+def board_hash(player_index, board):
+    value = floor_line_hash(player_index, board)
+    for row, pattern_line in enumerate(board.pattern_lines):
+        value ^= pattern_line_hash(player_index, row, pattern_line)
+    wall = board.wall
+    wall_keys = WALL_KEYS[player_index]
+    while wall:
+        lowest_bit = wall & -wall
+        value ^= wall_keys[lowest_bit.bit_length() - 1]
+        wall ^= lowest_bit
+    return value
+
+
+def move_footprint_hash(state, source, player_index, tile_color, pattern_line_index):
+    """
+    Hash of every feature a move can change, apart from the side to move. XORing it out before
+    a move and back in afterwards updates the state hash for that move.
+    """
+    central_factory = state.central_factory
+    value = counts_hash(FACTORY_KEYS[CENTRAL_SOURCE], central_factory.tile_counts)
+    if source != CENTRAL_SOURCE:
+        value ^= counts_hash(FACTORY_KEYS[source], state.factories[source].tile_counts)
+    if central_factory.has_starting_player_tile():
+        value ^= CENTER_MARKER_KEY
+    value ^= BOX_LID_KEYS[tile_color][state.box_lid.tile_counts[tile_color]]
+    board = state.players[player_index].board
+    if pattern_line_index < 5:
+        value ^= pattern_line_hash(player_index, pattern_line_index, board.pattern_lines[pattern_line_index])
+    return value ^ floor_line_hash(player_index, board)
+
+
+def compute_hash(state):
+    """Hash a State from scratch."""
+    value = 0
+    for index, factory in enumerate(state.factories):
+        value ^= counts_hash(FACTORY_KEYS[index], factory.tile_counts)
+    value ^= counts_hash(FACTORY_KEYS[CENTRAL_SOURCE], state.central_factory.tile_counts)
+    if state.central_factory.has_starting_player_tile():
+        value ^= CENTER_MARKER_KEY
+    value ^= counts_hash(TILE_BAG_KEYS, state.tile_bag.tile_counts)
+    value ^= counts_hash(BOX_LID_KEYS, state.box_lid.tile_counts)
+    for player_index, player in enumerate(state.players):
+        value ^= board_hash(player_index, player.board)
+        value ^= score_key(player_index, player.score)
+    if state.current_player is state.player2:
+        value ^= SIDE_TO_MOVE_KEY
+    return value
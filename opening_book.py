@@ -0,0 +1,207 @@
+"""
+Opening book for the first move of the game.
+
+Every game opens with empty boards and five full factories, and the first move has the largest
+branching factor of the game, so searching it is where search players spend the most time.
+build_opening_book samples many factory fills the way GameEngine.setup_game draws them, ranks
+them by their exact probability, searches the most likely ones offline and writes the best moves
+to a book file. There are OPENING_COUNT = 16,108,764 distinct openings, so how often a game hits
+the book grows with its size: see opening_probability.
+
+Positions are keyed by a canonical encoding of the five factories: each factory is one of the 70
+possible sets of 4 tiles, and the order of the factories does not matter, so their codes are sorted
+and packed into one integer. Moves are stored as action ids (see action_space) whose source is the
+factory's place in that sorted order.
+
+The book is a NumPy .npy file of records sorted by key. OpeningBook maps it read-only and
+binary-searches it, so a lookup reads a few pages in O(log n) and the book is never loaded into RAM;
+every process mapping the same file shares one copy of it through the OS page cache.
+
+    python opening_book.py opening_book.npy --positions 1000 --time-limit 5
+    player = AlphaBetaPlayer("Player 1", opening_book=OpeningBook("opening_book.npy"))
+"""
+import argparse
+import functools
+import itertools
+import math
+import os
+import random
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from action_space import decode_action, encode_move
+from enums.tile_color import TILE_COLORS
+from game_engine import GameEngine
+from model.alpha_beta_player import AlphaBetaPlayer
+from model.box_lid import BoxLid
+from model.tile_bag import TileBag
+from seeding import derive_seed, new_seed
+
+FACTORY_COUNT = 5
+TILES_PER_FACTORY = 4
+# Every set of 4 tiles a factory can hold, as counts per color in TILE_COLORS order
+FACTORY_FILLS = [
+    counts for counts in itertools.product(range(TILES_PER_FACTORY + 1), repeat=len(TILE_COLORS))
+    if sum(counts) == TILES_PER_FACTORY
+]
+FACTORY_CODE = {counts: code for code, counts in enumerate(FACTORY_FILLS)}
+# Multisets of five factory fills, all of which a full bag can deal
+OPENING_COUNT = math.comb(len(FACTORY_FILLS) + FACTORY_COUNT - 1, FACTORY_COUNT)
+TILES_PER_COLOR = 20
+
+BOOK_DTYPE = np.dtype([("key", "<u4"), ("action", "u1"), ("value", "<f4")])
+
+
+def is_opening_position(state):
+    """True before the first move of the game: only then are all five factories full in the first round."""
+    return state.round_number == 1 and all(factory.tile_total == TILES_PER_FACTORY for factory in state.factories)
+
+
+def canonical_key(state):
+    """
+    Return (key, order): the book key of the factories, and the factory indices in canonical order,
+    so that canonical source i is factory order[i] of the state.
+    """
+    codes = [FACTORY_CODE[tuple(factory.tile_counts[color] for color in TILE_COLORS)] for factory in state.factories]
+    order = sorted(range(FACTORY_COUNT), key=codes.__getitem__)
+    key = 0
+    for index in order:
+        key = key * len(FACTORY_FILLS) + codes[index]
+    return key, order
+
+
+def key_factory_fills(key):
+    """Return the tiles per factory, in canonical order, that canonical_key maps to key."""
+    codes = []
+    for _ in range(FACTORY_COUNT):
+        key, code = divmod(key, len(FACTORY_FILLS))
+        codes.append(code)
+    return [dict(zip(TILE_COLORS, FACTORY_FILLS[code])) for code in reversed(codes)]
+
+
+class OpeningBook:
+    def __init__(self, path):
+        """Memory-map a book written by build_opening_book. Nothing is read until lookups touch it."""
+        self.path = path
+        self.entries = np.load(path, mmap_mode="r")
+        self.keys = self.entries["key"]  # A view of the mapping, binary-searched in place
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, key):
+        """Return the book record of a key, or None."""
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return None
+        return self.entries[index]
+
+    def lookup(self, state):
+        """Return the book move for the state, or None if the state is not a book position."""
+        if not is_opening_position(state):
+            return None
+        key, order = canonical_key(state)
+        entry = self.find(key)
+        if entry is None:
+            return None
+        source, color, pattern_line_index = decode_action(entry["action"])
+        return order[source], color, pattern_line_index
+
+    def coverage(self):
+        """Share of games whose first move is in the book. Reads the whole book."""
+        return sum(opening_probability(int(key)) for key in self.keys)
+
+
+def opening_probability(key):
+    """Probability that the first factory fill of a game has the canonical key, whatever the factory order."""
+    fills = [tuple(fill.values()) for fill in key_factory_fills(key)]
+    # Orderings of the five factories, times the tile orderings within each factory
+    probability = math.factorial(FACTORY_COUNT)
+    for fill in set(fills):
+        probability //= math.factorial(fills.count(fill))
+    for fill in fills:
+        probability *= math.factorial(TILES_PER_FACTORY)
+        for count in fill:
+            probability //= math.factorial(count)
+    # Times the probability of one sequence of the 20 tiles drawn from the full bag
+    for color_counts in zip(*fills):
+        probability *= math.perm(TILES_PER_COLOR, sum(color_counts))
+    return probability / math.perm(TILES_PER_COLOR * len(TILE_COLORS), FACTORY_COUNT * TILES_PER_FACTORY)
+
+
+def sample_opening_keys(sample_count, seed):
+    """Return the set of canonical keys of sample_count factory fills drawn like GameEngine.setup_game draws them."""
+    rng = random.Random(seed)
+    keys = set()
+    for _ in range(sample_count):
+        tile_bag = TileBag(BoxLid(), rng)
+        codes = sorted(FACTORY_CODE[tuple(tile_bag.draw_tiles(TILES_PER_FACTORY).values())] for _ in range(FACTORY_COUNT))
+        key = 0
+        for code in codes:
+            key = key * len(FACTORY_FILLS) + code
+        keys.add(key)
+    return keys
+
+
+def search_opening(key, player_factory, seed):
+    """
+    Search the opening position of a key and return its book record as (key, action, value).
+    Runs inside a worker process.
+    """
+    player = player_factory("Book")
+    state = GameEngine(print_enabled=False, visualize=False).setup_game(
+        player, player_factory("Opponent"), factory_fills=key_factory_fills(key), seed=seed)
+    move = player.make_decision(state)
+    # The factories are in canonical order, so the move's factory index is already its canonical source
+    return key, encode_move(move), getattr(player, "root_value", math.nan)
+
+
+def build_opening_book(path, player_factory=None, position_count=1000, sample_count=None, workers=None, seed=None):
+    """
+    Search the position_count most likely openings among sample_count sampled factory fills and
+    write them to a book at path. The file is replaced atomically, so processes that mapped the old
+    book keep reading it until they open the new one.
+
+    :param player_factory: Picklable callable taking a player name and returning the searching Player.
+                           Defaults to an AlphaBetaPlayer with 5 seconds per position.
+    :param sample_count: Fills sampled to rank the openings, 100 per position by default.
+    :param workers: Number of worker processes. Defaults to the CPU count; 1 searches in-process.
+    :param seed: Master seed of the sampling and of the searched games.
+    :return: The number of positions written.
+    """
+    if player_factory is None:
+        player_factory = functools.partial(AlphaBetaPlayer, time_limit=5.0)
+    seed = seed if seed is not None else new_seed()
+    sampled_keys = sample_opening_keys(sample_count if sample_count is not None else 100 * position_count, derive_seed(seed, 0))
+    keys = sorted(sampled_keys, key=lambda key: (-opening_probability(key), key))[:position_count]
+    seeds = [derive_seed(seed, index + 1) for index in range(len(keys))]
+    factories = [player_factory] * len(keys)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        records = list(map(search_opening, keys, factories, seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            records = list(executor.map(search_opening, keys, factories, seeds, chunksize=4))
+
+    entries = np.array(sorted(records), dtype=BOOK_DTYPE)
+    temporary_path = f"{path}.tmp.npy"
+    np.save(temporary_path, entries)
+    os.replace(temporary_path, path)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the most likely openings and write them to an opening book.")
+    parser.add_argument("path", help="Book file to write, a .npy file.")
+    parser.add_argument("--positions", type=int, default=1000, help="Number of openings to search.")
+    parser.add_argument("--samples", type=int, default=None, help="Factory fills sampled to rank the openings.")
+    parser.add_argument("--time-limit", type=float, default=5.0, help="Seconds of alpha-beta search per opening.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes searching, the CPU count by default.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    count = build_opening_book(args.path, functools.partial(AlphaBetaPlayer, time_limit=args.time_limit),
+                               args.positions, args.samples, args.workers, args.seed)
+    print(f"Wrote {count} openings to {args.path}, covering {OpeningBook(args.path).coverage():.4%} of games")
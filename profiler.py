@@ -0,0 +1,92 @@
+"""
+Opt-in wall-clock profiling of game phases.
+
+Pass a PhaseProfiler to GameEngine(profiler=...) and it times every phase of the games the engine
+plays: the game, each turn, the player's decision, applying the move, the tile conservation check,
+event subscribers (e.g. the Visualizer), and end_round with its scoring and factory refill.
+Phases nest, so time is kept per call stack, e.g. ("game", "turn", "make_decision:RandomPlayer").
+"""
+import json
+import time
+
+
+class PhaseProfiler:
+    def __init__(self):
+        self.totals = {}  # Call stack tuple -> [calls, total nanoseconds]
+        self.stack = []
+        self.start_times = []
+
+    def start(self, phase):
+        self.stack.append(phase)
+        self.start_times.append(time.perf_counter_ns())
+
+    def stop(self):
+        elapsed = time.perf_counter_ns() - self.start_times.pop()
+        path = tuple(self.stack)
+        self.stack.pop()
+        entry = self.totals.get(path)
+        if entry is None:
+            self.totals[path] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def reset(self):
+        self.totals = {}
+        self.stack = []
+        self.start_times = []
+
+    def merge(self, other):
+        """Add the timings of another PhaseProfiler, e.g. one from a worker process."""
+        for path, (calls, total) in other.totals.items():
+            entry = self.totals.setdefault(path, [0, 0])
+            entry[0] += calls
+            entry[1] += total
+
+    def self_times(self):
+        """Return {call stack: nanoseconds spent in the phase itself, outside its child phases}."""
+        self_times = {path: total for path, (_, total) in self.totals.items()}
+        for path, (_, total) in self.totals.items():
+            if len(path) > 1 and path[:-1] in self_times:
+                self_times[path[:-1]] -= total
+        return self_times
+
+    def phase_summary(self):
+        """Return {phase: (calls, total seconds)} with each phase summed over every stack it appears in."""
+        summary = {}
+        for path, (calls, total) in self.totals.items():
+            if path[-1] in path[:-1]:
+                continue  # Already counted by the outer call of a recursive phase
+            phase_calls, phase_total = summary.get(path[-1], (0, 0))
+            summary[path[-1]] = (phase_calls + calls, phase_total + total)
+        return {phase: (calls, total / 1e9) for phase, (calls, total) in summary.items()}
+
+    def to_dict(self):
+        self_times = self.self_times()
+        return {
+            "stacks": [
+                {"stack": list(path), "calls": calls, "total_seconds": total / 1e9, "self_seconds": self_times[path] / 1e9}
+                for path, (calls, total) in sorted(self.totals.items())
+            ],
+            "phases": {phase: {"calls": calls, "total_seconds": total} for phase, (calls, total) in self.phase_summary().items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        profiler = cls()
+        for entry in data["stacks"]:
+            profiler.totals[tuple(entry["stack"])] = [entry["calls"], round(entry["total_seconds"] * 1e9)]
+        return profiler
+
+    def write_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def write_collapsed(self, path):
+        """
+        Write the self time of every call stack in microseconds, one "phase;phase;phase value" line each,
+        the collapsed-stack format read by flamegraph.pl, speedscope and similar tools.
+        """
+        with open(path, "w") as file:
+            for stack, self_time in sorted(self.self_times().items()):
+                file.write(f"{';'.join(stack)} {max(self_time // 1000, 0)}\n")
@@ -0,0 +1,70 @@
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    def __init__(self, size_log2=16):
+        """
+        Fixed-size table of search results keyed by State.zobrist_hash, meant to be shared by search agents.
+
+        Each bucket has two slots: the first keeps the deepest result of the current search, the
+        second always takes the newest entry that did not qualify for the first. Memory use never grows.
+
+        :param size_log2: The table holds 2 ** size_log2 buckets.
+        """
+        bucket_count = 1 << size_log2
+        self.bucket_mask = bucket_count - 1
+        slot_count = bucket_count * 2
+        self.keys = [0] * slot_count
+        self.depths = [-1] * slot_count
+        self.values = [0] * slot_count
+        self.flags = [EXACT] * slot_count
+        self.moves = [None] * slot_count
+        self.generations = [0] * slot_count
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """Mark existing entries as stale, so they give way to results of the next search."""
+        self.generation += 1
+
+    def lookup(self, key):
+        """Return (depth, value, flag, move) stored for the key, or None."""
+        self.probes += 1
+        slot = (key & self.bucket_mask) * 2
+        if self.keys[slot] != key or self.depths[slot] < 0:
+            slot += 1
+            if self.keys[slot] != key or self.depths[slot] < 0:
+                return None
+        self.hits += 1
+        return self.depths[slot], self.values[slot], self.flags[slot], self.moves[slot]
+
+    def store(self, key, depth, value, flag=EXACT, move=None):
+        """
+        Store a search result.
+
+        :param depth: Remaining search depth the value was computed with; deeper results are preferred.
+        :param flag: EXACT, LOWER_BOUND or UPPER_BOUND, depending on how the value relates to the true one.
+        :param move: Best move found, useful for move ordering.
+        """
+        slot = (key & self.bucket_mask) * 2
+        # Keep the first slot for the deepest current result, everything else goes to the second one
+        if not (self.keys[slot] == key or self.generations[slot] != self.generation or depth >= self.depths[slot]):
+            slot += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.values[slot] = value
+        self.flags[slot] = flag
+        self.moves[slot] = move
+        self.generations[slot] = self.generation
+
+    def clear(self):
+        for slot in range(len(self.keys)):
+            self.keys[slot] = 0
+            self.depths[slot] = -1
+            self.moves[slot] = None
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
@@ -0,0 +1,36 @@
+"""
+Seed streams for reproducible games.
+
+Every game is played from a single 64-bit game seed. The tile bag and each seat get their own
+random.Random derived from it, so the bag draws do not depend on how the players use their
+randomness, and the same bag sequence can be reused across different pairs of players.
+
+Seeds are derived with NumPy's SeedSequence: the stream (or game) index becomes the spawn key,
+which gives statistically independent, non-overlapping streams from one master seed.
+"""
+import random
+
+import numpy as np
+
+TILE_BAG_STREAM = 0
+SEAT_STREAMS = (1, 2)
+
+
+def derive_seed(seed, index):
+    """Return the 64-bit seed of child stream index of seed, the same as SeedSequence(seed).spawn()[index]."""
+    return int(np.random.SeedSequence(seed, spawn_key=(index,)).generate_state(1, dtype=np.uint64)[0])
+
+
+def spawn_seeds(seed, count):
+    """Return count independent 64-bit seeds derived from one master seed."""
+    return [derive_seed(seed, index) for index in range(count)]
+
+
+def stream_rng(seed, stream):
+    """Return a random.Random for one stream of a game seed."""
+    return random.Random(derive_seed(seed, stream))
+
+
+def new_seed():
+    """Return a fresh 64-bit seed. Drawn from the global random module, so random.seed() still fixes it."""
+    return random.getrandbits(64)
@@ -0,0 +1,316 @@
+"""
+Self-play training data written to memory-mapped NumPy shards.
+
+generate_self_play plays games between two players and stores one fixed-size record per move:
+
+    observations          float32 (OBSERVATION_SIZE,)  encode_observation of the position, from the mover's view
+    action_masks          bool    (ACTION_COUNT,)      legal_action_mask of the position
+    visit_distributions   float32 (ACTION_COUNT,)      the mover's search visits as a distribution, see search_policy
+    outcomes              float32 ()                   1, 0 or -1 as the mover went on to win, tie or lose
+    margins               int16   ()                   final score margin for the mover
+
+A dataset is a directory of shards, shard-00000, shard-00001, ... Each shard holds one preallocated
+.npy file per field, written in place through memory maps, and a meta.json with the number of
+committed records. Records are committed a whole game at a time: the maps are flushed first, then
+meta.json is replaced atomically, so after a crash the records past the committed count are simply
+overwritten. The same SelfPlayWriter resumes a dataset, and SelfPlayDataset reads it, also while it
+is still being written, seeing the games committed when it last refreshed.
+
+    generate_self_play("data", functools.partial(MCTSPlayer, iterations=200), game_count=10000, seed=1)
+    dataset = SelfPlayDataset("data")
+    batch = dataset.sample(256)
+"""
+import argparse
+import functools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from action_space import ACTION_COUNT, encode_move
+from azul_env import OBSERVATION_SIZE, encode_observation, legal_action_mask, outcome
+from game_engine import GameEngine
+from model.mcts_player import MCTSPlayer
+from seeding import derive_seed, new_seed
+
+FIELDS = {
+    "observations": (np.float32, (OBSERVATION_SIZE,)),
+    "action_masks": (np.bool_, (ACTION_COUNT,)),
+    "visit_distributions": (np.float32, (ACTION_COUNT,)),
+    "outcomes": (np.float32, ()),
+    "margins": (np.int16, ()),
+}
+META_FILE = "meta.json"
+
+
+def shard_directories(directory):
+    """Return the committed shards of a dataset, in order. A shard without meta.json was never committed."""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if name.startswith("shard-") and os.path.exists(os.path.join(directory, name, META_FILE))
+    ]
+
+
+def read_meta(shard_directory):
+    with open(os.path.join(shard_directory, META_FILE)) as file:
+        return json.load(file)
+
+
+def search_policy(player, move):
+    """
+    The player's visit distribution over action ids for its last decision: the root visits of an
+    MCTSPlayer (see MCTSPlayer.last_visit_counts), or all the weight on the chosen move for other players
+    and for searches that visited nothing.
+    """
+    distribution = np.zeros(ACTION_COUNT, dtype=np.float32)
+    visit_counts = getattr(player, "last_visit_counts", None)
+    if visit_counts and sum(visit_counts.values()):
+        for action, visits in visit_counts.items():
+            distribution[action] = visits
+        distribution /= distribution.sum()
+    else:
+        distribution[encode_move(move)] = 1.0
+    return distribution
+
+
+def play_self_play_game(player1_factory, player2_factory, seed):
+    """Play one game and return its records as a dictionary of arrays, one row per move, keyed by FIELDS."""
+    engine = GameEngine(print_enabled=False, visualize=False)
+    state = engine.setup_game(player1_factory("Player 1"), player2_factory("Player 2"), seed=seed)
+    observations, action_masks, visit_distributions, movers = [], [], [], []
+    while not state.game_over:
+        player = state.current_player
+        observations.append(encode_observation(state))
+        action_masks.append(legal_action_mask(state))
+        move = player.make_decision(state)
+        visit_distributions.append(search_policy(player, move))
+        movers.append(state.players.index(player))
+        engine.apply_move(state, move)
+        if state.is_round_over():
+            engine.end_round(state)
+
+    seat_margins = [state.player1.score - state.player2.score, state.player2.score - state.player1.score]
+    margins = np.array([seat_margins[mover] for mover in movers], dtype=np.int16)
+    return {
+        "observations": np.stack(observations),
+        "action_masks": np.stack(action_masks),
+        "visit_distributions": np.stack(visit_distributions),
+        "outcomes": np.array([outcome(margin) for margin in margins], dtype=np.float32),
+        "margins": margins,
+    }
+
+
+def play_self_play_chunk(first_game_index, game_count, player1_factory, player2_factory, master_seed):
+    """Play a consecutive chunk of games, game i seeded with derive_seed(master_seed, i). Runs inside a worker process."""
+    return [
+        play_self_play_game(player1_factory, player2_factory, derive_seed(master_seed, game_index))
+        for game_index in range(first_game_index, first_game_index + game_count)
+    ]
+
+
+class SelfPlayWriter:
+    def __init__(self, directory, shard_capacity=65536, seed=None):
+        """
+        Append games to the dataset in directory, creating it if needed, or resuming it after the
+        last committed game. A game never spans two shards: once the current shard cannot hold the
+        next game, a new one is started.
+
+        :param shard_capacity: Records preallocated per new shard. Existing shards keep their own capacity.
+        :param seed: Master seed of the dataset's games, kept in meta.json. A new dataset draws a fresh one
+                     if omitted; a resumed one keeps its own.
+        :raise ValueError: If seed differs from the seed of the dataset being resumed.
+        """
+        self.directory = directory
+        self.shard_capacity = shard_capacity
+        os.makedirs(directory, exist_ok=True)
+        shards = shard_directories(directory)
+        self.shard_index = len(shards) - 1
+        self.arrays = None
+        self.count = 0
+        self.capacity = 0
+        self.game_count = 0  # Games committed to the whole dataset
+        self.seed = seed if seed is not None else new_seed()
+        if shards:
+            meta = read_meta(shards[-1])
+            if seed is not None and meta["seed"] != seed:
+                raise ValueError(f"{directory} holds games of seed {meta['seed']}, not {seed}.")
+            self.seed = meta["seed"]
+            self.count = meta["count"]
+            self.capacity = meta["capacity"]
+            self.game_count = meta["game_count"]
+            self.arrays = {
+                name: np.load(os.path.join(shards[-1], f"{name}.npy"), mmap_mode="r+") for name in FIELDS
+            }
+
+    def new_shard(self):
+        self.close()
+        self.shard_index += 1
+        shard_directory = self.shard_path(self.shard_index)
+        os.makedirs(shard_directory, exist_ok=True)
+        self.arrays = {
+            name: np.lib.format.open_memmap(
+                os.path.join(shard_directory, f"{name}.npy"), mode="w+", dtype=dtype, shape=(self.shard_capacity, *shape))
+            for name, (dtype, shape) in FIELDS.items()
+        }
+        self.count = 0
+        self.capacity = self.shard_capacity
+        self.commit()
+
+    def shard_path(self, shard_index):
+        return os.path.join(self.directory, f"shard-{shard_index:05d}")
+
+    def add_game(self, records):
+        """Write and commit the records of one game, a dictionary of arrays as returned by play_self_play_game."""
+        record_count = len(records["outcomes"])
+        if record_count > self.shard_capacity:
+            raise ValueError(f"A game of {record_count} records does not fit in shards of {self.shard_capacity}.")
+        if self.arrays is None or self.count + record_count > self.capacity:
+            self.new_shard()
+        for name, array in self.arrays.items():
+            array[self.count:self.count + record_count] = records[name]
+        self.count += record_count
+        self.game_count += 1
+        self.commit()
+
+    def commit(self):
+        """Flush the records to disk, then atomically publish the new record count."""
+        for array in self.arrays.values():
+            array.flush()
+        shard_directory = self.shard_path(self.shard_index)
+        temporary_path = os.path.join(shard_directory, META_FILE + ".tmp")
+        with open(temporary_path, "w") as file:
+            json.dump({"count": self.count, "capacity": self.capacity, "game_count": self.game_count, "seed": self.seed}, file)
+        os.replace(temporary_path, os.path.join(shard_directory, META_FILE))
+
+    def close(self):
+        if self.arrays is not None:
+            for array in self.arrays.values():
+                array.flush()
+        self.arrays = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SelfPlayDataset:
+    def __init__(self, directory, seed=None):
+        """
+        Read-only view of a self-play dataset. The shards are memory-mapped, so nothing is loaded
+        into RAM up front and every process reading the dataset shares the OS page cache.
+
+        :param seed: Seed of the minibatch sampling.
+        """
+        self.directory = directory
+        self.rng = np.random.default_rng(seed)
+        self.shards = []  # Per shard, {field: memory-mapped array}
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.batch_buffers = {}  # batch size -> {field: array}, reused by sample
+        self.refresh()
+
+    def refresh(self):
+        """Pick up the records committed since the dataset was opened or last refreshed."""
+        shards = shard_directories(self.directory)
+        counts = []
+        for index, shard_directory in enumerate(shards):
+            if index == len(self.shards):
+                self.shards.append({name: np.load(os.path.join(shard_directory, f"{name}.npy"), mmap_mode="r") for name in FIELDS})
+            counts.append(read_meta(shard_directory)["count"])
+        self.counts = np.array(counts, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)))
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def shard(self, index):
+        """Return the committed records of a shard as {field: array}, views of the mapping without copies."""
+        return {name: array[:self.counts[index]] for name, array in self.shards[index].items()}
+
+    def sample(self, batch_size):
+        """
+        Return a random minibatch as {field: array}, drawn uniformly with replacement from every committed record.
+
+        Each record is copied once, from the page cache straight into arrays kept for the batch size,
+        so the arrays are overwritten by the next sample of the same size.
+        """
+        if not len(self):
+            raise ValueError("The dataset holds no records yet.")
+        indices = np.sort(self.rng.integers(len(self), size=batch_size))
+        shard_indices = np.searchsorted(self.offsets, indices, side="right") - 1
+        buffers = self.batch_buffers.get(batch_size)
+        if buffers is None:
+            buffers = self.batch_buffers[batch_size] = {
+                name: np.empty((batch_size, *shape), dtype=dtype) for name, (dtype, shape) in FIELDS.items()
+            }
+        # Indices are sorted, so each shard's records form one run of the batch
+        bounds = np.searchsorted(shard_indices, np.arange(len(self.shards) + 1))
+        for shard_index, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if start == end:
+                continue
+            rows = indices[start:end] - self.offsets[shard_index]
+            for name, array in self.shards[shard_index].items():
+                np.take(array, rows, axis=0, out=buffers[name][start:end])
+        return buffers
+
+
+def generate_self_play(directory, player1_factory, player2_factory=None, game_count=1000, seed=None,
+                       shard_capacity=65536, workers=None, chunk_size=4):
+    """
+    Play games until the dataset in directory holds game_count games, and return the number played.
+    Game i is seeded with derive_seed(seed, i) and games are committed in order, so running the same
+    call again after a crash resumes the run with the games that were missing. The seed is kept with
+    the dataset, so a resumed run can omit it; passing a different one raises a ValueError.
+
+    :param player1_factory: Picklable callable taking a player name and returning a Player, e.g. an MCTSPlayer.
+    :param player2_factory: Same for the second seat, player1_factory by default.
+    :param workers: Number of worker processes. Defaults to the CPU count; 1 plays in-process.
+    """
+    player2_factory = player2_factory if player2_factory is not None else player1_factory
+    workers = workers or os.cpu_count() or 1
+    with SelfPlayWriter(directory, shard_capacity, seed) as writer:
+        seed = writer.seed
+        first_game_index = writer.game_count
+        chunks = [
+            (chunk_start, min(chunk_size, game_count - chunk_start))
+            for chunk_start in range(first_game_index, game_count, chunk_size)
+        ]
+        if workers == 1:
+            for chunk_start, count in chunks:
+                for records in play_self_play_chunk(chunk_start, count, player1_factory, player2_factory, seed):
+                    writer.add_game(records)
+            return max(game_count - first_game_index, 0)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_chunk = 0
+            # Keep a bounded number of chunks in flight, and write them in game order
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < workers * 2:
+                    chunk_start, count = chunks[next_chunk]
+                    pending.append(executor.submit(
+                        play_self_play_chunk, chunk_start, count, player1_factory, player2_factory, seed))
+                    next_chunk += 1
+                for records in pending.popleft().result():
+                    writer.add_game(records)
+    return max(game_count - first_game_index, 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play MCTS self-play games and write them as training data.")
+    parser.add_argument("directory", help="Dataset directory, created or resumed.")
+    parser.add_argument("--games", type=int, default=1000, help="Games the dataset should hold.")
+    parser.add_argument("--iterations", type=int, default=200, help="MCTS iterations per move.")
+    parser.add_argument("--shard-capacity", type=int, default=65536, help="Records per shard.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes playing, the CPU count by default.")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed of a new dataset; a resumed one keeps its own.")
+    args = parser.parse_args()
+    played = generate_self_play(args.directory, functools.partial(MCTSPlayer, iterations=args.iterations),
+                                game_count=args.games, seed=args.seed, shard_capacity=args.shard_capacity,
+                                workers=args.workers)
+    print(f"Played {played} games, {len(SelfPlayDataset(args.directory))} records in {args.directory}")
@@ -0,0 +1,273 @@
+"""
+Constant-memory statistics of arbitrarily many games.
+
+StreamingStatistics folds GameResults in one at a time and keeps only summaries whose size does not
+grow with the number of games: exact histograms of the integer scores, margins and per-round
+penalties, and sums per round and per seat. Every summary is a count or a sum, so partial statistics
+from different workers or runs merge exactly, in any order, into the same numbers as one run.
+
+Quantiles come from the histograms. Scores are small integers, so the histograms are exact and
+mergeable quantile sketches at once, with no approximation error.
+
+The per-round and board statistics need the details GameDetailsRecorder adds to a GameResult, see
+batch_simulator.play_single_game(details=True) and BatchSimulator.stream.
+"""
+from model.player_board import ROW_BONUS, COLUMN_BONUS, COLOR_BONUS
+
+
+class IntegerHistogram:
+    def __init__(self):
+        """Exact histogram of integer values: value -> number of times it was seen."""
+        self.counts = {}
+        self.total = 0
+        self.value_sum = 0
+
+    def add(self, value, count=1):
+        self.counts[value] = self.counts.get(value, 0) + count
+        self.total += count
+        self.value_sum += value * count
+
+    def merge(self, other):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.total += other.total
+        self.value_sum += other.value_sum
+
+    @property
+    def mean(self):
+        return self.value_sum / self.total if self.total else 0.0
+
+    def quantile(self, q):
+        """Return the smallest value with at least a share q of the values at or below it, or None if empty."""
+        if not self.total:
+            return None
+        rank = max(q * self.total, 1)
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value
+        return max(self.counts)
+
+    def quantiles(self, qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        return {q: self.quantile(q) for q in qs}
+
+    def to_dict(self):
+        return dict(sorted(self.counts.items()))
+
+    @classmethod
+    def from_dict(cls, counts):
+        histogram = cls()
+        for value, count in counts.items():
+            histogram.add(int(value), count)  # JSON turns the keys into strings
+        return histogram
+
+
+class GameDetailsRecorder:
+    """
+    Subscriber that records the round scores, floor penalties and completed wall sets of a game,
+    for StreamingStatistics. Reused across games: each GameStarted starts a new record.
+    """
+
+    def __init__(self):
+        self.round_scores = []
+        self.floor_penalties = []
+        self.completed_sets = []
+
+    def handle_event(self, event):
+        handler = getattr(self, "on_" + type(event).__name__, None)
+        if handler is not None:
+            handler(event)
+
+    def on_GameStarted(self, event):
+        self.round_scores = []
+        self.floor_penalties = []
+        self.completed_sets = []
+
+    def on_RoundEnded(self, event):
+        # Taken before scoring, while the floor lines are still full
+        self.floor_penalties.append([-player.board.score_floor_line() for player in event.state.players])
+
+    def on_RoundScored(self, event):
+        self.round_scores.append(list(event.round_scores))
+
+    def on_GameOver(self, event):
+        self.completed_sets = [
+            [player.board.calculate_completed_rows_score() // ROW_BONUS,
+             player.board.calculate_completed_columns_score() // COLUMN_BONUS,
+             player.board.calculate_completed_color_sets_score() // COLOR_BONUS]
+            for player in event.state.players
+        ]
+
+
+class StreamingStatistics:
+    def __init__(self):
+        self.game_count = 0
+        self.win_counts = [0, 0]  # Outright wins per seat, ties excluded
+        self.tie_count = 0
+        self.score_histograms = [IntegerHistogram(), IntegerHistogram()]
+        self.margin_histogram = IntegerHistogram()  # First seat's score minus the second seat's
+        self.round_histogram = IntegerHistogram()  # Rounds played per game
+
+        # Only from results with details, see GameDetailsRecorder
+        self.detailed_game_count = 0
+        self.round_game_counts = {}  # round number -> number of games that played it
+        self.round_point_sums = {}  # round number -> points scored in the round, per seat
+        self.cumulative_score_sums = {}  # round number -> score after the round, per seat, end-game bonuses excluded
+        self.penalized_round_counts = [0, 0]  # Rounds ending with a floor penalty, per seat
+        self.penalty_histograms = [IntegerHistogram(), IntegerHistogram()]  # Floor penalty points per round, per seat
+        self.completed_set_sums = [[0, 0, 0], [0, 0, 0]]  # Completed rows, columns and color sets, per seat
+
+    def add(self, result):
+        """Fold a single GameResult into the statistics."""
+        self.game_count += 1
+        if result.is_tie:
+            self.tie_count += 1
+        else:
+            self.win_counts[result.winning_seats[0]] += 1
+        for seat, score in enumerate(result.scores):
+            self.score_histograms[seat].add(score)
+        self.margin_histogram.add(result.scores[0] - result.scores[1])
+        self.round_histogram.add(result.rounds_played)
+
+        if result.round_scores is None:
+            return
+        self.detailed_game_count += 1
+        cumulative = [0, 0]
+        for round_number, round_scores in enumerate(result.round_scores, start=1):
+            self.round_game_counts[round_number] = self.round_game_counts.get(round_number, 0) + 1
+            point_sums = self.round_point_sums.setdefault(round_number, [0, 0])
+            cumulative_sums = self.cumulative_score_sums.setdefault(round_number, [0, 0])
+            for seat, points in enumerate(round_scores):
+                cumulative[seat] += points
+                point_sums[seat] += points
+                cumulative_sums[seat] += cumulative[seat]
+        for penalties in result.floor_penalties:
+            for seat, penalty in enumerate(penalties):
+                self.penalty_histograms[seat].add(penalty)
+                if penalty:
+                    self.penalized_round_counts[seat] += 1
+        for seat, completed_sets in enumerate(result.completed_sets):
+            for index, count in enumerate(completed_sets):
+                self.completed_set_sums[seat][index] += count
+
+    def add_all(self, results):
+        for result in results:
+            self.add(result)
+
+    def merge(self, other):
+        """Merge another StreamingStatistics into this one, e.g. a worker's partial statistics."""
+        self.game_count += other.game_count
+        self.tie_count += other.tie_count
+        self.detailed_game_count += other.detailed_game_count
+        self.margin_histogram.merge(other.margin_histogram)
+        self.round_histogram.merge(other.round_histogram)
+        for seat in range(2):
+            self.win_counts[seat] += other.win_counts[seat]
+            self.score_histograms[seat].merge(other.score_histograms[seat])
+            self.penalized_round_counts[seat] += other.penalized_round_counts[seat]
+            self.penalty_histograms[seat].merge(other.penalty_histograms[seat])
+            for index in range(3):
+                self.completed_set_sums[seat][index] += other.completed_set_sums[seat][index]
+        for round_number, count in other.round_game_counts.items():
+            self.round_game_counts[round_number] = self.round_game_counts.get(round_number, 0) + count
+        for sums, other_sums in ((self.round_point_sums, other.round_point_sums),
+                                 (self.cumulative_score_sums, other.cumulative_score_sums)):
+            for round_number, seat_sums in other_sums.items():
+                totals = sums.setdefault(round_number, [0, 0])
+                totals[0] += seat_sums[0]
+                totals[1] += seat_sums[1]
+
+    def win_rate(self, seat):
+        return self.win_counts[seat] / self.game_count if self.game_count else 0.0
+
+    @property
+    def tie_rate(self):
+        return self.tie_count / self.game_count if self.game_count else 0.0
+
+    @property
+    def first_player_advantage(self):
+        """
+        Win rate of the first seat minus that of the second. The first seat always moves first in the
+        first round, so between equal players this measures the advantage of moving first.
+        """
+        return self.win_rate(0) - self.win_rate(1)
+
+    def mean_score(self, seat):
+        return self.score_histograms[seat].mean
+
+    def floor_penalty_rate(self, seat):
+        """Share of rounds the seat ended with a floor penalty."""
+        round_count = self.penalty_histograms[seat].total
+        return self.penalized_round_counts[seat] / round_count if round_count else 0.0
+
+    def mean_completed_sets(self, seat):
+        """Return the mean completed rows, columns and color sets at the end of the game for a seat."""
+        count = self.detailed_game_count
+        rows, columns, color_sets = (total / count if count else 0.0 for total in self.completed_set_sums[seat])
+        return {"rows": rows, "columns": columns, "color_sets": color_sets}
+
+    def round_curves(self):
+        """Return, per round, the mean points scored in it and the mean score after it, per seat, over the games that played it."""
+        curves = {}
+        for round_number, count in sorted(self.round_game_counts.items()):
+            curves[round_number] = {
+                "games": count,
+                "mean_points": [total / count for total in self.round_point_sums[round_number]],
+                "mean_score": [total / count for total in self.cumulative_score_sums[round_number]],
+            }
+        return curves
+
+    def summary(self):
+        """Return the aggregate statistics as a plain dictionary."""
+        return {
+            "games": self.game_count,
+            "win_rate": [self.win_rate(seat) for seat in range(2)],
+            "tie_rate": self.tie_rate,
+            "first_player_advantage": self.first_player_advantage,
+            "mean_score": [self.mean_score(seat) for seat in range(2)],
+            "score_quantiles": [histogram.quantiles() for histogram in self.score_histograms],
+            "margin_quantiles": self.margin_histogram.quantiles(),
+            "mean_rounds": self.round_histogram.mean,
+            "round_curves": self.round_curves(),
+            "floor_penalty_rate": [self.floor_penalty_rate(seat) for seat in range(2)],
+            "mean_floor_penalty": [histogram.mean for histogram in self.penalty_histograms],
+            "mean_completed_sets": [self.mean_completed_sets(seat) for seat in range(2)],
+        }
+
+    def to_dict(self):
+        """Return every count and sum as JSON-friendly data, to store partial statistics and merge them later."""
+        return {
+            "game_count": self.game_count,
+            "win_counts": self.win_counts,
+            "tie_count": self.tie_count,
+            "score_histograms": [histogram.to_dict() for histogram in self.score_histograms],
+            "margin_histogram": self.margin_histogram.to_dict(),
+            "round_histogram": self.round_histogram.to_dict(),
+            "detailed_game_count": self.detailed_game_count,
+            "round_game_counts": self.round_game_counts,
+            "round_point_sums": self.round_point_sums,
+            "cumulative_score_sums": self.cumulative_score_sums,
+            "penalized_round_counts": self.penalized_round_counts,
+            "penalty_histograms": [histogram.to_dict() for histogram in self.penalty_histograms],
+            "completed_set_sums": self.completed_set_sums,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        statistics = cls()
+        statistics.game_count = data["game_count"]
+        statistics.win_counts = list(data["win_counts"])
+        statistics.tie_count = data["tie_count"]
+        statistics.score_histograms = [IntegerHistogram.from_dict(counts) for counts in data["score_histograms"]]
+        statistics.margin_histogram = IntegerHistogram.from_dict(data["margin_histogram"])
+        statistics.round_histogram = IntegerHistogram.from_dict(data["round_histogram"])
+        statistics.detailed_game_count = data["detailed_game_count"]
+        statistics.round_game_counts = {int(round_number): count for round_number, count in data["round_game_counts"].items()}
+        statistics.round_point_sums = {int(round_number): list(sums) for round_number, sums in data["round_point_sums"].items()}
+        statistics.cumulative_score_sums = {
+            int(round_number): list(sums) for round_number, sums in data["cumulative_score_sums"].items()}
+        statistics.penalized_round_counts = list(data["penalized_round_counts"])
+        statistics.penalty_histograms = [IntegerHistogram.from_dict(counts) for counts in data["penalty_histograms"]]
+        statistics.completed_set_sums = [list(sums) for sums in data["completed_set_sums"]]
+        return statistics
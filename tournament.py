@@ -0,0 +1,313 @@
+"""
+Round-robin tournaments between players.
+
+Every pairing plays pairs of games: both games of a pair use the same game seed, with the players
+swapping seats, so luck of the draw and the first-player advantage cancel out within the pair. Pair k
+uses the same seed in every pairing, so all pairings are played on the same deals.
+
+Each pairing stops early once a sequential probability ratio test (SPRT) decides between two Elo
+hypotheses, and the players are rated with a Bradley-Terry model fitted to all games, reported
+as Elo with confidence intervals.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import combinations
+
+import numpy as np
+
+from batch_simulator import play_single_game
+from seeding import derive_seed
+
+ELO_PER_NATURAL_UNIT = 400 / math.log(10)
+Z_95 = 1.959964
+
+
+def game_points(result, seat):
+    """1 for a win, 0.5 for a tie and 0 for a loss, for the player in the given seat."""
+    if seat not in result.winning_seats:
+        return 0.0
+    return 0.5 if result.is_tie else 1.0
+
+
+def play_game_pairs(player_a_factory, player_b_factory, master_seed, first_pair, pair_count):
+    """
+    Play pair_count pairs of games between players A and B. Runs inside a worker process.
+
+    :return: A list of (points of A in the first game, points of A in the second game). A sits
+             in the first seat in the first game and in the second seat in the second game.
+    """
+    pairs = []
+    for pair_index in range(first_pair, first_pair + pair_count):
+        seed = derive_seed(master_seed, pair_index)
+        first = play_single_game(2 * pair_index, player_a_factory, player_b_factory, seed)
+        second = play_single_game(2 * pair_index + 1, player_b_factory, player_a_factory, seed)
+        pairs.append((game_points(first, 0), game_points(second, 1)))
+    return pairs
+
+
+def expected_score(elo):
+    """Expected points per game for an Elo advantage, under the logistic Elo model."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_from_score(score):
+    """Elo advantage matching points per game, clamped so a perfect score stays finite."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+class SPRT:
+    def __init__(self, elo0=-20.0, elo1=20.0, alpha=0.05, beta=0.05):
+        """
+        Sequential probability ratio test of H0: Elo = elo0 against H1: Elo = elo1, for the first
+        player of a pairing. With the default symmetric hypotheses, accepting H1 means the first
+        player is stronger and accepting H0 means the second is.
+
+        The log-likelihood ratio uses the normal approximation over game pairs (the pentanomial
+        model), which accounts for the correlation between the two games of a pair.
+
+        :param alpha: False positive rate, accepting H1 when H0 holds.
+        :param beta: False negative rate, accepting H0 when H1 holds.
+        """
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+
+    def llr(self, pair_counts):
+        """
+        Log-likelihood ratio for pair_counts[k], the number of pairs in which the first player
+        scored k / 2 points (k = 0 to 4).
+        """
+        if not sum(pair_counts):
+            return 0.0
+        # A tiny count in every bucket keeps the variance positive when every pair scored the same,
+        # e.g. when one player won every game
+        pair_counts = [max(count, 1e-3) for count in pair_counts]
+        pair_total = sum(pair_counts)
+        scores = [k / 4 for k in range(5)]
+        mean = sum(count * score for count, score in zip(pair_counts, scores)) / pair_total
+        variance = sum(count * (score - mean) ** 2 for count, score in zip(pair_counts, scores)) / pair_total
+        score0 = expected_score(self.elo0)
+        score1 = expected_score(self.elo1)
+        return pair_total * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+    def decision(self, llr):
+        """Return "H1" or "H0" once llr crosses a bound, else None."""
+        if llr >= self.upper_bound:
+            return "H1"
+        if llr <= self.lower_bound:
+            return "H0"
+        return None
+
+
+class Pairing:
+    def __init__(self, player_a, player_b):
+        self.player_a = player_a
+        self.player_b = player_b
+        self.pair_counts = [0] * 5  # Pairs in which player A scored 0, 0.5, 1, 1.5 and 2 points
+        self.wins = 0  # Games won, tied and lost by player A
+        self.ties = 0
+        self.losses = 0
+        self.pairs_scheduled = 0
+        self.llr = 0.0
+        self.decision = None  # "H0" or "H1" once the SPRT stopped the pairing
+
+    @property
+    def pairs_played(self):
+        return sum(self.pair_counts)
+
+    @property
+    def games_played(self):
+        return 2 * self.pairs_played
+
+    def add_pair(self, first_points, second_points):
+        self.pair_counts[round(2 * (first_points + second_points))] += 1
+        for points in (first_points, second_points):
+            if points == 1:
+                self.wins += 1
+            elif points == 0.5:
+                self.ties += 1
+            else:
+                self.losses += 1
+
+    def score(self):
+        """Points per game of player A."""
+        return (self.wins + 0.5 * self.ties) / self.games_played if self.games_played else 0.5
+
+    def elo_difference(self):
+        """Elo of player A over player B, with its 95% confidence interval, from the pair scores."""
+        pair_total = self.pairs_played
+        if not pair_total:
+            return 0.0, (-math.inf, math.inf)
+        scores = [k / 4 for k in range(5)]
+        mean = sum(count * score for count, score in zip(self.pair_counts, scores)) / pair_total
+        variance = sum(count * (score - mean) ** 2 for count, score in zip(self.pair_counts, scores)) / pair_total
+        margin = Z_95 * math.sqrt(variance / pair_total)
+        return elo_from_score(mean), (elo_from_score(mean - margin), elo_from_score(mean + margin))
+
+    def summary(self):
+        elo, (low, high) = self.elo_difference()
+        return {
+            "players": [self.player_a, self.player_b],
+            "games": self.games_played,
+            "wins": self.wins,
+            "ties": self.ties,
+            "losses": self.losses,
+            "pair_counts": list(self.pair_counts),
+            "elo": elo,
+            "elo_interval": [low, high],
+            "llr": self.llr,
+            "decision": self.decision,
+        }
+
+
+def bradley_terry_ratings(names, pairings, prior_ties=1.0, iterations=1000, tolerance=1e-10):
+    """
+    Fit Bradley-Terry strengths to the games of the pairings, ties counting as half a win each,
+    and return {name: (elo, standard error)} with the mean rating at 0.
+
+    :param prior_ties: Virtual tied games added to every pairing, so players that won or lost
+                       every game still get finite ratings.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    player_count = len(names)
+    games = np.zeros((player_count, player_count))
+    points = np.zeros((player_count, player_count))  # points[i, j]: points i scored against j
+    for pairing in pairings:
+        a, b = index[pairing.player_a], index[pairing.player_b]
+        a_points = pairing.wins + 0.5 * pairing.ties + 0.5 * prior_ties
+        b_points = pairing.losses + 0.5 * pairing.ties + 0.5 * prior_ties
+        games[a, b] = games[b, a] = pairing.games_played + prior_ties
+        points[a, b] = a_points
+        points[b, a] = b_points
+
+    # Minorization-maximization updates (Hunter, 2004)
+    strengths = np.ones(player_count)
+    total_points = points.sum(axis=1)
+    for _ in range(iterations):
+        denominators = (games / (strengths[:, None] + strengths[None, :])).sum(axis=1)
+        updated = np.where(denominators > 0, total_points / np.maximum(denominators, 1e-300), strengths)
+        updated /= np.exp(np.log(updated).mean())
+        converged = np.max(np.abs(updated - strengths)) < tolerance
+        strengths = updated
+        if converged:
+            break
+
+    # Standard errors from the Fisher information of the log-strengths; the pseudo-inverse
+    # takes care of the ratings only being defined up to a common shift
+    thetas = np.log(strengths)
+    win_probabilities = 1 / (1 + np.exp(thetas[None, :] - thetas[:, None]))
+    weights = games * win_probabilities * (1 - win_probabilities)
+    information = np.diag(weights.sum(axis=1)) - weights
+    covariance = np.linalg.pinv(information)
+    standard_errors = np.sqrt(np.maximum(np.diag(covariance), 0))
+    thetas -= thetas.mean()
+    return {name: (float(thetas[i] * ELO_PER_NATURAL_UNIT), float(standard_errors[i] * ELO_PER_NATURAL_UNIT))
+            for name, i in index.items()}
+
+
+class Tournament:
+    def __init__(self, players, workers=None, seed=None, sprt=None, min_pairs=10, max_pairs=200, batch_pairs=4):
+        """
+        Round robin between players, played across a process pool.
+
+        :param players: {name: player factory}, each a picklable callable taking a player name and
+                        returning a Player, as for BatchSimulator.
+        :param workers: Number of worker processes. Defaults to the CPU count; 1 plays in-process.
+        :param seed: Master seed of the game pairs. A fresh one is drawn if omitted and kept in self.seed.
+        :param sprt: SPRT deciding when a pairing can stop. Defaults to SPRT().
+        :param min_pairs: Game pairs every pairing plays before the SPRT may stop it.
+        :param max_pairs: Game pairs after which an undecided pairing stops anyway.
+        :param batch_pairs: Game pairs per task sent to a worker.
+        """
+        self.players = players
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self.sprt = sprt if sprt is not None else SPRT()
+        self.min_pairs = min_pairs
+        self.max_pairs = max_pairs
+        self.batch_pairs = batch_pairs
+        self.pairings = [Pairing(player_a, player_b) for player_a, player_b in combinations(players, 2)]
+
+    def is_active(self, pairing):
+        return pairing.decision is None and pairing.pairs_scheduled < self.max_pairs
+
+    def next_task(self):
+        """Schedule a batch of game pairs for the active pairing with the fewest scheduled pairs."""
+        active = [pairing for pairing in self.pairings if self.is_active(pairing)]
+        if not active:
+            return None
+        pairing = min(active, key=lambda candidate: candidate.pairs_scheduled)
+        first_pair = pairing.pairs_scheduled
+        pair_count = min(self.batch_pairs, self.max_pairs - first_pair)
+        pairing.pairs_scheduled += pair_count
+        arguments = (self.players[pairing.player_a], self.players[pairing.player_b], self.seed, first_pair, pair_count)
+        return pairing, arguments
+
+    def add_results(self, pairing, pairs):
+        for first_points, second_points in pairs:
+            pairing.add_pair(first_points, second_points)
+        pairing.llr = self.sprt.llr(pairing.pair_counts)
+        if pairing.decision is None and pairing.pairs_played >= self.min_pairs:
+            pairing.decision = self.sprt.decision(pairing.llr)
+
+    def run(self, on_update=None):
+        """
+        Play until every pairing is decided or reached max_pairs, and return the summary.
+
+        :param on_update: Optional callback receiving each Pairing after new results were added to it.
+        """
+        if self.workers == 1:
+            while True:
+                task = self.next_task()
+                if task is None:
+                    break
+                pairing, arguments = task
+                self.add_results(pairing, play_game_pairs(*arguments))
+                if on_update is not None:
+                    on_update(pairing)
+            return self.summary()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            while True:
+                # Keep a bounded number of tasks in flight, so stopped pairings waste little work
+                while len(pending) < self.workers * 2:
+                    task = self.next_task()
+                    if task is None:
+                        break
+                    pairing, arguments = task
+                    pending[executor.submit(play_game_pairs, *arguments)] = pairing
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pairing = pending.pop(future)
+                    self.add_results(pairing, future.result())
+                    if on_update is not None:
+                        on_update(pairing)
+        return self.summary()
+
+    def ratings(self):
+        """Return {name: (elo, standard error)}, see bradley_terry_ratings."""
+        return bradley_terry_ratings(list(self.players), self.pairings)
+
+    def summary(self):
+        """Return the standings and the pairings as a plain dictionary."""
+        standings = []
+        for name, (elo, standard_error) in sorted(self.ratings().items(), key=lambda item: -item[1][0]):
+            standings.append({
+                "player": name,
+                "elo": elo,
+                "elo_interval": [elo - Z_95 * standard_error, elo + Z_95 * standard_error],
+                "games": sum(pairing.games_played for pairing in self.pairings if name in (pairing.player_a, pairing.player_b)),
+            })
+        return {
+            "seed": self.seed,
+            "standings": standings,
+            "pairings": [pairing.summary() for pairing in self.pairings],
+        }
@@ -2,7 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Circle, Rectangle
 from enums.tile_color import TileColor
-from model.starting_player_tile import StartingPlayerTile  # Assuming this is the class for the starting player tile
+from events import TurnStarted
 
 class Visualizer:
     def __init__(self):
@@ -16,14 +16,16 @@ class Visualizer:
             'None': 'grey'  # For empty spots
         }
         self.starting_player_tile_color = 'orange'  # Define color for starting player tile
+        self.floor_tile_color = 'dimgrey'  # Floor line tiles are not tracked by color
 
     def draw_factory(self, ax, factory, position):
         x, y = position
         factory_radius = 1
         ax.add_patch(Circle((x, y), factory_radius, edgecolor='black', facecolor='lightgrey'))
-        for i, tile in enumerate(factory.tiles):
-            tile_color = self.color_map.get(tile.color, 'grey')
-            angle = i * (360 / len(factory.tiles))
+        tiles = [color for color, count in factory.tile_counts.items() for _ in range(count)]
+        for i, color in enumerate(tiles):
+            tile_color = self.color_map.get(color, 'grey')
+            angle = i * (360 / len(tiles))
             tile_x = x + 0.5 * factory_radius * np.cos(np.radians(angle))
             tile_y = y + 0.5 * factory_radius * np.sin(np.radians(angle))
             ax.add_patch(Circle((tile_x, tile_y), 0.2, color=tile_color))
@@ -32,46 +34,46 @@ class Visualizer:
         x, y = position
         central_factory_radius = 2
         ax.add_patch(Circle((x, y), central_factory_radius, edgecolor='black', facecolor='lightgrey'))
-        for i, tile in enumerate(central_factory.tiles):
-            if isinstance(tile, StartingPlayerTile):
+        # The starting player tile, if still there, is drawn first
+        tiles = [None] * central_factory.has_starting_player_tile()
+        tiles += [color for color, count in central_factory.tile_counts.items() for _ in range(count)]
+        for i, color in enumerate(tiles):
+            if color is None:
                 tile_color = self.starting_player_tile_color
             else:
-                tile_color = self.color_map.get(tile.color, 'grey')
-            angle = i * (360 / len(central_factory.tiles))
+                tile_color = self.color_map.get(color, 'grey')
+            angle = i * (360 / len(tiles))
             tile_x = x + 0.75 * central_factory_radius * np.cos(np.radians(angle))
             tile_y = y + 0.75 * central_factory_radius * np.sin(np.radians(angle))
             ax.add_patch(Circle((tile_x, tile_y), 0.2, color=tile_color))
 
     def draw_pattern_lines(self, ax, pattern_lines, position):
         x, y = position
-        for i, line in enumerate(pattern_lines):
+        for i, (color, count) in enumerate(pattern_lines):
             for j in range(i + 1):
-                tile = line[j] if j < len(line) else None
-                tile_color = self.color_map.get(tile.color, 'grey') if tile else 'grey'
-                edgecolor = 'black' if tile else 'lightgrey'
+                tile_color = self.color_map.get(color, 'grey') if j < count else 'grey'
+                edgecolor = 'black' if j < count else 'lightgrey'
                 ax.add_patch(Rectangle((x + j * 0.5, y - i * 0.5), 0.5, 0.5, edgecolor=edgecolor, facecolor=tile_color))
 
-    def draw_wall(self, ax, wall, wall_pattern, position):
+    def draw_wall(self, ax, board, position):
         x, y = position
-        for i, row in enumerate(wall):
-            for j, tile in enumerate(row):
-                tile_color = self.color_map.get(tile.color, 'grey') if tile else 'grey'
-                pattern_color = self.color_map[wall_pattern[i][j]]
-                if not tile:
+        for i in range(5):
+            for j in range(5):
+                pattern_color = self.color_map[board.wall_pattern[i][j]]
+                if not board.has_tile_on_wall(i, j):
                     ax.add_patch(Rectangle((x + j * 0.5, y - i * 0.5), 0.5, 0.5, edgecolor='black', facecolor=pattern_color, alpha=0.3))
                 else:
-                    ax.add_patch(Rectangle((x + j * 0.5, y - i * 0.5), 0.5, 0.5, edgecolor='black', facecolor=tile_color))
+                    ax.add_patch(Rectangle((x + j * 0.5, y - i * 0.5), 0.5, 0.5, edgecolor='black', facecolor=pattern_color))
 
-    def draw_floor_line(self, ax, floor_line, position):
+    def draw_floor_line(self, ax, board, position):
         x, y = position
         max_floor_tiles = 7
+        # The board only tracks how many floor tiles there are, the starting player tile comes first
         for i in range(max_floor_tiles):
-            if i < len(floor_line):
-                tile = floor_line[i]
-                if isinstance(tile, StartingPlayerTile):
-                    tile_color = self.starting_player_tile_color
-                else:
-                    tile_color = self.color_map.get(tile.color, 'grey')
+            if i < board.has_starting_marker:
+                tile_color = self.starting_player_tile_color
+            elif i < board.floor_line_length():
+                tile_color = self.floor_tile_color
             else:
                 tile_color = 'grey'
             ax.add_patch(Rectangle((x + i * 0.5, y), 0.5, 0.5, edgecolor='black', facecolor=tile_color))
@@ -92,10 +94,15 @@ class Visualizer:
         floor_line_pos = (position[0], position[1] - 3)
         score_pos = (position[0], position[1] - 4.5)
         self.draw_pattern_lines(ax, board.pattern_lines, pattern_lines_pos)
-        self.draw_wall(ax, board.wall, board.wall_pattern, wall_pos)
-        self.draw_floor_line(ax, board.floor_line, floor_line_pos)
+        self.draw_wall(ax, board, wall_pos)
+        self.draw_floor_line(ax, board, floor_line_pos)
         self.draw_score(ax, score, score_pos)
 
+    def handle_event(self, event):
+        """Draw the game at the start of every turn when subscribed to a GameEngine."""
+        if isinstance(event, TurnStarted):
+            self.draw_game_state(event.state)
+
     def draw_game_state(self, state):
         fig, ax = plt.subplots(figsize=(15, 15), dpi=100)
         ax.set_xlim(0, 20)